@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量任务模式 - 使用 OpenAI 兼容的 Batch API 离线翻译整个文件
+
+不着急的全量翻译可以用 Batch API：价格更低、不占用实时接口的速率限制，
+代价是结果要等服务端处理完（通常几小时内，最长24小时）。
+
+使用方法:
+    # 提交：把所有需要翻译的内容写成JSONL请求文件并上传，任务信息保存在 *.batch.json
+    python translate_csv.py batch submit input.csv --api-type openai -o output.csv
+
+    # 查询进度（可以在另一台机器/几天后执行）
+    python translate_csv.py batch status output.csv.batch.json
+
+    # 下载结果并写入输出CSV
+    python translate_csv.py batch collect output.csv.batch.json
+
+任务清单(*.batch.json)记录了输入/输出文件、batch ID 和端点，
+请求文件(*.batch.jsonl)保存在清单旁边，方便排查。
+"""
+
+import json
+import time
+import uuid
+import argparse
+import urllib.request
+import urllib.error
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from compressed_io import split_compression_suffix
+from translate_csv import CSVTranslator, load_api_config
+
+
+class BatchAPIError(Exception):
+    """Batch API 请求失败"""
+
+
+class BatchClient:
+    """OpenAI 兼容 Batch API 的最小客户端（只依赖标准库）"""
+
+    def __init__(self, endpoint: str, api_key: str, timeout: float = 60.0):
+        self.endpoint = endpoint.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None,
+                 content_type: Optional[str] = None) -> bytes:
+        request = urllib.request.Request(f"{self.endpoint}{path}", data=body, method=method)
+        request.add_header("Authorization", f"Bearer {self.api_key}")
+        if content_type:
+            request.add_header("Content-Type", content_type)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            raise BatchAPIError(f"{method} {path} 失败: HTTP {e.code} {e.read()[:500]!r}") from e
+
+    def _json(self, method: str, path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        return json.loads(self._request(method, path, body, "application/json" if body else None))
+
+    def upload_file(self, filename: str, content: bytes, purpose: str = "batch") -> Dict[str, Any]:
+        """上传文件（multipart/form-data）"""
+        boundary = uuid.uuid4().hex
+        parts = [
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"purpose\"\r\n\r\n{purpose}\r\n".encode("utf-8"),
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/jsonl\r\n\r\n".encode("utf-8"),
+            content,
+            f"\r\n--{boundary}--\r\n".encode("utf-8"),
+        ]
+        body = b"".join(parts)
+        return json.loads(self._request("POST", "/files", body, f"multipart/form-data; boundary={boundary}"))
+
+    def create_batch(self, input_file_id: str, url: str = "/v1/chat/completions",
+                     completion_window: str = "24h") -> Dict[str, Any]:
+        return self._json("POST", "/batches", {
+            "input_file_id": input_file_id,
+            "endpoint": url,
+            "completion_window": completion_window,
+        })
+
+    def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        return self._json("GET", f"/batches/{batch_id}")
+
+    def file_content(self, file_id: str) -> bytes:
+        return self._request("GET", f"/files/{file_id}/content")
+
+
+def _manifest_path(output_file: str) -> Path:
+    return Path(f"{output_file}.batch.json")
+
+
+def _load_manifest(manifest_file: str) -> Dict[str, Any]:
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest_file: Path, manifest: Dict[str, Any]):
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def _client_for(manifest: Dict[str, Any], api_key: Optional[str] = None) -> BatchClient:
+    api_key = api_key or load_api_config().get(manifest["api_type"], {}).get("api_key") or ""
+    return BatchClient(manifest["endpoint"], api_key)
+
+
+def build_requests(translator: CSVTranslator, rows: List[Dict[str, str]], tasks: list) -> List[Dict[str, Any]]:
+    """
+    把翻译任务转换成 Batch API 请求
+
+    颜色标签在提交前去掉，collect 时按原文重新还原；custom_id 为 "行号:列名"
+
+    Args:
+        translator: 翻译器（提供模型名、提示词和术语表）
+        rows: CSV数据行
+        tasks: 任务列表 [(行号, 列名, 语言代码, 中文原文)...]
+
+    Returns:
+        请求列表
+    """
+    model = translator.LLM_MODELS[translator.api_type]
+    requests = []
+    for idx, col, lang, text in tasks:
+        pure_text, _ = translator._extract_color_tags(text)
+        if not pure_text.strip():
+            continue
+        requests.append({
+            "custom_id": f"{idx}:{col}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": translator._build_messages(pure_text, lang, rows[idx]),
+                "temperature": 0.3,
+            },
+        })
+    return requests
+
+
+def submit(input_file: str, output_file: Optional[str] = None, api_type: str = "openai",
+           api_key: Optional[str] = None, api_endpoint: Optional[str] = None,
+           translate_th: bool = True, translate_vn: bool = True, force: bool = False) -> Dict[str, Any]:
+    """
+    规划任务、上传请求文件并创建批量任务
+
+    Returns:
+        任务清单
+    """
+    if api_type not in CSVTranslator.LLM_MODELS:
+        raise ValueError(f"批量任务只支持: {', '.join(CSVTranslator.LLM_MODELS)}")
+
+    config = load_api_config()
+    api_key = api_key or config.get(api_type, {}).get("api_key")
+    api_endpoint = api_endpoint or config.get(api_type, {}).get("endpoint") or CSVTranslator.LLM_ENDPOINTS[api_type]
+    # 只用来生成提示词（与在线翻译逐字节相同）；大模型客户端在首次在线请求时才创建，
+    # 批量任务只通过 BatchClient 发HTTP请求，不需要安装 openai 包
+    translator = CSVTranslator(api_type=api_type, api_key=api_key, api_endpoint=api_endpoint, api_config=config)
+
+    if output_file is None:
+        input_path = Path(input_file)
+        base_path, compression = split_compression_suffix(input_path)
+        output_file = str(input_path.parent / f"{base_path.stem}_translated{base_path.suffix}{compression}")
+
+    fieldnames, rows = translator.read_csv(input_file)
+    tasks = translator.plan_tasks(fieldnames, rows, translate_th, translate_vn, force)
+    requests = build_requests(translator, rows, tasks)
+    if not requests:
+        raise ValueError("没有需要翻译的内容")
+
+    manifest_file = _manifest_path(output_file)
+    requests_file = manifest_file.with_suffix(".jsonl")
+    content = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in requests).encode("utf-8")
+    requests_file.write_bytes(content)
+
+    client = BatchClient(api_endpoint, api_key or "")
+    uploaded = client.upload_file(requests_file.name, content)
+    batch = client.create_batch(uploaded["id"])
+
+    manifest = {
+        "input": str(Path(input_file).resolve()),
+        "output": str(Path(output_file).resolve()),
+        "api_type": api_type,
+        "endpoint": api_endpoint,
+        "batch_id": batch["id"],
+        "input_file_id": uploaded["id"],
+        "requests": len(requests),
+        "requests_file": str(requests_file.resolve()),
+        "total_rows": len(rows),
+        "submitted_at": time.time(),
+    }
+    _save_manifest(manifest_file, manifest)
+    manifest["manifest"] = str(manifest_file)
+    return manifest
+
+
+def status(manifest_file: str, api_key: Optional[str] = None) -> Dict[str, Any]:
+    """查询批量任务状态"""
+    manifest = _load_manifest(manifest_file)
+    return _client_for(manifest, api_key).get_batch(manifest["batch_id"])
+
+
+def collect(manifest_file: str, api_key: Optional[str] = None,
+            output_file: Optional[str] = None) -> dict:
+    """
+    下载批量任务结果并写入输出CSV
+
+    Returns:
+        翻译统计信息
+    """
+    manifest = _load_manifest(manifest_file)
+    client = _client_for(manifest, api_key)
+    batch = client.get_batch(manifest["batch_id"])
+    if batch.get("status") != "completed":
+        raise BatchAPIError(f"批量任务尚未完成，当前状态: {batch.get('status')}")
+
+    fieldnames, rows = CSVTranslator.read_csv(manifest["input"])
+    if len(rows) != manifest["total_rows"]:
+        raise ValueError("输入文件在提交后被修改，行数不一致")
+
+    stats = {"total_rows": len(rows), "translated_th": 0, "translated_vn": 0, "errors": 0}
+
+    results = []
+    if batch.get("output_file_id"):
+        results += client.file_content(batch["output_file_id"]).decode("utf-8").splitlines()
+    if batch.get("error_file_id"):
+        results += client.file_content(batch["error_file_id"]).decode("utf-8").splitlines()
+
+    for line in results:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        idx, col = item["custom_id"].split(":", 1)
+        idx = int(idx)
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            stats["errors"] += 1
+            continue
+        translated = response["body"]["choices"][0]["message"]["content"].strip()
+        zh_text = rows[idx].get("ZH", "")
+        pure_text, tags = CSVTranslator._extract_color_tags(zh_text)
+        rows[idx][col] = CSVTranslator._restore_color_tags(translated, tags, pure_text)
+        if col == "TH":
+            stats["translated_th"] += 1
+        else:
+            stats["translated_vn"] += 1
+
+    output_file = output_file or manifest["output"]
+    CSVTranslator._save_csv(output_file, fieldnames, rows)
+    stats["output"] = output_file
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="translate_csv.py batch",
+                                     description="批量任务模式 - 使用Batch API离线翻译")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = subparsers.add_parser("submit", help="提交批量翻译任务")
+    submit_parser.add_argument("input", help="输入CSV文件路径")
+    submit_parser.add_argument("-o", "--output", help="输出CSV文件路径（任务清单保存为 {output}.batch.json）")
+    submit_parser.add_argument("--api-type", choices=list(CSVTranslator.LLM_MODELS), default="openai",
+                               help="API类型（默认: openai）")
+    submit_parser.add_argument("--api-key", help="API密钥（默认: api_config.json 中的设置）")
+    submit_parser.add_argument("--api-endpoint", help="API端点（默认: api_config.json 中的设置）")
+    submit_parser.add_argument("--no-th", action="store_true", help="不翻译TH列")
+    submit_parser.add_argument("--no-vn", action="store_true", help="不翻译VN列")
+    submit_parser.add_argument("-f", "--force", action="store_true", help="强制翻译（即使已有翻译）")
+
+    status_parser = subparsers.add_parser("status", help="查询批量任务状态")
+    status_parser.add_argument("manifest", help="任务清单路径（*.batch.json）")
+    status_parser.add_argument("--api-key", help="API密钥（默认: api_config.json 中的设置）")
+
+    collect_parser = subparsers.add_parser("collect", help="下载结果并写入输出CSV")
+    collect_parser.add_argument("manifest", help="任务清单路径（*.batch.json）")
+    collect_parser.add_argument("-o", "--output", help="输出CSV文件路径（默认: 提交时指定的输出文件）")
+    collect_parser.add_argument("--api-key", help="API密钥（默认: api_config.json 中的设置）")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        manifest = submit(args.input, output_file=args.output, api_type=args.api_type,
+                          api_key=args.api_key, api_endpoint=args.api_endpoint,
+                          translate_th=not args.no_th, translate_vn=not args.no_vn, force=args.force)
+        print(f"已提交 {manifest['requests']} 条请求，batch ID: {manifest['batch_id']}")
+        print(f"任务清单: {manifest['manifest']}")
+
+    elif args.command == "status":
+        batch = status(args.manifest, api_key=args.api_key)
+        counts = batch.get("request_counts") or {}
+        print(f"状态: {batch.get('status')}")
+        if counts:
+            print(f"完成: {counts.get('completed', 0)}/{counts.get('total', 0)}，失败: {counts.get('failed', 0)}")
+
+    elif args.command == "collect":
+        stats = collect(args.manifest, api_key=args.api_key, output_file=args.output)
+        print(f"输出文件: {stats['output']}")
+        print(f"翻译TH: {stats['translated_th']}")
+        print(f"翻译VN: {stats['translated_vn']}")
+        print(f"错误数: {stats['errors']}")
+
+
+if __name__ == "__main__":
+    main()
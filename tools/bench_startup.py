@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Startup-time benchmark for the command line tool and the GUI.
+
+Every case runs in a fresh interpreter several times and the median wall time
+is reported:
+
+- bare interpreter start (baseline)
+- ``import translate_csv`` and ``translate_csv.py --help``, the fixed cost a
+  scripted pipeline pays on every invocation
+- ``import translate_gui``, i.e. the time before the window is built
+- each installed translation library on its own; these are only imported once
+  the matching API is used (see providers.py), so this is what lazy loading saves
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --runs 20 --importtime
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from providers import PROVIDER_PACKAGES, is_installed
+
+TOOLS_DIR = Path(__file__).parent
+
+
+def measure(args: list, runs: int) -> float:
+    """运行命令 runs 次，返回耗时中位数（毫秒）"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=TOOLS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def slowest_imports(module: str, limit: int = 10) -> list:
+    """python -X importtime 中累计耗时最长的模块 [(毫秒, 模块名)]"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=TOOLS_DIR, capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量命令行和图形界面的启动耗时")
+    parser.add_argument("--runs", type=int, default=10, help="每项运行次数（默认: 10）")
+    parser.add_argument("--importtime", action="store_true", help="列出 translate_gui 导入最慢的模块")
+    args = parser.parse_args()
+
+    python = sys.executable
+    cases = [
+        ("python (空解释器)", [python, "-c", "pass"]),
+        ("import translate_csv", [python, "-c", "import translate_csv"]),
+        ("translate_csv.py --help", [python, "translate_csv.py", "--help"]),
+        ("import translate_gui", [python, "-c", "import translate_gui"]),
+    ]
+    modules = sorted({m for packages in PROVIDER_PACKAGES.values() for m in packages})
+    for module in modules:
+        if is_installed(module):
+            cases.append((f"import {module} (按需)", [python, "-c", f"import {module}"]))
+
+    print(f"Python {sys.version.split()[0]} ({sys.platform}), 每项 {args.runs} 次取中位数")
+    baseline = None
+    for name, command in cases:
+        try:
+            ms = measure(command, args.runs)
+        except subprocess.CalledProcessError:
+            # 例如没有图形环境的机器上 tkinter 不可用
+            print(f"{name:<36} 失败")
+            continue
+        if baseline is None:
+            baseline = ms
+            print(f"{name:<36} {ms:8.1f} ms")
+        else:
+            print(f"{name:<36} {ms:8.1f} ms  (+{ms - baseline:.1f})")
+
+    if args.importtime:
+        print("\ntranslate_gui 导入最慢的模块（累计）:")
+        for ms, name in slowest_imports("translate_gui"):
+            print(f"  {ms:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
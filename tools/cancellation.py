@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+取消令牌（支持暂停/继续）
+
+由调用方（图形界面的“停止”/“暂停”按钮、命令行的 Ctrl+C）持有，
+CSVTranslator.translate_csv 在开始每个任务前检查：
+
+- 取消后不再开始新的任务，请求间隔的等待立即结束，
+  进行中的请求最多再等一小段时间（grace），之后放弃，其结果不再写入；
+  已完成的结果照常保存。令牌会一直传到各翻译API的调用，请求在截止时间到达时立即返回
+- 暂停时不开始新的任务，进行中的请求照常完成；翻译器（限速、缓存等状态）保持不变，
+  继续后从剩余任务接着翻译
+"""
+
+import time
+import threading
+from typing import Optional
+
+
+class CancelledError(Exception):
+    """操作已被取消"""
+
+
+class CancelToken:
+    """线程安全的取消/暂停标志"""
+
+    def __init__(self, grace: float = 0.5):
+        """
+        Args:
+            grace: 取消后进行中的请求最多再等待的时间（秒）
+        """
+        self.grace = grace
+        self._cancelled_at: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._cond = threading.Condition()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        """请求取消（可重复调用，只记录第一次的原因）；也会结束暂停"""
+        with self._cond:
+            if not self._cancelled.is_set():
+                self.reason = reason
+                self._cancelled_at = time.monotonic()
+                self._cancelled.set()
+            self._cond.notify_all()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def pause(self):
+        with self._cond:
+            self._running.clear()
+
+    def resume(self):
+        with self._cond:
+            self._running.set()
+            self._cond.notify_all()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """距离放弃进行中请求的剩余时间（秒）；未取消时返回 None"""
+        if not self._cancelled.is_set():
+            return None
+        return max(self._cancelled_at + self.grace - time.monotonic(), 0.0)
+
+    def raise_if_cancelled(self):
+        if self._cancelled.is_set():
+            raise CancelledError(self.reason)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        代替 time.sleep：最多等待 timeout 秒，取消时立即返回
+
+        Returns:
+            是否已取消
+        """
+        return self._cancelled.wait(timeout)
+
+    def wait_if_paused(self) -> bool:
+        """
+        暂停时阻塞直到继续或取消
+
+        Returns:
+            可以继续执行时返回 True，已取消时返回 False
+        """
+        with self._cond:
+            while not self._running.is_set() and not self._cancelled.is_set():
+                self._cond.wait()
+        return not self._cancelled.is_set()
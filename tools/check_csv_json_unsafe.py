@@ -17,6 +17,9 @@ problematic cells.
 Usage:
   python check_csv_json_unsafe.py input.csv
   python check_csv_json_unsafe.py input.csv --columns ZH,VN,TH -o report.csv
+  python check_csv_json_unsafe.py huge.csv --jobs 0   # parallel, one worker per CPU
+  python check_csv_json_unsafe.py input.csv --incremental   # reuse results for unchanged rows
+  python check_csv_json_unsafe.py input.csv.gz   # .gz / .zst input and report, see compressed_io.py
 
 Tips
 - If you want a reliable CSV->JSON conversion, use tools/csv_to_json.py.
@@ -26,11 +29,16 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
+import re
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+from compressed_io import is_compressed, open_text, split_compression_suffix
+from csv_chunks import DEFAULT_CHUNK_SIZE, ordered_map, read_chunk_rows, resolve_jobs, split_records
+
 
 RISK_CHARS = {
     '"': "double_quote",
@@ -43,10 +51,52 @@ RISK_CHARS = {
 }
 
 
+# JSON strings cannot contain raw control chars U+0000..U+001F.
+# A correct serializer will escape them, but naive converters will break.
+CONTROL_CHAR_PATTERN = re.compile(r"[\x00-\x1f]")
+
+# Everything a cell can be flagged for, in one character class: quote, backslash,
+# control chars and surrogates (the only thing that could make json.dumps fail).
+UNSAFE_CHAR_PATTERN = re.compile(r'["\\\x00-\x1f\ud800-\udfff]')
+
+# Labels for each unsafe character; surrogates are absent and handled separately.
+CHAR_LABELS: Dict[str, Tuple[str, ...]] = {
+    chr(code): ("control_char",) for code in range(0x20)
+}
+for _ch, _label in RISK_CHARS.items():
+    CHAR_LABELS[_ch] = CHAR_LABELS.get(_ch, ()) + (_label,)
+
+
 def find_control_chars(text: str) -> bool:
-    # JSON strings cannot contain raw control chars U+0000..U+001F.
-    # A correct serializer will escape them, but naive converters will break.
-    return any(ord(ch) < 0x20 for ch in text)
+    return CONTROL_CHAR_PATTERN.search(text) is not None
+
+
+def classify(value: str) -> str:
+    """Return the "|"-joined sorted issue labels for a cell ("" if it is safe).
+
+    One regex pass finds every unsafe character at once; json.dumps only runs
+    when that pass saw a surrogate.
+    """
+    found = set(UNSAFE_CHAR_PATTERN.findall(value))
+    if not found:
+        return ""
+
+    issues = set()
+    surrogate = False
+    for ch in found:
+        labels = CHAR_LABELS.get(ch)
+        if labels is None:
+            surrogate = True
+        else:
+            issues.update(labels)
+
+    if surrogate:
+        try:
+            json.dumps(value, ensure_ascii=False)
+        except Exception as e:  # noqa: BLE001
+            issues.add(f"json_dumps_error:{type(e).__name__}")
+
+    return "|".join(sorted(issues))
 
 
 def preview(text: str, limit: int = 120) -> str:
@@ -84,84 +134,207 @@ def iter_findings(
         "Position": "position",
     }
 
+    search = UNSAFE_CHAR_PATTERN.search
+
     for i, row in enumerate(rows):
+        values = [row.get(col) or "" for col in cols]
+
+        # Most rows are clean: one search over the joined row skips them entirely.
+        if search("".join(values)) is None:
+            continue
+
         csv_line = i + 2  # header is line 1
         row_index = i + 1
 
         locator_values = {attr: row.get(key, "") for key, attr in locator_keys.items()}
 
-        for col in cols:
-            value = row.get(col, "")
-            if value is None:
-                value = ""
-
-            issues: List[str] = []
-            for ch, label in RISK_CHARS.items():
-                if ch in value:
-                    issues.append(label)
-
-            if find_control_chars(value):
-                issues.append("control_char")
-
-            # Also detect values that json can't serialize (rare, but catches invalid surrogates).
-            try:
-                json.dumps(value, ensure_ascii=False)
-            except Exception as e:  # noqa: BLE001
-                issues.append(f"json_dumps_error:{type(e).__name__}")
-
+        for col, value in zip(cols, values):
+            issues = classify(value)
             if issues:
                 yield Finding(
                     csv_line=csv_line,
                     row_index=row_index,
                     column=col,
-                    issues="|".join(sorted(set(issues))),
+                    issues=issues,
                     value_len=len(value),
                     value_preview=preview(value),
                     **locator_values,
                 )
 
 
+def _scan_chunk(
+    path: Path,
+    begin: int,
+    end: int,
+    encoding: str,
+    fieldnames: Sequence[str],
+    columns: Optional[Sequence[str]],
+) -> Tuple[int, List[Finding]]:
+    rows = read_chunk_rows(path, begin, end, encoding, fieldnames)
+    return len(rows), list(iter_findings(rows, fieldnames, columns=columns))
+
+
+def iter_findings_parallel(
+    path: Path,
+    encoding: str,
+    fieldnames: Sequence[str],
+    ranges: Sequence[Tuple[int, int]],
+    columns: Optional[Sequence[str]] = None,
+    jobs: int = 0,
+    counts: Optional[Dict[str, int]] = None,
+) -> Iterable[Finding]:
+    """Scan record-aligned byte ranges (see csv_chunks.split_records) on a process pool.
+
+    Findings come out in file order with the same csv_line/row_index as a
+    sequential scan. The number of rows scanned is accumulated in counts["rows"].
+    """
+    offset = 0
+    items = ((path, begin, end, encoding, fieldnames, columns) for begin, end in ranges)
+    for n_rows, findings in ordered_map(_scan_chunk, items, resolve_jobs(jobs)):
+        for it in findings:
+            it.csv_line += offset
+            it.row_index += offset
+            yield it
+        offset += n_rows
+        if counts is not None:
+            counts["rows"] = offset
+
+
+# Bumped whenever the detection rules change, so stale indexes are ignored.
+INDEX_VERSION = 1
+
+LOCATOR_COLUMNS = ("Table", "Sheet", "Field", "Position")
+
+
+def index_path_for(report_path: Path) -> Path:
+    return report_path.with_name(report_path.name + ".index.json")
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_digest(row: Dict[str, str], keys: Sequence[str]) -> str:
+    # Everything a finding depends on: the scanned cells and the locator columns.
+    data = "\x1f".join(row.get(k) or "" for k in keys)
+    return hashlib.blake2b(data.encode("utf-8", "surrogatepass"), digest_size=12).hexdigest()
+
+
+def load_index(path: Path, input_digest_key: Dict[str, object]) -> Optional[Dict[str, object]]:
+    """Load a sidecar index if it was built with the same version/columns/encoding."""
+    if not path.exists():
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if any(index.get(k) != v for k, v in input_digest_key.items()):
+        return None
+    return index
+
+
+def save_index(path: Path, index: Dict[str, object]) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    tmp_path.replace(path)
+
+
+def iter_findings_incremental(
+    rows: Sequence[Dict[str, str]],
+    fieldnames: Sequence[str],
+    columns: Optional[Sequence[str]],
+    previous: Dict[str, List[list]],
+    current: Dict[str, List[list]],
+    counts: Optional[Dict[str, int]] = None,
+) -> Iterable[Finding]:
+    """Same findings as iter_findings, re-analyzing only rows whose content hash is new.
+
+    Args:
+        previous: row hash -> [[column, issues, value_len, value_preview], ...] from the last scan
+        current: filled with the same mapping for this scan (to be saved as the next index)
+        counts: counts["rescanned"] is incremented for every row that had to be analyzed
+    """
+    cols = list(columns) if columns else list(fieldnames)
+    keys = cols + [k for k in LOCATOR_COLUMNS if k not in cols]
+
+    for i, row in enumerate(rows):
+        digest = row_digest(row, keys)
+        cached = current.get(digest)
+        if cached is None:
+            cached = previous.get(digest)
+        if cached is None:
+            cached = [
+                [it.column, it.issues, it.value_len, it.value_preview]
+                for it in iter_findings([row], fieldnames, columns=cols)
+            ]
+            if counts is not None:
+                counts["rescanned"] = counts.get("rescanned", 0) + 1
+        current[digest] = cached
+
+        for column, issues, value_len, value_preview in cached:
+            yield Finding(
+                csv_line=i + 2,
+                row_index=i + 1,
+                column=column,
+                issues=issues,
+                value_len=value_len,
+                value_preview=value_preview,
+                table=row.get("Table", ""),
+                sheet=row.get("Sheet", ""),
+                field=row.get("Field", ""),
+                position=row.get("Position", ""),
+            )
+
+
 def read_csv(path: Path, encoding: str) -> Tuple[List[Dict[str, str]], List[str]]:
-    with path.open("r", encoding=encoding, newline="") as f:
+    with open_text(path, "r", encoding=encoding, newline="") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames or []
         rows = list(reader)
     return rows, list(fieldnames)
 
 
-def write_report(path: Path, findings: Sequence[Finding]) -> None:
-    with path.open("w", encoding="utf-8-sig", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "csv_line",
-                "row_index",
-                "Table",
-                "Sheet",
-                "Field",
-                "Position",
-                "column",
-                "issues",
-                "value_len",
-                "value_preview",
-            ],
-        )
+REPORT_FIELDS = [
+    "csv_line",
+    "row_index",
+    "Table",
+    "Sheet",
+    "Field",
+    "Position",
+    "column",
+    "issues",
+    "value_len",
+    "value_preview",
+]
+
+
+def report_row(it: Finding) -> Dict[str, object]:
+    return {
+        "csv_line": it.csv_line,
+        "row_index": it.row_index,
+        "Table": it.table,
+        "Sheet": it.sheet,
+        "Field": it.field,
+        "Position": it.position,
+        "column": it.column,
+        "issues": it.issues,
+        "value_len": it.value_len,
+        "value_preview": it.value_preview,
+    }
+
+
+def write_report(path: Path, findings: Iterable[Finding]) -> None:
+    with open_text(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
         writer.writeheader()
         for it in findings:
-            writer.writerow(
-                {
-                    "csv_line": it.csv_line,
-                    "row_index": it.row_index,
-                    "Table": it.table,
-                    "Sheet": it.sheet,
-                    "Field": it.field,
-                    "Position": it.position,
-                    "column": it.column,
-                    "issues": it.issues,
-                    "value_len": it.value_len,
-                    "value_preview": it.value_preview,
-                }
-            )
+            writer.writerow(report_row(it))
 
 
 def parse_columns(arg: str) -> List[str]:
@@ -190,33 +363,117 @@ def main() -> None:
         default="utf-8-sig",
         help="输入CSV编码（默认: utf-8-sig，会自动去掉BOM）",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="并行进程数（默认: 1 不并行；0 表示按CPU核数）。并行时按记录边界分块扫描，内存占用与文件大小无关",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+        help="并行时每块的大小（MB，默认: 8）",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量扫描：在报告旁保存每行内容的哈希索引（*.index.json），下次只分析新增/修改的行，结果与完整扫描一致",
+    )
 
     args = parser.parse_args()
+    if args.incremental and args.jobs != 1:
+        parser.error("--incremental 不能与 --jobs 同时使用")
 
     input_path = Path(args.input)
     if not input_path.exists():
         raise SystemExit(f"输入文件不存在: {input_path}")
+    if args.jobs != 1 and is_compressed(input_path):
+        # Chunks are byte ranges of the mmapped file; a compressed stream can only be read in order.
+        print("压缩文件不支持 --jobs，改为单进程扫描")
+        args.jobs = 1
 
+    base_path, compression = split_compression_suffix(input_path)
     output_path = Path(args.output) if args.output else input_path.with_name(
-        f"{input_path.stem}_json_unsafe_report{input_path.suffix}"
+        f"{base_path.stem}_json_unsafe_report{base_path.suffix}{compression}"
     )
 
-    rows, fieldnames = read_csv(input_path, encoding=args.encoding)
+    index_key: Dict[str, object] = {
+        "version": INDEX_VERSION,
+        "encoding": args.encoding,
+        "columns": args.columns,
+    }
+    index_path = index_path_for(output_path)
+    previous_index = None
+    if args.incremental:
+        previous_index = load_index(index_path, index_key)
+        input_digest = file_digest(input_path)
+        # The whole file is unchanged: the existing report is already the answer.
+        if previous_index and previous_index.get("input_digest") == input_digest and output_path.exists():
+            print(f"Checked: {input_path} (unchanged since last scan)")
+            print(f"Rows: {previous_index['rows_total']}")
+            print(f"Findings: {previous_index['findings_total']}")
+            print(f"Report: {output_path}")
+            return
+
+    if args.jobs == 1:
+        rows, fieldnames = read_csv(input_path, encoding=args.encoding)
+    else:
+        fieldnames, ranges = split_records(input_path, args.encoding, args.chunk_size * 1024 * 1024)
     if not fieldnames:
         raise SystemExit("CSV 没有表头（fieldnames 为空）")
 
+    # Findings are stored per row without column names; any header change invalidates the index.
+    index_key["fieldnames"] = list(fieldnames)
+    if previous_index and previous_index.get("fieldnames") != index_key["fieldnames"]:
+        previous_index = None
+
     # Validate columns
     if args.columns:
         missing = [c for c in args.columns if c not in fieldnames]
         if missing:
             raise SystemExit(f"指定的列不存在: {missing}. 可用列: {fieldnames}")
 
-    findings = list(iter_findings(rows, fieldnames, columns=args.columns))
-    write_report(output_path, findings)
+    counts = {"rows": 0, "findings": 0, "rescanned": 0}
+
+    def counted(findings: Iterable[Finding]) -> Iterable[Finding]:
+        for it in findings:
+            counts["findings"] += 1
+            yield it
+
+    row_findings: Dict[str, List[list]] = {}
+    if args.incremental:
+        counts["rows"] = len(rows)
+        findings = iter_findings_incremental(
+            rows, fieldnames, args.columns,
+            previous=(previous_index or {}).get("row_findings", {}),
+            current=row_findings,
+            counts=counts,
+        )
+    elif args.jobs == 1:
+        counts["rows"] = len(rows)
+        findings = iter_findings(rows, fieldnames, columns=args.columns)
+    else:
+        findings = iter_findings_parallel(
+            input_path, args.encoding, fieldnames, ranges,
+            columns=args.columns, jobs=args.jobs, counts=counts,
+        )
+    write_report(output_path, counted(findings))
+
+    if args.incremental:
+        save_index(index_path, {
+            **index_key,
+            "input_digest": input_digest,
+            "rows_total": counts["rows"],
+            "findings_total": counts["findings"],
+            "row_findings": row_findings,
+        })
 
     print(f"Checked: {input_path}")
-    print(f"Rows: {len(rows)}")
-    print(f"Findings: {len(findings)}")
+    if args.incremental:
+        print(f"Rescanned rows: {counts['rescanned']}")
+    print(f"Rows: {counts['rows']}")
+    print(f"Findings: {counts['findings']}")
     print(f"Report: {output_path}")
 
 
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Transparent gzip / zstd support for the CSV and JSON tools.
+
+open_text() is a drop-in replacement for Path.open() in text mode:
+
+- reading detects compression from the magic bytes, so a renamed archive
+  (or a plain file named .gz) still opens correctly
+- writing compresses when the path ends in .gz or .zst/.zstd
+- appending to a compressed file adds a gzip member / zstd frame; readers
+  (including this module) decompress the members as one stream
+- data is streamed through the (de)compressor, never held in memory
+
+zstd needs the optional zstandard module (pip install zstandard). gzip output
+has no embedded file name or timestamp, so identical content gives identical
+bytes.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+from pathlib import Path
+from typing import IO, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+SUFFIXES = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+
+def compression_from_name(path: Union[str, Path]) -> Optional[str]:
+    return SUFFIXES.get(Path(path).suffix.lower())
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """Compression of an existing file, from its magic bytes (the name is not trusted)."""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def is_compressed(path: Union[str, Path]) -> bool:
+    return detect_compression(path) is not None
+
+
+def split_compression_suffix(path: Union[str, Path]) -> Tuple[Path, str]:
+    """("x.csv.gz") -> (Path("x.csv"), ".gz"); uncompressed names get ""."""
+    path = Path(path)
+    if compression_from_name(path):
+        return path.with_suffix(""), path.suffix
+    return path, ""
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise ImportError("读写 .zst 文件需要安装 zstandard: pip install zstandard")
+
+
+def open_text(
+    path: Union[str, Path],
+    mode: str = "r",
+    encoding: Optional[str] = None,
+    newline: Optional[str] = None,
+) -> IO[str]:
+    """Open a possibly compressed file in text mode ("r", "w" or "a")."""
+    if mode not in ("r", "w", "a"):
+        raise ValueError(f"unsupported mode: {mode}")
+
+    if mode == "r":
+        compression = detect_compression(path)
+    else:
+        compression = compression_from_name(path)
+
+    if compression is None:
+        return open(path, mode, encoding=encoding, newline=newline)
+
+    if compression == "gzip":
+        if mode == "r":
+            raw = gzip.GzipFile(path, "rb")
+        else:
+            # No name/mtime in the header: output bytes depend only on content.
+            raw = gzip.GzipFile(filename="", mode=mode + "b", fileobj=open(path, mode + "b"), mtime=0)
+            # GzipFile does not close a fileobj it was given.
+            raw.myfileobj = raw.fileobj
+    else:
+        _require_zstd()
+        if mode == "r":
+            raw = zstandard.ZstdDecompressor().stream_reader(
+                open(path, "rb"), read_across_frames=True, closefd=True
+            )
+        else:
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, mode + "b"), closefd=True)
+
+    return io.TextIOWrapper(raw, encoding=encoding, newline=newline)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Split large CSV files into record-aligned byte ranges for parallel processing.
+
+Used by check_csv_json_unsafe.py and sanitize_csv_for_json.py (--jobs).
+
+- The input is memory-mapped; only one chunk at a time is decoded per worker,
+  so memory stays bounded regardless of file size.
+- Chunk boundaries always fall right after a newline that is *outside* quotes.
+  Whether a position is inside a quoted field is known from the parity of the
+  number of `"` bytes before it (escaped quotes `""` keep the parity), which
+  holds for any ASCII-compatible encoding such as UTF-8 or GBK.
+- ordered_map() runs chunks on a process pool and yields results in file order
+  with a bounded number of chunks in flight.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Quote counting is done in blocks so no large slice of the map is copied at once.
+_COUNT_BLOCK = 16 * 1024 * 1024
+
+
+def _count_quotes(mm: mmap.mmap, begin: int, end: int) -> int:
+    total = 0
+    for start in range(begin, end, _COUNT_BLOCK):
+        total += mm[start:min(start + _COUNT_BLOCK, end)].count(b'"')
+    return total
+
+
+def _next_record_start(mm: mmap.mmap, pos: int, in_quotes: bool) -> int:
+    """First record start at or after pos, given whether pos is inside quotes."""
+    size = len(mm)
+    while pos < size:
+        newline = mm.find(b"\n", pos)
+        if newline < 0:
+            return size
+        if _count_quotes(mm, pos, newline) % 2:
+            in_quotes = not in_quotes
+        pos = newline + 1
+        if not in_quotes:
+            return pos
+    return size
+
+
+def resolve_jobs(jobs: int) -> int:
+    """--jobs value: 0 means one per CPU."""
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def split_records(
+    path: Path, encoding: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Read the header and split the data records into byte ranges.
+
+    Returns:
+        (fieldnames, [(begin, end), ...]) covering every data record exactly once.
+    """
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+
+            # Header: first non-empty record (csv.DictReader skips leading blank rows too).
+            fieldnames: List[str] = []
+            data_start = 0
+            while not fieldnames and data_start < size:
+                header_end = _next_record_start(mm, data_start, False)
+                text = mm[data_start:header_end].decode(encoding if data_start == 0 else _no_bom(encoding))
+                fieldnames = next(csv.reader(io.StringIO(text, newline="")), [])
+                data_start = header_end
+
+            ranges = []
+            begin = data_start
+            in_quotes = False
+            while begin < size:
+                nominal = min(begin + chunk_size, size)
+                if nominal >= size:
+                    ranges.append((begin, size))
+                    break
+                in_quotes = bool(_count_quotes(mm, begin, nominal) % 2)
+                end = _next_record_start(mm, nominal, in_quotes)
+                ranges.append((begin, end))
+                begin = end
+
+    return fieldnames, ranges
+
+
+def _no_bom(encoding: str) -> str:
+    return "utf-8" if encoding.lower().replace("_", "-") == "utf-8-sig" else encoding
+
+
+def read_chunk_rows(
+    path: Path, begin: int, end: int, encoding: str, fieldnames: Sequence[str]
+) -> List[Dict[str, str]]:
+    """Parse one byte range into rows, exactly as csv.DictReader would for the whole file."""
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[begin:end].decode(_no_bom(encoding))
+    return list(csv.DictReader(io.StringIO(text, newline=""), fieldnames=list(fieldnames)))
+
+
+def ordered_map(fn: Callable, items: Iterable[tuple], jobs: int) -> Iterator:
+    """Run fn(*item) on a process pool, yielding results in input order.
+
+    At most 2 * jobs items are in flight, so finished-but-unconsumed results
+    never pile up in memory.
+    """
+    window = 2 * jobs
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: deque = deque()
+        for item in items:
+            pending.append(executor.submit(fn, *item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
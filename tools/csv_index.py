@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Record-offset index for random access to large CSV files.
+
+Used by the GUI preview (translate_gui.py) to page rows on demand.
+
+- The index is built in one pass over the memory-mapped file: the byte offset
+  of every record start, found with the same quote-parity rule as
+  csv_chunks.py, so quoted cells containing newlines count as one record.
+- Rows are read back by seeking to their offsets; the file is not kept open
+  (or mapped) between reads, so other tools can still rewrite it on Windows.
+- Indexes are cached per file and reused while its mtime and size are
+  unchanged.
+- Compressed files (see compressed_io.py) cannot be seeked into, so their rows
+  are parsed once and kept in memory instead.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from compressed_io import is_compressed, open_text
+from csv_chunks import _count_quotes, _next_record_start, _no_bom
+
+# Records are decoded in blocks of this many when searching.
+SEARCH_BLOCK = 2000
+
+
+class CSVIndex:
+    """Random access to the data rows of one CSV file."""
+
+    def __init__(self, path: Path, encoding: str = "utf-8-sig"):
+        self.path = Path(path)
+        self.encoding = encoding
+        stat = self.path.stat()
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.fieldnames: List[str] = []
+        # offsets[i] is where record i starts; offsets[-1] is the end of the file.
+        self._offsets = array("Q")
+        self._rows: Optional[List[List[str]]] = None
+        if is_compressed(self.path):
+            self._load_rows()
+        else:
+            self._build_offsets()
+
+    def __len__(self) -> int:
+        if self._rows is not None:
+            return len(self._rows)
+        return max(len(self._offsets) - 1, 0)
+
+    def _load_rows(self) -> None:
+        with open_text(self.path, "r", encoding=self.encoding, newline="") as f:
+            reader = csv.reader(f)
+            for row in reader:
+                if row:
+                    self.fieldnames = row
+                    break
+            self._rows = [row for row in reader if row]
+
+    def _build_offsets(self) -> None:
+        with self.path.open("rb") as f:
+            if self.signature[1] == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                pos = 0
+                # Header: first non-empty record, as csv.DictReader does.
+                while not self.fieldnames and pos < size:
+                    end = _next_record_start(mm, pos, False)
+                    text = mm[pos:end].decode(self.encoding if pos == 0 else _no_bom(self.encoding))
+                    self.fieldnames = next(csv.reader(io.StringIO(text, newline="")), [])
+                    pos = end
+
+                offsets = self._offsets
+                in_quotes = False
+                start = pos
+                while pos < size:
+                    newline = mm.find(b"\n", pos)
+                    end = size if newline < 0 else newline + 1
+                    if _count_quotes(mm, pos, end) % 2:
+                        in_quotes = not in_quotes
+                    pos = end
+                    if not in_quotes:
+                        # Blank lines are not rows (csv.DictReader skips them too);
+                        # they stay inside the previous record's byte range.
+                        if mm[start:pos].strip(b"\r\n"):
+                            offsets.append(start)
+                        start = pos
+                if offsets:
+                    offsets.append(size)
+
+    def _decode(self, data: bytes) -> List[List[str]]:
+        text = data.decode(_no_bom(self.encoding))
+        return [row for row in csv.reader(io.StringIO(text, newline="")) if row]
+
+    def rows(self, start: int, stop: int) -> List[List[str]]:
+        """Records start..stop-1 as lists of cells."""
+        start = max(start, 0)
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        if self._rows is not None:
+            return self._rows[start:stop]
+        with self.path.open("rb") as f:
+            f.seek(self._offsets[start])
+            data = f.read(self._offsets[stop] - self._offsets[start])
+        return self._decode(data)
+
+    def rows_at(self, numbers: Sequence[int]) -> List[List[str]]:
+        """Records by number (e.g. a page of search results)."""
+        if self._rows is not None:
+            return [self._rows[n] for n in numbers]
+        result = []
+        with self.path.open("rb") as f:
+            for n in numbers:
+                f.seek(self._offsets[n])
+                result.extend(self._decode(f.read(self._offsets[n + 1] - self._offsets[n])))
+        return result
+
+    def search(
+        self,
+        text: str,
+        column: Optional[str] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> array:
+        """Numbers of the records whose cell (or any cell, if column is None) contains text.
+
+        Blocks whose raw bytes do not contain text at all are skipped without parsing.
+        A quote inside a quoted cell is stored doubled, so text containing quotes is
+        looked for in its doubled form as well.
+        """
+        result = array("Q")
+        col = self.fieldnames.index(column) if column else None
+        needle = text.encode(_no_bom(self.encoding))
+        needles = (needle, needle.replace(b'"', b'""')) if b'"' in needle else (needle,)
+        if self._rows is None:
+            f = self.path.open("rb")
+        try:
+            for block in range(0, len(self), SEARCH_BLOCK):
+                if cancel is not None and cancel.is_set():
+                    break
+                stop = min(block + SEARCH_BLOCK, len(self))
+                if self._rows is None:
+                    f.seek(self._offsets[block])
+                    data = f.read(self._offsets[stop] - self._offsets[block])
+                    if not any(n in data for n in needles):
+                        continue
+                    rows = self._decode(data)
+                else:
+                    rows = self._rows[block:stop]
+                for i, row in enumerate(rows):
+                    if col is None:
+                        if any(text in cell for cell in row):
+                            result.append(block + i)
+                    elif col < len(row) and text in row[col]:
+                        result.append(block + i)
+        finally:
+            if self._rows is None:
+                f.close()
+        return result
+
+
+_cache: Dict[Tuple[str, str], CSVIndex] = {}
+_cache_lock = threading.Lock()
+
+
+def open_index(path: Path, encoding: str = "utf-8-sig") -> CSVIndex:
+    """Cached CSVIndex for path; rebuilt only when the file's mtime or size changed."""
+    key = (os.path.abspath(path), encoding)
+    stat = os.stat(path)
+    with _cache_lock:
+        index = _cache.get(key)
+    if index is not None and index.signature == (stat.st_mtime_ns, stat.st_size):
+        return index
+    index = CSVIndex(Path(path), encoding)
+    with _cache_lock:
+        _cache[key] = index
+    return index
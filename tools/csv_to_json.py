@@ -11,38 +11,257 @@ This script:
 - Reads CSV using utf-8-sig (auto strips BOM)
 - Writes JSON using utf-8 (no BOM)
 - Preserves all columns as strings
+- Streams rows: memory stays constant whatever the input size
+- Uses orjson for serialization when it is installed (pip install orjson);
+  the output is byte-identical to the json module's
 
 Usage:
   python csv_to_json.py input.csv -o output.json
+  python csv_to_json.py input.csv --format ndjson   # one JSON object per line
+  python csv_to_json.py input.csv --format stbl     # indexed binary string table, see string_table.py
+  python csv_to_json.py ../CSV -o ../JSON --jobs 0  # every *.csv in a directory, in parallel
+  python csv_to_json.py input.csv --shard-by Table  # one file per Table + manifest.json
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+from compressed_io import open_text, split_compression_suffix
 
 
 def read_csv_rows(path: Path, encoding: str = "utf-8-sig") -> List[Dict[str, str]]:
-    with path.open("r", encoding=encoding, newline="") as f:
+    return list(iter_csv_rows(path, encoding=encoding))
+
+
+def iter_csv_rows(path: Path, encoding: str = "utf-8-sig") -> Iterator[Dict[str, str]]:
+    with open_text(path, "r", encoding=encoding, newline="") as f:
         reader = csv.DictReader(f)
         if not reader.fieldnames:
-            return []
-        return list(reader)
+            return
+        yield from reader
 
 
 def write_json(path: Path, data: Any, encoding: str = "utf-8") -> None:
-    with path.open("w", encoding=encoding, newline="\n") as f:
+    with open_text(path, "w", encoding=encoding, newline="\n") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
         f.write("\n")
 
 
+def _dumps_pretty(row: Dict[str, str]) -> str:
+    """One array element as json.dump(rows, indent=2) would print it (without the leading indent)."""
+    if orjson is not None:
+        try:
+            text = orjson.dumps(row, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except (TypeError, orjson.JSONEncodeError):
+            # e.g. a None key from a row with extra fields, or a lone surrogate
+            pass
+        else:
+            return text.replace("\n", "\n  ")
+    return json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
+
+def _dumps_line(row: Dict[str, str]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(row).decode("utf-8")
+        except (TypeError, orjson.JSONEncodeError):
+            pass
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+
+
+class JSONWriter:
+    """Incrementally write rows as a JSON array (same bytes as write_json) or as NDJSON."""
+
+    FORMATS = ("json", "ndjson")
+
+    def __init__(self, path: Path, encoding: str = "utf-8", fmt: str = "json"):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"unknown format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.encoding = encoding
+        self.rows = 0
+        self._file: Optional[Any] = open_text(path, "w", encoding=encoding, newline="\n")
+
+    def suspend(self) -> None:
+        """Close the file handle but keep the array open; the next write or close appends."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _reopen(self) -> None:
+        if self._file is None:
+            self._file = open_text(self.path, "a", encoding=self.encoding, newline="\n")
+
+    def write(self, row: Dict[str, str]) -> None:
+        self._reopen()
+        if self.fmt == "ndjson":
+            self._file.write(_dumps_line(row) + "\n")
+        else:
+            self._file.write(("[\n  " if self.rows == 0 else ",\n  ") + _dumps_pretty(row))
+        self.rows += 1
+
+    def close(self) -> None:
+        if self.fmt == "json":
+            self._reopen()
+            self._file.write("\n]\n" if self.rows else "[]\n")
+        self.suspend()
+
+    def __enter__(self) -> "JSONWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_json_stream(
+    path: Path, rows: Iterable[Dict[str, str]], encoding: str = "utf-8", fmt: str = "json"
+) -> int:
+    with JSONWriter(path, encoding=encoding, fmt=fmt) as writer:
+        for row in rows:
+            writer.write(row)
+    return writer.rows
+
+
+SHARD_COLUMNS = ("Table", "Sheet")
+
+# Shard files kept open at once; older ones are suspended and reopened for
+# appending, so inputs with thousands of interleaved tables stay below the
+# per-process file limit. Inputs grouped by table never reopen a shard.
+MAX_OPEN_SHARDS = 256
+
+# Characters that are not allowed in file names on Windows (plus path separators).
+_UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def shard_filename(value: str, used: set, suffix: str) -> str:
+    """File name for one shard; stable for the same input order."""
+    base = _UNSAFE_FILENAME.sub("_", value).strip(" .") or "_empty"
+    name = f"{base}{suffix}"
+    n = 2
+    while name.lower() in used:
+        name = f"{base}~{n}{suffix}"
+        n += 1
+    used.add(name.lower())
+    return name
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_sharded(
+    output_dir: Path,
+    rows: Iterable[Dict[str, str]],
+    shard_by: str,
+    source: str,
+    encoding: str = "utf-8",
+    fmt: str = "json",
+    max_open: int = MAX_OPEN_SHARDS,
+) -> int:
+    """Write one file per distinct value of the shard_by column plus manifest.json.
+
+    Shard files are named after the value and listed in the manifest sorted by
+    value, with their row counts and sha256, so unchanged input gives
+    byte-identical output. At most max_open shard files are open at a time.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    writers: Dict[str, JSONWriter] = {}
+    open_writers: "OrderedDict[str, JSONWriter]" = OrderedDict()
+    used: set = {"manifest.json"}
+    total = 0
+    try:
+        for row in rows:
+            value = row.get(shard_by) or ""
+            writer = open_writers.get(value)
+            if writer is not None:
+                open_writers.move_to_end(value)
+            else:
+                if len(open_writers) >= max_open:
+                    open_writers.popitem(last=False)[1].suspend()
+                writer = writers.get(value)
+                if writer is None:
+                    writer = JSONWriter(output_dir / shard_filename(value, used, f".{fmt}"), encoding, fmt)
+                    writers[value] = writer
+                open_writers[value] = writer
+            writer.write(row)
+            total += 1
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    manifest = {
+        "source": source,
+        "shard_by": shard_by,
+        "format": fmt,
+        "rows": total,
+        "shards": [
+            {
+                "key": value,
+                "file": writers[value].path.name,
+                "rows": writers[value].rows,
+                "sha256": file_sha256(writers[value].path),
+            }
+            for value in sorted(writers)
+        ],
+    }
+    # Remove shards an earlier run produced that no longer exist in the input.
+    manifest_path = output_dir / "manifest.json"
+    if manifest_path.exists():
+        with manifest_path.open("r", encoding="utf-8") as f:
+            previous = {shard["file"] for shard in json.load(f).get("shards", [])}
+        for name in previous - {shard["file"] for shard in manifest["shards"]}:
+            (output_dir / name).unlink(missing_ok=True)
+    write_json(manifest_path, manifest)
+    return total
+
+
+def convert_file(
+    input_path: Path,
+    output_path: Path,
+    input_encoding: str = "utf-8-sig",
+    output_encoding: str = "utf-8",
+    fmt: str = "json",
+    languages: Sequence[str] = ("ZH", "TH", "VN"),
+    shard_by: Optional[str] = None,
+) -> int:
+    """Convert one CSV; output_path is a directory when shard_by is set. Returns the row count."""
+    rows = iter_csv_rows(input_path, encoding=input_encoding)
+    if shard_by:
+        return write_sharded(output_path, rows, shard_by, input_path.name, output_encoding, fmt)
+    if fmt == "stbl":
+        from string_table import write_string_table
+
+        return write_string_table(output_path, rows, languages)
+    return write_json_stream(output_path, rows, encoding=output_encoding, fmt=fmt)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Convert a CSV file to JSON (array of objects).")
-    parser.add_argument("input", help="输入CSV文件路径")
-    parser.add_argument("-o", "--output", help="输出JSON文件路径（默认: 与输入同名 .json）")
+    parser.add_argument("input", help="输入CSV文件路径，或包含多个CSV的目录")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="输出JSON文件路径（默认: 与输入同名 .json / .ndjson）；输入为目录或使用 --shard-by 时为输出目录",
+    )
     parser.add_argument(
         "--input-encoding",
         default="utf-8-sig",
@@ -53,19 +272,92 @@ def main() -> None:
         default="utf-8",
         help="输出JSON编码（默认: utf-8，不带BOM）",
     )
+    parser.add_argument(
+        "--format",
+        choices=JSONWriter.FORMATS + ("stbl",),
+        default="json",
+        help="输出格式：json=对象数组（默认），ndjson=每行一个对象（JSON Lines），"
+        "stbl=带索引的二进制字符串表（见 string_table.py）",
+    )
+    parser.add_argument(
+        "--languages",
+        default="ZH,TH,VN",
+        help="stbl 格式包含的语言列（逗号分隔，默认: ZH,TH,VN）",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=SHARD_COLUMNS,
+        help="按 Table 或 Sheet 列拆分成多个文件，并生成 manifest.json（行数和 sha256）",
+    )
+    parser.add_argument(
+        "--pattern",
+        default="*.csv",
+        help="输入为目录时匹配的文件名（默认: *.csv）",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="输入为目录时的并行进程数（默认: 0，按CPU核数）",
+    )
 
     args = parser.parse_args()
 
     input_path = Path(args.input)
     if not input_path.exists():
         raise SystemExit(f"输入文件不存在: {input_path}")
+    if args.shard_by and args.format == "stbl":
+        raise SystemExit("stbl 格式不支持 --shard-by")
+
+    languages = [c.strip() for c in args.languages.split(",") if c.strip()]
+
+    def target_for(path: Path, output_dir: Optional[Path]) -> Path:
+        # x.csv.gz -> x.json.gz: compressed input gives compressed output (except stbl, which is mmapped)
+        name, compression = split_compression_suffix(path.name)
+        base = (output_dir or path.parent) / name
+        if args.shard_by:
+            return base.with_suffix("")
+        if args.format == "stbl":
+            return base.with_suffix(".stbl")
+        return base.with_suffix(f".{args.format}{compression}")
+
+    if input_path.is_dir():
+        inputs = sorted(p for p in input_path.glob(args.pattern) if p.is_file())
+        if not inputs:
+            raise SystemExit(f"目录中没有匹配 {args.pattern} 的文件: {input_path}")
+        output_dir = Path(args.output) if args.output else None
+        if output_dir:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        jobs = [(p, target_for(p, output_dir)) for p in inputs]
+    else:
+        if args.output:
+            jobs = [(input_path, Path(args.output))]
+        else:
+            jobs = [(input_path, target_for(input_path, None))]
+
+    options = (args.input_encoding, args.output_encoding, args.format, languages, args.shard_by)
 
-    output_path = Path(args.output) if args.output else input_path.with_suffix(".json")
+    def report(src: Path, dst: Path, run) -> bool:
+        try:
+            rows = run()
+        except ValueError as e:
+            print(f"FAILED: {src}: {e}")
+            return False
+        print(f"OK: {src} -> {dst} (rows={rows})")
+        return True
 
-    rows = read_csv_rows(input_path, encoding=args.input_encoding)
-    write_json(output_path, rows, encoding=args.output_encoding)
+    failed = 0
+    if len(jobs) == 1:
+        src, dst = jobs[0]
+        failed += not report(src, dst, lambda: convert_file(src, dst, *options))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs if args.jobs > 0 else None) as executor:
+            futures = [executor.submit(convert_file, src, dst, *options) for src, dst in jobs]
+            for (src, dst), future in zip(jobs, futures):
+                failed += not report(src, dst, future.result)
 
-    print(f"OK: {input_path} -> {output_path} (rows={len(rows)})")
+    if failed:
+        raise SystemExit(f"{failed} 个文件转换失败")
 
 
 if __name__ == "__main__":
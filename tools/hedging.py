@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+对冲请求 - 降低慢请求造成的长尾延迟
+
+请求耗时超过阈值（默认取最近请求耗时的 p95）时，再发一个相同的请求，
+哪个先返回就用哪个，另一个的结果直接丢弃。额外请求数量受预算限制
+（例如 0.05 表示最多多发 5% 的请求）。
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Optional, Callable, Any
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Hedger:
+    """对冲请求执行器（线程安全）"""
+
+    def __init__(self, budget: float = 0.05, delay: Optional[float] = None,
+                 quantile: float = 0.95, min_samples: int = 20, window: int = 500,
+                 max_workers: int = 64):
+        """
+        Args:
+            budget: 额外请求占总请求数的上限比例
+            delay: 固定对冲阈值（秒），为None时使用最近请求耗时的分位数
+            quantile: 自动阈值使用的分位数
+            min_samples: 样本数不足时不进行自动对冲
+            window: 统计耗时的样本窗口大小
+            max_workers: 执行请求的线程数（需要覆盖 主请求 + 对冲请求 的并发）
+        """
+        self.budget = budget
+        self.delay = delay
+        self.quantile = quantile
+        self.min_samples = min_samples
+
+        self._latencies = deque(maxlen=window)
+        self._threshold: Optional[float] = delay
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def _record(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+            if self.delay is None and len(self._latencies) >= self.min_samples \
+                    and len(self._latencies) % 10 == 0:
+                ordered = sorted(self._latencies)
+                self._threshold = ordered[min(int(len(ordered) * self.quantile), len(ordered) - 1)]
+
+    def _timed(self, fn: Callable, args: tuple, started: Optional[threading.Event] = None) -> Any:
+        if started is not None:
+            started.set()
+        start = time.monotonic()
+        result = fn(*args)
+        self._record(time.monotonic() - start)
+        return result
+
+    def _try_reserve_hedge(self) -> bool:
+        with self._lock:
+            if (self.hedged + 1) > self.calls * self.budget:
+                return False
+            self.hedged += 1
+            return True
+
+    def call(self, fn: Callable, *args) -> Any:
+        """
+        执行请求，超过阈值时发出对冲请求
+
+        Args:
+            fn: 请求函数（失败时应抛出异常）
+            *args: 请求参数
+
+        Returns:
+            最先成功返回的结果（全部失败时抛出主请求的异常）
+        """
+        with self._lock:
+            self.calls += 1
+            threshold = self._threshold
+
+        started = threading.Event()
+        primary = self._executor.submit(self._timed, fn, args, started)
+        if threshold is None:
+            return primary.result()
+
+        # 阈值从请求真正开始时计算，在线程池中排队的时间不算
+        started.wait()
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._try_reserve_hedge():
+            return primary.result()
+
+        hedge = self._executor.submit(self._timed, fn, args)
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    # 另一个请求无法中断，结果直接丢弃
+                    return future.result()
+                if first_error is None or future is primary:
+                    first_error = error
+        raise first_error
+
+    def stats(self) -> dict:
+        """对冲统计"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "threshold": self._threshold,
+            }
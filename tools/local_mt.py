@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地离线翻译 - 使用 CTranslate2 在CPU上运行翻译模型（如 Marian/OPUS-MT）
+
+安装:
+    pip install ctranslate2 sentencepiece
+
+准备模型（每个目标语言一个，转换时需带上 sentencepiece 词表）:
+    ct2-transformers-converter --model Helsinki-NLP/opus-mt-zh-vi \\
+        --output_dir models/opus-mt-zh-vi --copy_files source.spm target.spm
+
+在 api_config.json 中配置 local，翻译时使用 --api-type local:
+
+    "local": {
+      "models": {"th": "models/opus-mt-zh-th", "vi": "models/opus-mt-zh-vi"},
+      "device": "cpu",
+      "intra_threads": 4,
+      "inter_threads": 1,
+      "batch_size": 32,
+      "batch_wait": 0.01
+    }
+
+每个模型在进程内只加载一次，所有翻译线程共享。并发线程提交的文本会被
+合并成批次（最多 batch_size 条，或等待 batch_wait 秒）一起推理。
+"""
+
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from concurrent.futures import Future
+
+# 已加载的模型（模型目录 -> 引擎），进程内共享
+_ENGINES: Dict[str, "LocalMTEngine"] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+class LocalMTEngine:
+    """单个本地翻译模型，带批量推理"""
+
+    def __init__(self, model_dir: str, device: str = "cpu", intra_threads: int = 0,
+                 inter_threads: int = 1, batch_size: int = 32, batch_wait: float = 0.01):
+        """
+        Args:
+            model_dir: CTranslate2 模型目录（需包含 source.spm / target.spm）
+            device: 推理设备（"cpu" 或 "cuda"）
+            intra_threads: 单个批次使用的线程数（0 表示自动）
+            inter_threads: 同时推理的批次数
+            batch_size: 每批最多条数
+            batch_wait: 凑批等待时间（秒）
+        """
+        import ctranslate2
+        import sentencepiece
+
+        model_path = Path(model_dir)
+        self.translator = ctranslate2.Translator(
+            str(model_path), device=device,
+            intra_threads=intra_threads, inter_threads=inter_threads,
+        )
+        self.source_sp = sentencepiece.SentencePieceProcessor(model_file=str(model_path / "source.spm"))
+        self.target_sp = sentencepiece.SentencePieceProcessor(model_file=str(model_path / "target.spm"))
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+        self._pending: List[tuple] = []
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, daemon=True, name=f"local-mt-{model_path.name}")
+        self._worker.start()
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """直接批量翻译"""
+        tokens = [self.source_sp.encode(text, out_type=str) for text in texts]
+        results = self.translator.translate_batch(tokens, max_batch_size=self.batch_size)
+        return [self.target_sp.decode(result.hypotheses[0]) for result in results]
+
+    def translate(self, text: str) -> str:
+        """翻译单条文本（与其它线程的请求合并成批次推理）"""
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((text, future))
+            self._cond.notify()
+        return future.result()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # 等待更多请求凑成一批
+                deadline = time.monotonic() + self.batch_wait
+                while len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+
+            try:
+                results = self.translate_batch([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+def get_engine(model_dir: str, options: Optional[Dict[str, Any]] = None) -> LocalMTEngine:
+    """获取（必要时加载）模型，同一模型目录在进程内只加载一次"""
+    key = str(Path(model_dir).resolve())
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            options = options or {}
+            engine = LocalMTEngine(
+                model_dir,
+                device=options.get("device", "cpu"),
+                intra_threads=options.get("intra_threads", 0),
+                inter_threads=options.get("inter_threads", 1),
+                batch_size=options.get("batch_size", 32),
+                batch_wait=options.get("batch_wait", 0.01),
+            )
+            _ENGINES[key] = engine
+        return engine
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+一次读取完成 检测 → 转义 → 翻译 → 导出
+
+原来的流程需要依次运行四个工具，每个工具都要重新读取、解析整个CSV，
+转义工具还要重新解析检测报告来得到 (row_index, column)：
+
+    check_csv_json_unsafe.py → sanitize_csv_for_json.py --report → translate_csv.py → csv_to_json.py
+
+本工具只读取一次CSV，每一行依次流经各个阶段，每个阶段都可选，并输出与单独运行时相同的文件：
+
+    python pipeline.py input.csv --scan --sanitize --translate --json
+    python pipeline.py input.csv --spec pipeline.json
+
+配置文件（各阶段不写即不启用，output 省略时使用各工具的默认文件名）:
+
+    {
+      "encoding": "utf-8-sig",
+      "scan": {"columns": ["ZH", "VN", "TH"], "report": "x_json_unsafe_report.csv"},
+      "sanitize": {"columns": ["ZH", "VN", "TH"], "output": "x_jsonsafe.csv"},
+      "translate": {"api_type": "deepseek", "th": true, "vn": true, "force": false,
+                    "workers": 5, "block_size": 500, "output": "x_translated.csv"},
+      "json": {"output": "x.json", "format": "json"},
+      "csv": {"output": "x_final.csv"}
+    }
+
+默认文件名: x_json_unsafe_report.csv、x_jsonsafe.csv、x_translated.csv、x.json（或 x.ndjson）、x_final.csv
+
+- scan: 检测报告（同 check_csv_json_unsafe.py）
+- sanitize: 启用 scan 时只转义报告中标记的单元格（同 --report），否则转义全部目标列
+- translate: 按块（block_size 行）并发翻译，结果写入 _translated.csv
+- json / csv: 最终结果导出为JSON（同 csv_to_json.py，format 可选 json / ndjson）或CSV
+"""
+
+import csv
+import json
+import argparse
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from check_csv_json_unsafe import REPORT_FIELDS, iter_findings, report_row
+from compressed_io import open_text, split_compression_suffix
+from csv_to_json import JSONWriter
+from sanitize_csv_for_json import to_json_escaped_content
+
+
+def _check_columns(columns: List[str], fieldnames: List[str]):
+    missing = [c for c in columns if c not in fieldnames]
+    if missing:
+        raise ValueError(f"指定的列不存在: {missing}. 可用列: {fieldnames}")
+
+
+def _default_output(input_path: Path, tag: str, suffix: Optional[str] = None) -> Path:
+    """各工具的默认输出文件名：x.csv → x{tag}.csv，压缩输入 x.csv.gz → x{tag}.csv.gz"""
+    base_path, compression = split_compression_suffix(input_path)
+    suffix = base_path.suffix if suffix is None else suffix
+    return input_path.with_name(f"{base_path.stem}{tag}{suffix}{compression}")
+
+
+class Record:
+    """流经各阶段的一行数据"""
+
+    __slots__ = ("index", "row", "flagged")
+
+    def __init__(self, index: int, row: Dict[str, str]):
+        self.index = index          # 从1开始的数据行号（同报告中的 row_index）
+        self.row = row
+        self.flagged: Optional[set] = None  # scan 阶段标记的列
+
+
+class CSVSink:
+    """把经过的行写入CSV（utf-8-sig，与各工具的输出格式相同）"""
+
+    def __init__(self, path: Path, fieldnames: List[str]):
+        self.path = path
+        self._file = open_text(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        self._writer.writeheader()
+        self.rows = 0
+
+    def write(self, row: Dict[str, str]):
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        self._file.close()
+
+
+class ScanStage:
+    """检测JSON风险字符，写检测报告"""
+
+    def __init__(self, spec: Dict[str, Any], fieldnames: List[str], input_path: Path):
+        self.columns = spec.get("columns") or list(fieldnames)
+        _check_columns(self.columns, fieldnames)
+        self.fieldnames = fieldnames
+        self.path = Path(spec.get("report") or _default_output(input_path, "_json_unsafe_report"))
+        self._file = open_text(self.path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=REPORT_FIELDS)
+        self._writer.writeheader()
+        self.findings = 0
+
+    def process(self, records: Iterable[Record]) -> Iterator[Record]:
+        for record in records:
+            record.flagged = set()
+            for it in iter_findings([record.row], self.fieldnames, columns=self.columns):
+                it.csv_line = record.index + 1
+                it.row_index = record.index
+                self._writer.writerow(report_row(it))
+                record.flagged.add(it.column)
+                self.findings += 1
+            yield record
+
+    def close(self):
+        self._file.close()
+
+    def summary(self) -> str:
+        return f"检测报告: {self.path}（{self.findings} 处）"
+
+
+class SanitizeStage:
+    """JSON转义，写 _jsonsafe.csv"""
+
+    def __init__(self, spec: Dict[str, Any], fieldnames: List[str], input_path: Path):
+        preferred = [c for c in ("ZH", "VN", "TH") if c in fieldnames]
+        self.columns = spec.get("columns") or preferred or list(fieldnames)
+        _check_columns(self.columns, fieldnames)
+        self.sink = CSVSink(Path(spec.get("output") or _default_output(input_path, "_jsonsafe")), fieldnames)
+        self.changed = 0
+
+    def process(self, records: Iterable[Record]) -> Iterator[Record]:
+        for record in records:
+            for col in self.columns:
+                # 有检测结果时只处理被标记的单元格（同 --report）
+                if record.flagged is not None and col not in record.flagged:
+                    continue
+                original = record.row.get(col, "")
+                escaped = to_json_escaped_content(original)
+                if escaped != original:
+                    record.row[col] = escaped
+                    self.changed += 1
+            self.sink.write(record.row)
+            yield record
+
+    def close(self):
+        self.sink.close()
+
+    def summary(self) -> str:
+        return f"转义结果: {self.sink.path}（修改 {self.changed} 个单元格）"
+
+
+class TranslateStage:
+    """按块并发翻译，写 _translated.csv"""
+
+    def __init__(self, spec: Dict[str, Any], fieldnames: List[str], input_path: Path):
+        from translate_csv import CSVTranslator, load_api_config
+
+        config = load_api_config()
+        api_type = spec.get("api_type") or config.get("default_type", "google-free")
+        self.translator = CSVTranslator(
+            api_type=api_type,
+            api_key=spec.get("api_key") or config.get(api_type, {}).get("api_key"),
+            api_endpoint=spec.get("api_endpoint") or config.get(api_type, {}).get("endpoint") or None,
+            request_timeout=spec.get("timeout", 60.0),
+        )
+        self.translate_th = spec.get("th", True)
+        self.translate_vn = spec.get("vn", True)
+        self.force = spec.get("force", False)
+        self.workers = spec.get("workers", 5)
+        self.block_size = spec.get("block_size", 500)
+        self.fieldnames = fieldnames
+        # 提前检查必要的列
+        CSVTranslator.plan_tasks(fieldnames, [], self.translate_th, self.translate_vn)
+        self.sink = CSVSink(Path(spec.get("output") or _default_output(input_path, "_translated")), fieldnames)
+        self.stats = {"translated_th": 0, "translated_vn": 0, "skipped_th": 0, "skipped_vn": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, self.workers))
+
+    def _translate_block(self, block: List[Record]):
+        rows = [record.row for record in block]
+        tasks = self.translator.plan_tasks(self.fieldnames, rows, self.translate_th,
+                                           self.translate_vn, self.force, self.stats)
+
+        def run(task):
+            idx, col, lang, text = task
+            # 与 translate_csv 相同：只有抛出异常才算失败，译文与原文相同（数字、代码等）是正常结果
+            try:
+                result = self.translator.translate_text(text, lang, context=rows[idx])
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+                return
+            with self._lock:
+                rows[idx][col] = result
+                self.stats["translated_th" if col == "TH" else "translated_vn"] += 1
+
+        list(self._executor.map(run, tasks))
+
+    def process(self, records: Iterable[Record]) -> Iterator[Record]:
+        block: List[Record] = []
+        for record in records:
+            block.append(record)
+            if len(block) >= self.block_size:
+                yield from self._flush(block)
+                block = []
+        if block:
+            yield from self._flush(block)
+
+    def _flush(self, block: List[Record]) -> Iterator[Record]:
+        self._translate_block(block)
+        for record in block:
+            self.sink.write(record.row)
+            yield record
+        print(f"已翻译 {self.sink.rows} 行")
+
+    def close(self):
+        self._executor.shutdown()
+        self.sink.close()
+
+    def summary(self) -> str:
+        return (f"翻译结果: {self.sink.path}（TH {self.stats['translated_th']}，"
+                f"VN {self.stats['translated_vn']}，未成功 {self.stats['errors']}）")
+
+
+STAGES = {"scan": ScanStage, "sanitize": SanitizeStage, "translate": TranslateStage}
+
+
+def run_pipeline(input_path: Path, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按配置运行流水线
+
+    Args:
+        input_path: 输入CSV
+        spec: 流水线配置（见模块说明）
+
+    Returns:
+        {"rows": 行数, "artifacts": [说明...]}
+    """
+    encoding = spec.get("encoding", "utf-8-sig")
+    with open_text(input_path, "r", encoding=encoding, newline="") as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        if not fieldnames:
+            raise ValueError("CSV 没有表头（fieldnames 为空）")
+
+        stages = [cls(spec[name], fieldnames, input_path) for name, cls in STAGES.items()
+                  if spec.get(name) is not None]
+        sinks = []
+        if spec.get("json") is not None:
+            fmt = spec["json"].get("format", "json")
+            sinks.append(JSONWriter(Path(spec["json"].get("output") or _default_output(input_path, "", f".{fmt}")),
+                                    spec["json"].get("encoding", "utf-8"), fmt))
+        if spec.get("csv") is not None:
+            sinks.append(CSVSink(Path(spec["csv"].get("output") or _default_output(input_path, "_final")), fieldnames))
+
+        records: Iterable[Record] = (Record(i + 1, row) for i, row in enumerate(reader))
+        for stage in stages:
+            records = stage.process(records)
+
+        rows = 0
+        try:
+            for record in records:
+                for sink in sinks:
+                    sink.write(record.row)
+                rows += 1
+        finally:
+            for stage in stages:
+                stage.close()
+            for sink in sinks:
+                sink.close()
+
+    artifacts = [stage.summary() for stage in stages]
+    artifacts += [f"导出: {sink.path}" for sink in sinks]
+    return {"rows": rows, "artifacts": artifacts}
+
+
+def parse_columns(arg: str) -> List[str]:
+    cols = [c.strip() for c in arg.split(",") if c.strip()]
+    if not cols:
+        raise argparse.ArgumentTypeError("--columns 不能为空")
+    return cols
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一次读取完成 检测 → 转义 → 翻译 → 导出")
+    parser.add_argument("input", help="输入CSV文件路径")
+    parser.add_argument("--spec", help="流水线配置文件（JSON），命令行开关会追加到配置中")
+    parser.add_argument("--scan", action="store_true", help="检测JSON风险，输出 _json_unsafe_report.csv")
+    parser.add_argument("--sanitize", action="store_true", help="JSON转义，输出 _jsonsafe.csv")
+    parser.add_argument("--translate", action="store_true", help="翻译TH/VN，输出 _translated.csv")
+    parser.add_argument("--json", action="store_true", help="导出JSON（与输入同名 .json）")
+    parser.add_argument("--columns", type=parse_columns, help="scan/sanitize 处理的列（逗号分隔）")
+    parser.add_argument("--api-type", help="翻译API类型（默认: api_config.json 中的 default_type）")
+    parser.add_argument("--workers", type=int, default=5, help="翻译并发线程数（默认: 5）")
+    parser.add_argument("--encoding", help="输入CSV编码（默认: utf-8-sig）")
+    args = parser.parse_args()
+
+    spec: Dict[str, Any] = {}
+    if args.spec:
+        with open(args.spec, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+    if args.encoding:
+        spec["encoding"] = args.encoding
+    if args.scan:
+        spec.setdefault("scan", {})
+    if args.sanitize:
+        spec.setdefault("sanitize", {})
+    if args.translate:
+        spec.setdefault("translate", {"workers": args.workers})
+        if args.api_type:
+            spec["translate"]["api_type"] = args.api_type
+    if args.json:
+        spec.setdefault("json", {})
+    if args.columns:
+        for name in ("scan", "sanitize"):
+            if spec.get(name) is not None:
+                spec[name]["columns"] = args.columns
+
+    if not any(spec.get(name) is not None for name in ("scan", "sanitize", "translate", "json", "csv")):
+        parser.error("至少需要启用一个阶段（--scan/--sanitize/--translate/--json 或 --spec）")
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        raise SystemExit(f"输入文件不存在: {input_path}")
+
+    result = run_pipeline(input_path, spec)
+    print(f"OK: {input_path}（rows={result['rows']}）")
+    for line in result["artifacts"]:
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
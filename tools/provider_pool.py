@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多API Key / 多服务商负载均衡
+
+在 api_config.json 中配置 pool，翻译时使用 --api-type pool:
+
+    "pool": {
+      "max_errors": 3,
+      "cooldown": 60,
+      "backends": [
+        {"name": "ds-1", "api_type": "deepseek", "api_key": "KEY1", "weight": 2, "rate_limit": 5},
+        {"name": "ds-2", "api_type": "deepseek", "api_key": "KEY2", "weight": 1, "rate_limit": 3},
+        {"name": "gpt", "api_type": "openai", "api_key": "KEY3", "fallback": true}
+      ]
+    }
+
+- weight: 权重，负载按 "进行中的请求数 / 权重" 计算，优先发给最空闲的后端
+- rate_limit: 每秒最多请求数（可选，不填则不限制）
+- fallback: 备用后端，只有所有主后端都不可用时才使用
+- max_errors: 连续失败多少次后标记为不可用
+- cooldown: 不可用后端多少秒后重新尝试
+"""
+
+import time
+import threading
+from typing import Optional, Dict, Any, List, Callable
+
+from cancellation import CancelToken, CancelledError
+
+
+class Backend:
+    """单个翻译后端（一个API Key或一个端点）"""
+
+    def __init__(self, name: str, translator, weight: float = 1.0,
+                 rate_limit: Optional[float] = None, fallback: bool = False):
+        """
+        Args:
+            name: 后端名称（用于统计显示）
+            translator: 该后端的翻译器实例（需提供 translate_plain 方法）
+            weight: 权重
+            rate_limit: 每秒最多请求数
+            fallback: 是否为备用后端
+        """
+        self.name = name
+        self.translator = translator
+        self.weight = max(float(weight), 0.01)
+        self.rate_limit = rate_limit
+        self.fallback = fallback
+
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.unhealthy_until = 0.0
+        self.next_slot = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return self.unhealthy_until <= now
+
+    def load(self) -> float:
+        return (self.in_flight + 1) / self.weight
+
+
+class ProviderPool:
+    """按权重和负载分发请求，连续失败的后端自动摘除并切换到其它后端"""
+
+    def __init__(self, backends: List[Backend], max_errors: int = 3, cooldown: float = 60.0):
+        if not backends:
+            raise ValueError("pool 中至少需要配置一个后端")
+        self.backends = backends
+        self.max_errors = max_errors
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], translator_factory: Callable) -> "ProviderPool":
+        """
+        根据配置创建负载均衡池
+
+        Args:
+            config: api_config.json 中的 pool 配置
+            translator_factory: 创建单个后端翻译器的函数，参数为 api_type/api_key/api_endpoint
+
+        Returns:
+            负载均衡池
+        """
+        backends = []
+        for i, item in enumerate(config.get("backends", [])):
+            api_type = item["api_type"]
+            if api_type == "pool":
+                raise ValueError("pool 的后端不能再是 pool")
+            translator = translator_factory(
+                api_type=api_type,
+                api_key=item.get("api_key"),
+                api_endpoint=item.get("endpoint") or None,
+            )
+            backends.append(Backend(
+                name=item.get("name") or f"{api_type}-{i + 1}",
+                translator=translator,
+                weight=item.get("weight", 1.0),
+                rate_limit=item.get("rate_limit"),
+                fallback=item.get("fallback", False),
+            ))
+        return cls(backends, max_errors=config.get("max_errors", 3),
+                   cooldown=config.get("cooldown", 60.0))
+
+    def _acquire(self, exclude: set) -> Optional[Backend]:
+        """选择一个后端并占用（返回前已计入 in_flight），同时预约速率限制的时间槽"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [b for b in self.backends if b not in exclude]
+            if not candidates:
+                return None
+
+            healthy = [b for b in candidates if b.is_healthy(now)]
+            primary = [b for b in healthy if not b.fallback]
+            if primary:
+                pool = primary
+            elif healthy:
+                pool = healthy
+            else:
+                # 全部不可用时，尝试最早恢复的后端
+                pool = [min(candidates, key=lambda b: b.unhealthy_until)]
+
+            backend = min(pool, key=lambda b: (b.load(), b.next_slot))
+            backend.in_flight += 1
+            backend.requests += 1
+
+            wait = 0.0
+            if backend.rate_limit:
+                slot = max(now, backend.next_slot)
+                backend.next_slot = slot + 1.0 / backend.rate_limit
+                wait = slot - now
+
+        if wait > 0:
+            time.sleep(wait)
+        return backend
+
+    def _release(self, backend: Backend, error: bool):
+        with self._lock:
+            backend.in_flight -= 1
+            if error:
+                backend.errors += 1
+                backend.consecutive_errors += 1
+                if backend.consecutive_errors >= self.max_errors:
+                    backend.unhealthy_until = time.monotonic() + self.cooldown
+            else:
+                backend.consecutive_errors = 0
+                backend.unhealthy_until = 0.0
+
+    def translate(self, text: str, target_lang: str, context: Optional[Dict[str, str]] = None,
+                  cancel: Optional[CancelToken] = None, original: Optional[str] = None) -> str:
+        """
+        翻译纯文本，失败时自动切换到其它后端
+
+        Args:
+            text: 纯文本
+            target_lang: 目标语言代码
+            context: 文本所在的CSV行（可选）
+            cancel: 取消令牌（可选），取消时不再切换后端
+            original: 含颜色标签的原文（可选，后端为 routing 时用于分流）
+
+        Returns:
+            翻译后的文本（所有后端都失败时抛出最后一个异常）
+        """
+        tried = set()
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self._acquire(tried)
+            if backend is None:
+                raise last_error or RuntimeError("没有可用的翻译后端")
+            tried.add(backend)
+            try:
+                result = backend.translator.translate_plain(text, target_lang, context, cancel, original)
+            except CancelledError:
+                # 被放弃的请求不算后端错误
+                self._release(backend, error=False)
+                raise
+            except Exception as e:
+                self._release(backend, error=True)
+                last_error = e
+                continue
+            self._release(backend, error=False)
+            return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各后端的请求/错误统计"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                b.name: {
+                    "requests": b.requests,
+                    "errors": b.errors,
+                    "healthy": b.is_healthy(now),
+                }
+                for b in self.backends
+            }
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+翻译API依赖注册表
+
+各翻译API需要的第三方包只在真正使用该API时才导入（openai、google-cloud-translate
+等包导入就要几百毫秒），启动命令行或图形界面时不加载任何翻译库。
+
+- missing_packages(api_type): 检查某个API缺少哪些包（只查找不导入，结果缓存）
+- require(api_type): 缺少依赖时抛出 ImportError，提示安装命令
+- load(module): 首次使用时导入模块
+"""
+
+import importlib
+import importlib.util
+from functools import lru_cache
+from typing import Dict, List
+
+# API类型 -> {模块名: pip包名}；pool / routing 的依赖由各后端分别检查
+PROVIDER_PACKAGES: Dict[str, Dict[str, str]] = {
+    "google-free": {"deep_translator": "deep-translator"},
+    "google-cloud": {"google.cloud.translate_v2": "google-cloud-translate"},
+    "openai": {"openai": "openai"},
+    "deepseek": {"openai": "openai"},
+    "deepl": {"requests": "requests"},
+    "local": {"ctranslate2": "ctranslate2", "sentencepiece": "sentencepiece"},
+}
+
+
+@lru_cache(maxsize=None)
+def is_installed(module: str) -> bool:
+    """模块是否可以导入（只查找，不执行导入；结果缓存，安装新包后需调用 clear_cache）"""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        # 父包不存在（如没有 google.cloud）
+        return False
+
+
+def clear_cache():
+    """安装新包后清除检查结果"""
+    is_installed.cache_clear()
+    importlib.invalidate_caches()
+
+
+def missing_packages(api_type: str) -> List[str]:
+    """返回该API缺少的pip包名（无额外依赖或未知类型返回空列表）"""
+    packages = PROVIDER_PACKAGES.get(api_type, {})
+    return [package for module, package in packages.items() if not is_installed(module)]
+
+
+def require(api_type: str):
+    """检查依赖，缺少时抛出 ImportError"""
+    missing = missing_packages(api_type)
+    if missing:
+        raise ImportError(f"请安装 {' 和 '.join(missing)}: pip install {' '.join(missing)}")
+
+
+def load(module: str):
+    """导入模块（已导入时直接返回）；未安装时给出安装提示"""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        package = next((p for packages in PROVIDER_PACKAGES.values()
+                        for m, p in packages.items() if m == module), module)
+        raise ImportError(f"请安装 {package}: pip install {package}") from None
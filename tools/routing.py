@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按规则分流 - 短文本走便宜快速的翻译，长文本/带标签的文本走大模型
+
+在 api_config.json 中配置 routing，翻译时使用 --api-type routing:
+
+    "routing": {
+      "routes": {
+        "fast": {"api_type": "google-free"},
+        "llm": {"api_type": "deepseek"}
+      },
+      "rules": [
+        {"route": "llm", "markup": true},
+        {"route": "llm", "glossary": true},
+        {"route": "llm", "field": "des*"},
+        {"route": "fast", "max_len": 8}
+      ],
+      "default": "llm"
+    }
+
+- routes: 可用的翻译后端，未填写 api_key/endpoint 时使用 api_config.json 中对应类型的设置
+- rules: 按顺序匹配，第一条满足全部条件的规则生效；都不满足时使用 default
+  - min_len / max_len: 去掉颜色标签后的字符数
+  - markup: 是否包含颜色标签
+  - glossary: 是否包含术语表（api_config.json 中的 glossary）中的词语；
+    术语只在大模型的提示词中生效，包含术语的文本应交给大模型
+  - table / sheet / field: Table/Sheet/Field 列（支持 * ? 通配符）
+"""
+
+import re
+import fnmatch
+import threading
+from typing import Optional, Dict, Any, Callable, Iterable
+
+# 颜色标签
+_TAG_PATTERN = re.compile(r'(<color[^>]*>|</color>)')
+
+# 规则条件对应的CSV列
+_COLUMN_KEYS = {"table": "Table", "sheet": "Sheet", "field": "Field"}
+
+
+class RoutingPolicy:
+    """按规则为每条文本选择翻译后端"""
+
+    def __init__(self, routes: Dict[str, Any], rules: list, default: str,
+                 glossary: Optional[Callable[[], Iterable[str]]] = None):
+        """
+        Args:
+            routes: 路由名 -> 翻译器实例（需提供 translate_plain 方法）
+            rules: 规则列表
+            default: 默认路由名
+            glossary: 返回术语表原文的函数（glossary 规则使用，首次匹配时调用）
+        """
+        if default not in routes:
+            raise ValueError(f"routing 的默认路由不存在: {default}")
+        for rule in rules:
+            if rule.get("route") not in routes:
+                raise ValueError(f"routing 规则引用了不存在的路由: {rule.get('route')}")
+        self.routes = routes
+        self.rules = rules
+        self.default = default
+        self._glossary = glossary
+        self._glossary_pattern = None
+        self._counts = {name: 0 for name in routes}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], translator_factory: Callable,
+                    glossary: Optional[Callable[[], Iterable[str]]] = None) -> "RoutingPolicy":
+        """
+        根据配置创建分流策略
+
+        Args:
+            config: api_config.json 中的 routing 配置
+            translator_factory: 创建单个路由翻译器的函数，参数为 api_type/api_key/api_endpoint
+            glossary: 返回术语表原文的函数（可选）
+
+        Returns:
+            分流策略
+        """
+        routes = {}
+        for name, item in config.get("routes", {}).items():
+            if item["api_type"] == "routing":
+                raise ValueError("routing 的路由不能再是 routing")
+            routes[name] = translator_factory(
+                api_type=item["api_type"],
+                api_key=item.get("api_key"),
+                api_endpoint=item.get("endpoint") or None,
+            )
+        return cls(routes, config.get("rules", []), config.get("default", next(iter(routes), "")), glossary)
+
+    def _has_glossary_term(self, text: str) -> bool:
+        """文本是否包含术语（所有术语合成一个正则，只编译一次）"""
+        with self._lock:
+            if self._glossary_pattern is None:
+                terms = sorted((t for t in (self._glossary() if self._glossary else []) if t),
+                               key=len, reverse=True)
+                self._glossary_pattern = re.compile("|".join(map(re.escape, terms))) if terms else False
+            pattern = self._glossary_pattern
+        return bool(pattern) and pattern.search(text) is not None
+
+    def _matches(self, rule: Dict[str, Any], text: str, context: Optional[Dict[str, str]]) -> bool:
+        length = len(_TAG_PATTERN.sub("", text))
+        if "min_len" in rule and length < rule["min_len"]:
+            return False
+        if "max_len" in rule and length > rule["max_len"]:
+            return False
+        if "markup" in rule and bool(_TAG_PATTERN.search(text)) != rule["markup"]:
+            return False
+        if "glossary" in rule and self._has_glossary_term(_TAG_PATTERN.sub("", text)) != rule["glossary"]:
+            return False
+        for key, column in _COLUMN_KEYS.items():
+            if key in rule:
+                value = (context or {}).get(column) or ""
+                if not fnmatch.fnmatchcase(value, rule[key]):
+                    return False
+        return True
+
+    def select_name(self, text: str, context: Optional[Dict[str, str]] = None) -> str:
+        """返回匹配的路由名（不计入统计）"""
+        for rule in self.rules:
+            if self._matches(rule, text, context):
+                return rule["route"]
+        return self.default
+
+    def select(self, text: str, context: Optional[Dict[str, str]] = None):
+        """
+        为文本选择翻译后端
+
+        Args:
+            text: 原文（含颜色标签）
+            context: 所在行（用于匹配 Table/Sheet/Field）
+
+        Returns:
+            翻译器实例
+        """
+        name = self.select_name(text, context)
+        with self._lock:
+            self._counts[name] += 1
+        return self.routes[name]
+
+    def stats(self) -> Dict[str, int]:
+        """各路由的分流条数"""
+        with self._lock:
+            return dict(self._counts)
@@ -29,19 +29,27 @@
   python sanitize_csv_for_json.py input.csv
   python sanitize_csv_for_json.py input.csv --columns ZH,VN,TH
   python sanitize_csv_for_json.py input.csv --report input_json_unsafe_report.csv
+  python sanitize_csv_for_json.py huge.csv --jobs 0   # 按CPU核数并行分块处理
 
 输出
 - 默认输出：`{input}_jsonsafe.csv`（不修改原文件）
+- 输入/输出/报告都可以是 .gz / .zst 压缩文件（见 compressed_io.py），
+  压缩输入的默认输出同样压缩
 """
 
 from __future__ import annotations
 
 import argparse
+import bisect
 import csv
+import io
 import json
 from pathlib import Path
 from typing import Dict, List, Optional, Sequence, Set, Tuple
 
+from compressed_io import is_compressed, open_text, split_compression_suffix
+from csv_chunks import DEFAULT_CHUNK_SIZE, ordered_map, read_chunk_rows, resolve_jobs, split_records
+
 
 def parse_columns(arg: str) -> List[str]:
     cols = [c.strip() for c in arg.split(",") if c.strip()]
@@ -51,7 +59,7 @@ def parse_columns(arg: str) -> List[str]:
 
 
 def read_csv_rows(path: Path, encoding: str) -> Tuple[List[Dict[str, str]], List[str]]:
-    with path.open("r", encoding=encoding, newline="") as f:
+    with open_text(path, "r", encoding=encoding, newline="") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames or []
         rows = list(reader)
@@ -59,7 +67,7 @@ def read_csv_rows(path: Path, encoding: str) -> Tuple[List[Dict[str, str]], List
 
 
 def write_csv_rows(path: Path, fieldnames: Sequence[str], rows: Sequence[Dict[str, str]]) -> None:
-    with path.open("w", encoding="utf-8-sig", newline="") as f:
+    with open_text(path, "w", encoding="utf-8-sig", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(rows)
@@ -74,7 +82,7 @@ def to_json_escaped_content(value: str) -> str:
 
 def load_report_pairs(report_path: Path) -> Set[Tuple[int, str]]:
     pairs: Set[Tuple[int, str]] = set()
-    with report_path.open("r", encoding="utf-8-sig", newline="") as f:
+    with open_text(report_path, "r", encoding="utf-8-sig", newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
             try:
@@ -87,6 +95,100 @@ def load_report_pairs(report_path: Path) -> Set[Tuple[int, str]]:
     return pairs
 
 
+def sanitize_rows(
+    rows: Sequence[Dict[str, str]],
+    target_columns: Sequence[str],
+    report_pairs: Optional[Set[Tuple[int, str]]] = None,
+    first_row_index: int = 1,
+) -> int:
+    """原地转义 rows 中的目标单元格，返回修改的单元格数。"""
+    changed_cells = 0
+    for i, row in enumerate(rows):
+        row_index = i + first_row_index
+        for col in target_columns:
+            if report_pairs is not None and (row_index, col) not in report_pairs:
+                continue
+            original = row.get(col, "")
+            escaped = to_json_escaped_content(original)
+            if escaped != original:
+                row[col] = escaped
+                changed_cells += 1
+    return changed_cells
+
+
+def _count_chunk(path: Path, begin: int, end: int, encoding: str, fieldnames: Sequence[str]) -> int:
+    return len(read_chunk_rows(path, begin, end, encoding, fieldnames))
+
+
+def _sanitize_chunk(
+    path: Path,
+    begin: int,
+    end: int,
+    encoding: str,
+    fieldnames: Sequence[str],
+    target_columns: Sequence[str],
+    report_pairs: Optional[Set[Tuple[int, str]]],
+    first_row_index: int,
+) -> Tuple[int, str, int]:
+    rows = read_chunk_rows(path, begin, end, encoding, fieldnames)
+    changed_cells = sanitize_rows(rows, target_columns, report_pairs, first_row_index)
+    buf = io.StringIO(newline="")
+    csv.DictWriter(buf, fieldnames=fieldnames).writerows(rows)
+    return len(rows), buf.getvalue(), changed_cells
+
+
+def sanitize_parallel(
+    input_path: Path,
+    output_path: Path,
+    encoding: str,
+    fieldnames: Sequence[str],
+    ranges: Sequence[Tuple[int, int]],
+    target_columns: Sequence[str],
+    report_pairs: Optional[Set[Tuple[int, str]]] = None,
+    jobs: int = 0,
+) -> Tuple[int, int]:
+    """按记录边界分块并行转义，按原顺序写出，返回 (行数, 修改的单元格数)。
+
+    报告里的 row_index 是全局行号，所以 --report 模式先并行数一遍每块的行数。
+    """
+    jobs = resolve_jobs(jobs)
+    first_indexes = [1] * len(ranges)
+    if report_pairs is not None:
+        counts = ordered_map(
+            _count_chunk, ((input_path, b, e, encoding, fieldnames) for b, e in ranges), jobs
+        )
+        first_row_index = 1
+        for k, n_rows in enumerate(counts):
+            first_indexes[k] = first_row_index
+            first_row_index += n_rows
+
+    # 报告记录按行号排序一次，每块用二分查找切出自己的范围
+    sorted_pairs = sorted(report_pairs) if report_pairs is not None else []
+    pair_rows = [pair[0] for pair in sorted_pairs]
+
+    def chunk_pairs(k: int) -> Optional[Set[Tuple[int, str]]]:
+        # 只把落在本块行号范围内的报告记录发给子进程
+        if report_pairs is None:
+            return None
+        start = bisect.bisect_left(pair_rows, first_indexes[k])
+        stop = bisect.bisect_left(pair_rows, first_indexes[k + 1]) if k + 1 < len(ranges) else len(pair_rows)
+        return set(sorted_pairs[start:stop])
+
+    items = (
+        (input_path, b, e, encoding, fieldnames, target_columns, chunk_pairs(k), first_indexes[k])
+        for k, (b, e) in enumerate(ranges)
+    )
+    total_rows = 0
+    changed_cells = 0
+    with open_text(output_path, "w", encoding="utf-8-sig", newline="") as f:
+        csv.DictWriter(f, fieldnames=fieldnames).writeheader()
+        for n_rows, text, changed in ordered_map(_sanitize_chunk, items, jobs):
+            f.write(text)
+            total_rows += n_rows
+            changed_cells += changed
+    return total_rows, changed_cells
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Sanitize CSV cells for naive CSV→JSON converters.")
     parser.add_argument("input", help="输入CSV文件路径")
@@ -106,6 +208,18 @@ def main() -> None:
         default="utf-8-sig",
         help="输入CSV编码（默认: utf-8-sig，会自动去掉BOM）",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="并行进程数（默认: 1 不并行；0 表示按CPU核数）。并行时按记录边界分块处理，内存占用与文件大小无关",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+        help="并行时每块的大小（MB，默认: 8）",
+    )
 
     args = parser.parse_args()
 
@@ -113,8 +227,14 @@ def main() -> None:
     if not input_path.exists():
         raise SystemExit(f"输入文件不存在: {input_path}")
 
+    if args.jobs != 1 and is_compressed(input_path):
+        # 分块依赖对原文件 mmap 按字节切分，压缩文件只能顺序读取
+        print("压缩文件不支持 --jobs，改为单进程处理")
+        args.jobs = 1
+
+    base_path, compression = split_compression_suffix(input_path)
     output_path = Path(args.output) if args.output else input_path.with_name(
-        f"{input_path.stem}_jsonsafe{input_path.suffix}"
+        f"{base_path.stem}_jsonsafe{base_path.suffix}{compression}"
     )
 
     report_pairs: Optional[Set[Tuple[int, str]]] = None
@@ -126,7 +246,10 @@ def main() -> None:
         if not report_pairs:
             raise SystemExit("报告里没有可用的 row_index/column 记录")
 
-    rows, fieldnames = read_csv_rows(input_path, encoding=args.encoding)
+    if args.jobs == 1:
+        rows, fieldnames = read_csv_rows(input_path, encoding=args.encoding)
+    else:
+        fieldnames, ranges = split_records(input_path, args.encoding, args.chunk_size * 1024 * 1024)
     if not fieldnames:
         raise SystemExit("CSV 没有表头（fieldnames 为空）")
 
@@ -140,22 +263,18 @@ def main() -> None:
     if missing:
         raise SystemExit(f"指定的列不存在: {missing}. 可用列: {fieldnames}")
 
-    changed_cells = 0
-    for i, row in enumerate(rows):
-        row_index = i + 1
-        for col in target_columns:
-            if report_pairs is not None and (row_index, col) not in report_pairs:
-                continue
-            original = row.get(col, "")
-            escaped = to_json_escaped_content(original)
-            if escaped != original:
-                row[col] = escaped
-                changed_cells += 1
-
-    write_csv_rows(output_path, fieldnames, rows)
+    if args.jobs == 1:
+        changed_cells = sanitize_rows(rows, target_columns, report_pairs)
+        write_csv_rows(output_path, fieldnames, rows)
+        total_rows = len(rows)
+    else:
+        total_rows, changed_cells = sanitize_parallel(
+            input_path, output_path, args.encoding, fieldnames, ranges,
+            target_columns, report_pairs, jobs=args.jobs,
+        )
 
     print(f"OK: {input_path} -> {output_path}")
-    print(f"Rows: {len(rows)}")
+    print(f"Rows: {total_rows}")
     print(f"Changed cells: {changed_cells}")
     if report_pairs is not None:
         print(f"Report-driven targets: {len(report_pairs)}")
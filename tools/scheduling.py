@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+翻译任务调度 - 按预估耗时排序，缩短总耗时
+
+- 长文本优先（LPT，Longest Processing Time first），避免文件末尾的长技能描述
+  在最后才开始，拖长整体耗时
+- 短文本打包成一个作业在同一线程内依次处理，减少调度开销
+- 各语言轮流出队，保证 TH 和 VN 进度均衡
+- 也可以按 Table/Sheet 分组连续处理（见 group_tasks_by_context），便于命中大模型前缀缓存
+- 或者按行顺序处理（见 group_tasks_by_row）
+
+调度只影响提交顺序，结果按行号写回，输出文件内容与按行顺序翻译一致。
+"""
+
+import re
+import itertools
+from typing import List, Tuple, Dict
+
+# 颜色标签不参与翻译，不计入耗时
+_TAG_PATTERN = re.compile(r'(<color[^>]*>|</color>)')
+
+Task = Tuple[int, str, str, str]
+
+
+def estimate_cost(text: str) -> int:
+    """预估翻译耗时（按去掉颜色标签后的字符数）"""
+    return len(_TAG_PATTERN.sub("", text or ""))
+
+
+def schedule_tasks(tasks: List[Task], short_threshold: int = 16,
+                   pack_size: int = 8) -> List[List[Task]]:
+    """
+    把任务排成作业列表
+
+    Args:
+        tasks: 任务列表 [(行号, 列名, 语言代码, 中文原文)...]
+        short_threshold: 不超过该字符数的任务视为短任务，打包处理
+        pack_size: 每个短任务包最多包含的任务数（设为1不打包）
+
+    Returns:
+        作业列表，每个作业是一组任务（长任务单独成组）
+    """
+    # 按语言分队列
+    by_lang: Dict[str, List[Task]] = {}
+    for task in tasks:
+        by_lang.setdefault(task[2], []).append(task)
+
+    queues = []
+    for lang_tasks in by_lang.values():
+        long_jobs = []
+        short_tasks = []
+        for task in lang_tasks:
+            cost = estimate_cost(task[3])
+            if pack_size > 1 and cost <= short_threshold:
+                short_tasks.append((cost, task))
+            else:
+                long_jobs.append((cost, [task]))
+
+        short_tasks.sort(key=lambda item: -item[0])
+        packed_jobs = []
+        for start in range(0, len(short_tasks), pack_size):
+            group = short_tasks[start:start + pack_size]
+            packed_jobs.append((sum(cost for cost, _ in group), [task for _, task in group]))
+
+        jobs = long_jobs + packed_jobs
+        # 稳定排序：耗时相同时保持原有行顺序
+        jobs.sort(key=lambda item: -item[0])
+        queues.append([job for _, job in jobs])
+
+    # 各语言轮流出队
+    scheduled = []
+    for group in itertools.zip_longest(*queues):
+        scheduled.extend(job for job in group if job is not None)
+    return scheduled
+
+
+def group_tasks_by_context(tasks: List[Task], rows: List[Dict[str, str]],
+                           group_size: int = 8) -> List[List[Task]]:
+    """
+    按 (语言, Table, Sheet) 分组，组内保持行顺序，每 group_size 条成为一个作业
+
+    同一作业在一个线程内依次请求，连续请求的系统提示词和上下文完全相同，
+    便于命中大模型服务端的前缀缓存。各语言仍然轮流出队。
+
+    Args:
+        tasks: 任务列表 [(行号, 列名, 语言代码, 中文原文)...]
+        rows: CSV数据行
+        group_size: 每个作业最多包含的任务数
+
+    Returns:
+        作业列表
+    """
+    by_lang: Dict[str, Dict[Tuple[str, str], List[Task]]] = {}
+    for task in tasks:
+        row = rows[task[0]]
+        context_key = (row.get("Table") or "", row.get("Sheet") or "")
+        by_lang.setdefault(task[2], {}).setdefault(context_key, []).append(task)
+
+    queues = []
+    for groups in by_lang.values():
+        jobs = []
+        for group in groups.values():
+            for start in range(0, len(group), group_size):
+                jobs.append(group[start:start + group_size])
+        queues.append(jobs)
+
+    scheduled = []
+    for group in itertools.zip_longest(*queues):
+        scheduled.extend(job for job in group if job is not None)
+    return scheduled
+
+
+def group_tasks_by_row(tasks: List[Task], group_size: int = 1,
+                       short_threshold: int = 16) -> List[List[Task]]:
+    """
+    按行顺序把同一语言相邻的短任务每 group_size 条合成一个作业
+
+    长任务（超过 short_threshold）单独成组，并截断前后的短任务组，
+    作业按各自第一条任务的顺序排列。
+
+    Args:
+        tasks: 任务列表 [(行号, 列名, 语言代码, 中文原文)...]
+        group_size: 每个作业最多包含的任务数（设为1不合并）
+        short_threshold: 不超过该字符数的任务视为短任务，可以合并
+
+    Returns:
+        作业列表
+    """
+    jobs: List[Tuple[int, List[Task]]] = []
+    open_jobs: Dict[str, List[Task]] = {}
+    for position, task in enumerate(tasks):
+        lang = task[2]
+        if group_size <= 1 or estimate_cost(task[3]) > short_threshold:
+            open_jobs.pop(lang, None)
+            jobs.append((position, [task]))
+            continue
+        job = open_jobs.get(lang)
+        if job is None or len(job) >= group_size:
+            job = []
+            open_jobs[lang] = job
+            jobs.append((position, job))
+        job.append(task)
+    return [job for _, job in jobs]
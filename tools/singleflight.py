@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+合并相同的进行中请求（single-flight）
+
+多个线程（或协程）同时请求同一个键时，只有第一个调用方真正执行请求，
+其它调用方等待并共享它的结果（或异常）。请求结束后键立即移除，
+之后的调用会重新执行，不充当缓存。
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """相同键的进行中调用只执行一次（线程安全，也可在asyncio中使用）"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable):
+        """返回 (future, 是否由本调用方执行)"""
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, fn: Callable, args: tuple):
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def do(self, key: Hashable, fn: Callable, *args) -> Any:
+        """
+        执行 fn(*args)，相同键正在执行时等待其结果
+
+        Args:
+            key: 请求的键（可哈希）
+            fn: 实际执行请求的函数
+
+        Returns:
+            fn 的返回值，fn 抛出的异常会传给所有等待的调用方
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._finish(key, future, fn, args)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable, *args) -> Any:
+        """
+        do 的协程版本：fn 在默认线程池中执行，等待时不阻塞事件循环
+
+        与 do 共享同一张进行中请求表，线程和协程的相同请求也会合并。
+        """
+        # 只在协程中用到，命令行/图形界面启动时不导入 asyncio
+        import asyncio
+
+        future, leader = self._join(key)
+        if leader:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, self._finish, key, future, fn, args)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        """调用次数和被合并的次数"""
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced}
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Indexed binary string table export (.stbl) for runtime lookup.
+
+The game client otherwise has to parse the whole JSON array and build a dict
+before it can look anything up. A .stbl file can be memory-mapped and queried
+directly: a sorted fixed-width key index is binary-searched, and strings are
+read in place from per-language blobs.
+
+Layout (all integers little-endian):
+
+  header      magic "STBL", u16 version, u16 language count, u32 entry count,
+              u64 index offset, u64 keys blob offset
+  languages   per language: 8-byte ASCII code (NUL padded), u64 blob offset, u64 blob size
+  index       per entry, sorted by key bytes: u32 key offset, then one u32 string
+              offset per language (offsets are relative to their blob)
+  keys blob   u32 length + UTF-8 of "Table\\x1fSheet\\x1fField\\x1fPosition"
+  lang blobs  u32 length + UTF-8 text; identical strings are stored once
+
+Usage:
+  python csv_to_json.py input.csv --format stbl
+  python string_table.py get input.stbl item.xlsx item name B2
+  python string_table.py verify input.stbl input.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from compressed_io import open_text
+
+MAGIC = b"STBL"
+VERSION = 1
+
+KEY_COLUMNS = ("Table", "Sheet", "Field", "Position")
+DEFAULT_LANGUAGES = ("ZH", "TH", "VN")
+KEY_SEPARATOR = "\x1f"
+
+_HEADER = struct.Struct("<4sHHIQQ")
+_LANGUAGE = struct.Struct("<8sQQ")
+_U32 = struct.Struct("<I")
+
+
+def make_key(table: str, sheet: str, field: str, position: str) -> bytes:
+    return KEY_SEPARATOR.join((table, sheet, field, position)).encode("utf-8")
+
+
+class _Blob:
+    """Length-prefixed UTF-8 strings, deduplicated."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self._offsets: Dict[bytes, int] = {}
+
+    def add(self, value: bytes) -> int:
+        offset = self._offsets.get(value)
+        if offset is None:
+            offset = len(self.data)
+            self.data += _U32.pack(len(value))
+            self.data += value
+            self._offsets[value] = offset
+        return offset
+
+
+def write_string_table(
+    path: Path, rows: Iterable[Dict[str, str]], languages: Sequence[str] = DEFAULT_LANGUAGES
+) -> int:
+    """Write rows to a .stbl file.
+
+    Returns:
+        number of entries
+
+    Raises:
+        ValueError: a language code is longer than 8 bytes, or two rows share a key
+    """
+    for lang in languages:
+        if len(lang.encode("ascii")) > 8:
+            raise ValueError(f"language code too long: {lang}")
+
+    entries: Dict[bytes, Tuple[str, ...]] = {}
+    for row in rows:
+        key = make_key(*((row.get(col) or "") for col in KEY_COLUMNS))
+        if key in entries:
+            raise ValueError(f"duplicate key: {key.decode('utf-8').replace(KEY_SEPARATOR, '/')}")
+        entries[key] = tuple(row.get(lang) or "" for lang in languages)
+
+    keys_blob = _Blob()
+    lang_blobs = [_Blob() for _ in languages]
+    index = bytearray()
+    entry_format = struct.Struct("<I" + "I" * len(languages))
+    for key in sorted(entries):
+        offsets = [blob.add(text.encode("utf-8")) for blob, text in zip(lang_blobs, entries[key])]
+        index += entry_format.pack(keys_blob.add(key), *offsets)
+
+    index_offset = _HEADER.size + _LANGUAGE.size * len(languages)
+    keys_offset = index_offset + len(index)
+    blob_offset = keys_offset + len(keys_blob.data)
+
+    with path.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(languages), len(entries), index_offset, keys_offset))
+        for lang, blob in zip(languages, lang_blobs):
+            f.write(_LANGUAGE.pack(lang.encode("ascii"), blob_offset, len(blob.data)))
+            blob_offset += len(blob.data)
+        f.write(index)
+        f.write(keys_blob.data)
+        for blob in lang_blobs:
+            f.write(blob.data)
+    return len(entries)
+
+
+class StringTable:
+    """Memory-mapped .stbl reader; lookups do not load the file."""
+
+    def __init__(self, path: Path) -> None:
+        self._file = Path(path).open("rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+        magic, version, lang_count, self.count, self._index_offset, self._keys_offset = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not a string table: {path}")
+        if version != VERSION:
+            raise ValueError(f"unsupported string table version: {version}")
+
+        self.languages: List[str] = []
+        self._blob_offsets: List[int] = []
+        for i in range(lang_count):
+            code, offset, _ = _LANGUAGE.unpack_from(self._mm, _HEADER.size + i * _LANGUAGE.size)
+            self.languages.append(code.rstrip(b"\0").decode("ascii"))
+            self._blob_offsets.append(offset)
+        self._entry = struct.Struct("<I" + "I" * lang_count)
+
+    def close(self) -> None:
+        # Views returned by get_bytes() must be released before closing.
+        self._view.release()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "StringTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _read(self, offset: int) -> memoryview:
+        (length,) = _U32.unpack_from(self._mm, offset)
+        return self._view[offset + 4:offset + 4 + length]
+
+    def _entry_at(self, i: int) -> Tuple[int, ...]:
+        return self._entry.unpack_from(self._mm, self._index_offset + i * self._entry.size)
+
+    def _find(self, key: bytes) -> Optional[Tuple[int, ...]]:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._entry_at(mid)
+            offset = self._keys_offset + entry[0]
+            (length,) = _U32.unpack_from(self._mm, offset)
+            mid_key = self._mm[offset + 4:offset + 4 + length]
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return entry
+        return None
+
+    def get_bytes(self, key: Tuple[str, str, str, str], lang: str) -> Optional[memoryview]:
+        """Zero-copy UTF-8 view of one string, or None if the key is absent."""
+        entry = self._find(make_key(*key))
+        if entry is None:
+            return None
+        i = self.languages.index(lang)
+        return self._read(self._blob_offsets[i] + entry[1 + i])
+
+    def get(self, key: Tuple[str, str, str, str], lang: str) -> Optional[str]:
+        value = self.get_bytes(key, lang)
+        return None if value is None else str(value, "utf-8")
+
+    def lookup(self, key: Tuple[str, str, str, str]) -> Optional[Dict[str, str]]:
+        """All languages for one key."""
+        entry = self._find(make_key(*key))
+        if entry is None:
+            return None
+        return {
+            lang: str(self._read(self._blob_offsets[i] + entry[1 + i]), "utf-8")
+            for i, lang in enumerate(self.languages)
+        }
+
+    def items(self) -> Iterator[Tuple[Tuple[str, ...], Dict[str, str]]]:
+        """All entries in key order."""
+        for n in range(self.count):
+            entry = self._entry_at(n)
+            key = tuple(str(self._read(self._keys_offset + entry[0]), "utf-8").split(KEY_SEPARATOR))
+            yield key, {
+                lang: str(self._read(self._blob_offsets[i] + entry[1 + i]), "utf-8")
+                for i, lang in enumerate(self.languages)
+            }
+
+
+def verify(table_path: Path, csv_path: Path, encoding: str = "utf-8-sig") -> List[str]:
+    """Compare a .stbl file with its source CSV; returns a list of differences."""
+    problems: List[str] = []
+    with StringTable(table_path) as table, open_text(csv_path, "r", encoding=encoding, newline="") as f:
+        rows = 0
+        for row in csv.DictReader(f):
+            rows += 1
+            key = tuple((row.get(col) or "") for col in KEY_COLUMNS)
+            found = table.lookup(key)
+            if found is None:
+                problems.append(f"missing: {'/'.join(key)}")
+                continue
+            for lang in table.languages:
+                if found[lang] != (row.get(lang) or ""):
+                    problems.append(f"mismatch: {'/'.join(key)} {lang}")
+        if rows != len(table):
+            problems.append(f"entry count: csv={rows} table={len(table)}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read / verify a binary string table (.stbl).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    get_parser = sub.add_parser("get", help="查询一条文本")
+    get_parser.add_argument("table", help=".stbl 文件路径")
+    get_parser.add_argument("key", nargs=4, metavar=("Table", "Sheet", "Field", "Position"))
+    get_parser.add_argument("--lang", help="只输出指定语言（默认: 全部）")
+
+    verify_parser = sub.add_parser("verify", help="与源CSV逐行比对")
+    verify_parser.add_argument("table", help=".stbl 文件路径")
+    verify_parser.add_argument("csv", help="源CSV文件路径")
+    verify_parser.add_argument("--encoding", default="utf-8-sig", help="CSV编码（默认: utf-8-sig）")
+
+    args = parser.parse_args()
+
+    if args.command == "get":
+        with StringTable(Path(args.table)) as table:
+            found = table.lookup(tuple(args.key))
+            if found is None:
+                raise SystemExit("未找到")
+            for lang, text in found.items():
+                if args.lang in (None, lang):
+                    print(f"{lang}: {text}")
+    else:
+        problems = verify(Path(args.table), Path(args.csv), encoding=args.encoding)
+        for line in problems[:50]:
+            print(line)
+        if problems:
+            raise SystemExit(f"不一致: {len(problems)} 处")
+        print("OK: 与CSV完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试批量任务模式（submit -> status -> collect）
+
+使用本地模拟的 Batch API 服务，不需要网络和API Key:
+    python test_batch_job.py
+"""
+
+import os
+import sys
+import csv
+import gzip
+import json
+import tempfile
+import threading
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import batch_job
+
+
+class FakeBatchAPI(BaseHTTPRequestHandler):
+    """模拟 OpenAI Batch API：上传后立即完成，译文为 "[语言]原文" """
+
+    files = {}
+    batches = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/files":
+            # 取出 multipart 中的文件内容
+            boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+            part = [p for p in body.split(b"--" + boundary) if b'name="file"' in p][0]
+            content = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = content
+            self._send_json({"id": file_id})
+        elif self.path == "/batches":
+            data = json.loads(body)
+            lines = []
+            for line in self.files[data["input_file_id"]].decode("utf-8").splitlines():
+                request = json.loads(line)
+                text = request["body"]["messages"][-1]["content"]
+                lang = "越南语" if "越南语" in request["body"]["messages"][0]["content"] else "泰语"
+                lines.append(json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200,
+                                 "body": {"choices": [{"message": {"content": f"[{lang}]{text}"}}]}},
+                    "error": None,
+                }, ensure_ascii=False))
+            output_id = f"file-{len(self.files)}"
+            self.files[output_id] = "\n".join(lines).encode("utf-8")
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {"id": batch_id, "status": "completed", "output_file_id": output_id,
+                                      "request_counts": {"total": len(lines), "completed": len(lines), "failed": 0}}
+            self._send_json(self.batches[batch_id])
+
+    def do_GET(self):
+        if self.path.startswith("/batches/"):
+            self._send_json(self.batches[self.path.split("/")[-1]])
+        elif self.path.endswith("/content"):
+            content = self.files[self.path.split("/")[2]]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+
+def test_batch_round_trip():
+    """提交、查询、收集，检查结果按行写回且颜色标签被还原"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBatchAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "input.csv")
+        output_file = os.path.join(tmp, "output.csv")
+        with open(input_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Table", "Sheet", "Field", "Position", "ZH", "VN", "TH"])
+            writer.writerow(["item.xlsx", "item", "name", "B2", "屠龙刀", "", ""])
+            writer.writerow(["item.xlsx", "item", "name", "B3", "打狗棒", "Đả Cẩu Bổng", ""])
+            writer.writerow(["skill.xlsx", "skill", "des", "C2", "<color=#ffa500>史诗诡术</color>", "", ""])
+
+        manifest = batch_job.submit(input_file, output_file, api_type="deepseek",
+                                    api_key="test", api_endpoint=endpoint)
+        assert manifest["requests"] == 5
+
+        # 模拟另一个进程：只依赖任务清单
+        assert batch_job.status(manifest["manifest"], api_key="test")["status"] == "completed"
+        stats = batch_job.collect(manifest["manifest"], api_key="test")
+        assert stats["translated_th"] == 3 and stats["translated_vn"] == 2 and stats["errors"] == 0
+
+        with open(output_file, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["TH"] == "[泰语]屠龙刀"
+        assert rows[1]["VN"] == "Đả Cẩu Bổng"
+        assert rows[2]["VN"].startswith("<color=#ffa500>[越南语]") and rows[2]["VN"].endswith("</color>")
+
+    server.shutdown()
+    print("✅ 批量任务测试通过")
+
+
+def test_submit_without_sdk():
+    """默认的 openai 类型提交批量任务时不导入 openai 包"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBatchAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "input.csv")
+        with open(input_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Table", "Sheet", "ZH", "VN", "TH"])
+            writer.writerow(["item.xlsx", "item", "屠龙刀", "", ""])
+
+        # 模拟没有安装 openai 包；退出时恢复 sys.modules 原来的状态
+        with mock.patch.dict(sys.modules, {"openai": None}):
+            manifest = batch_job.submit(input_file, os.path.join(tmp, "output.csv"),
+                                        api_key="test", api_endpoint=endpoint)
+        assert manifest["api_type"] == "openai" and manifest["requests"] == 2
+
+    server.shutdown()
+    print("✅ 未安装 openai 包时批量提交测试通过")
+
+
+def test_default_output_compressed():
+    """未指定输出时，x.csv.gz 的结果写到 x_translated.csv.gz"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBatchAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "input.csv.gz")
+        with gzip.open(input_file, "wt", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Table", "Sheet", "ZH", "VN", "TH"])
+            writer.writerow(["item.xlsx", "item", "屠龙刀", "", ""])
+
+        manifest = batch_job.submit(input_file, api_type="deepseek", api_key="test", api_endpoint=endpoint)
+        assert manifest["output"] == os.path.join(os.path.realpath(tmp), "input_translated.csv.gz")
+        batch_job.collect(manifest["manifest"], api_key="test")
+        with gzip.open(manifest["output"], "rt", encoding="utf-8-sig", newline="") as f:
+            assert next(csv.DictReader(f))["TH"] == "[泰语]屠龙刀"
+
+    server.shutdown()
+    print("✅ 压缩输入的默认输出文件名测试通过")
+
+
+if __name__ == "__main__":
+    test_batch_round_trip()
+    test_submit_without_sdk()
+    test_default_output_compressed()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试增量检测（--incremental）的报告与全量检测一致
+
+不需要网络:
+    python test_check_csv_json_unsafe.py
+"""
+
+import os
+import sys
+import csv
+import subprocess
+import tempfile
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def write_csv(path, header):
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerow(["item.xlsx", "item", "name", '带"引号"的文本', ""])
+        writer.writerow(["item.xlsx", "item", "des", "第一行\n第二行", ""])
+        writer.writerow(["item.xlsx", "item", "des", "普通文本", ""])
+
+
+def scan(input_file, report, *extra):
+    subprocess.run([sys.executable, os.path.join(TOOLS_DIR, "check_csv_json_unsafe.py"),
+                    input_file, "-o", report, *extra], check=True, stdout=subprocess.DEVNULL)
+    with open(report, "r", encoding="utf-8-sig", newline="") as f:
+        return f.read()
+
+
+def test_header_rename():
+    """表头改名、数据不变时，增量检测不能沿用旧列名的结果"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "input.csv")
+        write_csv(input_file, ["Table", "Sheet", "Field", "ZH", "VN"])
+        scan(input_file, os.path.join(tmp, "inc.csv"), "--incremental")
+
+        write_csv(input_file, ["Table", "Sheet", "Field", "CN", "VN"])
+        incremental = scan(input_file, os.path.join(tmp, "inc.csv"), "--incremental")
+        full = scan(input_file, os.path.join(tmp, "full.csv"))
+        assert "CN" in full and incremental == full, incremental
+    print("✅ 增量检测表头改名测试通过")
+
+
+if __name__ == "__main__":
+    test_header_rename()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试按 Table 分片输出（--shard-by）
+
+不需要网络:
+    python test_csv_to_json.py
+"""
+
+import os
+import sys
+import gzip
+import json
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compressed_io import open_text
+from csv_to_json import write_sharded
+
+TABLES = 20
+
+
+def make_rows() -> list:
+    """各个 Table 的行交错出现"""
+    return [{"Table": f"t{n % TABLES}.xlsx", "ZH": f"文本{n}"} for n in range(TABLES * 5)]
+
+
+def test_sharded_bounded_open_files():
+    """同时打开的分片文件数有上限，交错输入的结果与不限制时逐字节相同"""
+    rows = make_rows()
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("json", "ndjson"):
+            unbounded = Path(tmp) / f"unbounded_{fmt}"
+            bounded = Path(tmp) / f"bounded_{fmt}"
+            assert write_sharded(unbounded, rows, "Table", "input.csv", fmt=fmt, max_open=TABLES) == len(rows)
+            assert write_sharded(bounded, rows, "Table", "input.csv", fmt=fmt, max_open=3) == len(rows)
+            names = sorted(p.name for p in unbounded.iterdir())
+            assert names == sorted(p.name for p in bounded.iterdir())
+            for name in names:
+                assert (unbounded / name).read_bytes() == (bounded / name).read_bytes(), name
+
+        with open(Path(tmp) / "bounded_json" / "t3.xlsx.json", encoding="utf-8") as f:
+            assert [row["ZH"] for row in json.load(f)] == [f"文本{n}" for n in range(3, TABLES * 5, TABLES)]
+
+    print("✅ 分片输出测试通过")
+
+
+def test_gzip_append():
+    """追加写入 .gz 会多出一个 gzip 成员，读出来仍是完整的内容"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "out.json.gz"
+        with open_text(path, "w", encoding="utf-8") as f:
+            f.write("前半")
+        with open_text(path, "a", encoding="utf-8") as f:
+            f.write("后半")
+        with open_text(path, "r", encoding="utf-8") as f:
+            assert f.read() == "前半后半"
+        assert gzip.decompress(path.read_bytes()).decode("utf-8") == "前半后半"
+
+    print("✅ 压缩文件追加测试通过")
+
+
+if __name__ == "__main__":
+    test_sharded_bounded_open_files()
+    test_gzip_append()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试二进制字符串表（CSV -> .stbl -> 逐行查询）
+
+不需要网络:
+    python test_string_table.py
+"""
+
+import os
+import sys
+import csv
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from csv_to_json import iter_csv_rows
+from string_table import StringTable, write_string_table, verify
+
+
+def test_round_trip():
+    """写出后每个键都能查到与CSV相同的文本，缺失的键返回None"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = Path(tmp) / "input.csv"
+        table_file = Path(tmp) / "input.stbl"
+        with open(input_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Table", "Sheet", "Field", "Position", "ZH", "VN", "TH"])
+            writer.writerow(["item.xlsx", "item", "name", "B2", "屠龙刀", "Đồ Long Đao", "ดาบมังกร"])
+            writer.writerow(["item.xlsx", "item", "name", "B3", "打狗棒", "", ""])
+            writer.writerow(["skill.xlsx", "skill", "des", "C2", "<color=#ffa500>史诗\n诡术</color>", "\"x\"", ""])
+            # 相同文本只存一份
+            writer.writerow(["skill.xlsx", "skill", "des", "C3", "屠龙刀", "Đồ Long Đao", "ดาบมังกร"])
+
+        assert write_string_table(table_file, iter_csv_rows(input_file)) == 4
+        assert verify(table_file, input_file) == []
+
+        with StringTable(table_file) as table:
+            assert table.languages == ["ZH", "TH", "VN"]
+            assert table.get(("item.xlsx", "item", "name", "B2"), "VN") == "Đồ Long Đao"
+            assert table.lookup(("skill.xlsx", "skill", "des", "C2"))["ZH"] == "<color=#ffa500>史诗\n诡术</color>"
+            assert table.get(("item.xlsx", "item", "name", "B3"), "TH") == ""
+            assert table.lookup(("item.xlsx", "item", "name", "B9")) is None
+            assert [key for key, _ in table.items()] == sorted(key for key, _ in table.items())
+            value = table.get_bytes(("item.xlsx", "item", "name", "B2"), "ZH")
+            assert bytes(value) == "屠龙刀".encode("utf-8")
+            value.release()
+
+        # 重复的键
+        with open(input_file, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(["item.xlsx", "item", "name", "B2", "重复", "", ""])
+        try:
+            write_string_table(table_file, iter_csv_rows(input_file))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("重复的键应当报错")
+
+    print("✅ 字符串表测试通过")
+
+
+if __name__ == "__main__":
+    test_round_trip()
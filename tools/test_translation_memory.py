@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试翻译记忆的持久化（保存 -> 重新加载 -> 命中）
+
+不需要网络和API Key:
+    python test_translation_memory.py
+"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from translate_server import TranslationMemory
+
+
+def test_round_trip():
+    """没有上下文、上下文为 (None, None)、有 Table/Sheet 的条目重新加载后都能命中"""
+    keys = [
+        ("google-free", "你好", "th", None),
+        ("deepseek", "你好", "th", (None, None)),
+        ("deepseek", "你好", "vi", ("item.xlsx", None)),
+        ("deepseek", "屠龙刀", "th", ("item.xlsx", "item")),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory.json")
+        memory = TranslationMemory(path)
+        for n, key in enumerate(keys):
+            memory.put(key, f"译文{n}")
+        memory.save()
+
+        reloaded = TranslationMemory(path)
+        for n, key in enumerate(keys):
+            assert reloaded.get(key) == f"译文{n}", key
+        assert reloaded.stats()["entries"] == len(keys)
+    print("✅ 翻译记忆持久化测试通过")
+
+
+if __name__ == "__main__":
+    test_round_trip()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试分布式队列的认领：多个进程同时认领同一个队列目录，每个单元只被处理一次
+
+不需要网络和API Key（翻译用记录上下文的假翻译器代替）:
+    python test_work_queue.py
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import tempfile
+import multiprocessing
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from work_queue import WorkQueue
+
+PROCESSES = 8
+LEASE_SECONDS = 60
+
+
+def make_queue(tmp: str, units: int) -> WorkQueue:
+    input_file = os.path.join(tmp, "input.csv")
+    with open(input_file, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Key", "Table", "ZH", "TH", "VN"])
+        for n in range(units * 2):
+            writer.writerow([n, f"T{n // 2}", f"文本{n}", "", ""])
+    queue = WorkQueue(os.path.join(tmp, "queue"))
+    queue.plan(input_file, by="table", lease_seconds=LEASE_SECONDS)
+    return queue
+
+
+def worker(queue_dir: str, worker_id: str, start, log_path: str):
+    """认领直到没有可认领的单元，把认领到的单元记录到 log_path"""
+    queue = WorkQueue(queue_dir)
+    start.wait()
+    claimed = []
+    while True:
+        unit = queue.claim(worker_id, LEASE_SECONDS)
+        if unit is None:
+            break
+        claimed.append(unit["id"])
+        queue.renew(unit["id"], worker_id, LEASE_SECONDS)
+        queue.complete(unit["id"], worker_id, [])
+    with open(log_path, "w", encoding="utf-8") as f:
+        json.dump(claimed, f)
+
+
+def run_workers(queue: WorkQueue, tmp: str) -> list:
+    """启动 PROCESSES 个进程同时认领，返回所有被认领的单元（含重复）"""
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    logs = [os.path.join(tmp, f"claimed_{n}.json") for n in range(PROCESSES)]
+    processes = [ctx.Process(target=worker, args=(str(queue.root), f"w{n}", start, logs[n]))
+                 for n in range(PROCESSES)]
+    for p in processes:
+        p.start()
+    time.sleep(0.5)
+    start.set()
+    for p in processes:
+        p.join(60)
+        assert p.exitcode == 0, p.exitcode
+    claimed = []
+    for path in logs:
+        with open(path, encoding="utf-8") as f:
+            claimed.extend(json.load(f))
+    return claimed
+
+
+def test_concurrent_claim():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(tmp, units=40)
+        claimed = run_workers(queue, tmp)
+        assert sorted(claimed) == queue.unit_ids(), "有单元被重复认领或遗漏"
+        assert queue.status()["done"] == 40
+
+
+def test_concurrent_takeover():
+    """所有单元的租约都已过期（原 worker 崩溃），多个进程同时接手"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(tmp, units=40)
+        for unit_id in queue.unit_ids():
+            with open(queue.leases_dir / f"{unit_id}.lease", "w", encoding="utf-8") as f:
+                json.dump({"worker": "crashed", "expires_at": time.time() - 1}, f)
+        claimed = run_workers(queue, tmp)
+        assert sorted(claimed) == queue.unit_ids(), "过期租约被多个 worker 同时接手"
+
+
+def test_renew_after_takeover():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(tmp, units=1)
+        unit = queue.claim("a", lease_seconds=0)
+        assert queue.claim("b", LEASE_SECONDS)["id"] == unit["id"]
+        assert not queue.renew(unit["id"], "a", LEASE_SECONDS), "旧 worker 续约覆盖了新租约"
+        assert queue.renew(unit["id"], "b", LEASE_SECONDS)
+
+
+def test_stale_lock():
+    """崩溃的 worker 留下的单元锁过期后会被清除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(tmp, units=1)
+        unit_id = queue.unit_ids()[0]
+        lock_path = queue.leases_dir / f"{unit_id}.lock"
+        lock_path.touch()
+        assert queue.claim("a", LEASE_SECONDS) is None
+        old = time.time() - 3600
+        os.utime(lock_path, (old, old))
+        assert queue.claim("a", LEASE_SECONDS)["id"] == unit_id
+        assert not lock_path.exists()
+
+
+class RecordingTranslator:
+    """记录每次翻译收到的上下文"""
+
+    def __init__(self):
+        self.contexts = {}
+
+    def translate_text(self, text, target_lang, context=None):
+        self.contexts[(text, target_lang)] = context
+        return f"{target_lang}:{text}"
+
+
+def test_worker_context():
+    """worker 翻译时带上所在行的 Table/Sheet/Field，与单机翻译一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = make_queue(tmp, units=2)
+        translator = RecordingTranslator()
+        stats = queue.run_worker(translator, worker_id="w", delay=0)
+        assert stats["translated"] == 8
+        assert translator.contexts[("文本3", "th")] == {"Table": "T1"}
+        merged = os.path.join(tmp, "output.csv")
+        queue.merge(merged)
+        with open(merged, encoding="utf-8-sig", newline="") as f:
+            assert next(csv.DictReader(f))["TH"] == "th:文本0"
+
+
+if __name__ == "__main__":
+    test_concurrent_claim()
+    test_concurrent_takeover()
+    test_renew_after_takeover()
+    test_stale_lock()
+    test_worker_context()
+    print("OK")
@@ -8,40 +8,28 @@ CSV翻译工具 - 将ZH列翻译成TH（泰语）和VN（越南语）
     python translate_csv.py input.csv --no-th  # 只翻译VN
     python translate_csv.py input.csv --force  # 强制重新翻译
     python translate_csv.py input.csv --api-type google-cloud --api-key YOUR_KEY
+    python translate_csv.py --watch ../CSV  # 监视目录，自动翻译新的提取文件
+    python translate_csv.py batch submit input.csv --api-type openai  # 批量任务（见 batch_job.py）
 """
 
 import csv
 import os
 import re
+import sys
+import signal
 import time
 import json
 import argparse
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, Callable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from cancellation import CancelToken, CancelledError
+from compressed_io import open_text, split_compression_suffix
+import providers
+from singleflight import SingleFlight
 
-# 翻译库导入
-DEEP_TRANSLATOR_AVAILABLE = False
-GOOGLE_CLOUD_AVAILABLE = False
-OPENAI_AVAILABLE = False
-
-try:
-    from deep_translator import GoogleTranslator
-    DEEP_TRANSLATOR_AVAILABLE = True
-except ImportError:
-    pass
-
-try:
-    from google.cloud import translate_v2 as google_translate
-    GOOGLE_CLOUD_AVAILABLE = True
-except ImportError:
-    pass
-
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    pass
+# 翻译库（deep_translator、openai 等）在使用对应API时才导入，见 providers.py
 
 
 # 配置文件路径
@@ -78,29 +66,80 @@ class CSVTranslator:
         "openai": "OpenAI GPT翻译(需API Key)",
         "deepseek": "DeepSeek翻译(需API Key，推荐)",
         "deepl": "DeepL翻译(需API Key)",
+        "pool": "多API Key负载均衡(api_config.json中的pool)",
+        "routing": "按规则分流(api_config.json中的routing)",
+        "local": "本地离线模型(api_config.json中的local)",
+    }
+    
+    # 大模型API使用的模型
+    LLM_MODELS = {
+        "openai": "gpt-3.5-turbo",
+        "deepseek": "deepseek-chat",
+    }
+    
+    # 请求中带有 Table/Sheet 上下文的API类型（pool的后端可能是大模型）
+    CONTEXT_API_TYPES = ("openai", "deepseek", "pool")
+    
+    # 合并请求时，超过该字符数的文本仍单独请求
+    LLM_BATCH_MAX_CHARS = 200
+    
+    # 大模型API的默认端点
+    LLM_ENDPOINTS = {
+        "openai": "https://api.openai.com/v1",
+        "deepseek": "https://api.deepseek.com",
     }
     
     def __init__(self, api_type: str = "google-free", api_key: Optional[str] = None, 
-                 api_endpoint: Optional[str] = None):
+                 api_endpoint: Optional[str] = None, api_config: Optional[Dict[str, Any]] = None,
+                 request_timeout: float = 60.0, hedge_budget: float = 0.0,
+                 hedge_delay: Optional[float] = None):
         """
         初始化翻译器
         
         Args:
-            api_type: API类型 ("google-free", "google-cloud", "openai", "deepl")
+            api_type: API类型 ("google-free", "google-cloud", "openai", "deepl", "pool", "routing", "local")
             api_key: API密钥
             api_endpoint: 自定义API端点（用于OpenAI兼容的API）
+            api_config: API配置（pool/routing/local类型及术语表使用，默认读取api_config.json）
+            request_timeout: 单次请求超时（秒）
+            hedge_budget: 对冲请求预算（额外请求占比，0表示不启用对冲）
+            hedge_delay: 对冲阈值（秒），默认使用最近请求耗时的p95
         """
         self.api_type = api_type
         self.api_key = api_key
         self.api_endpoint = api_endpoint
+        self.api_config = api_config if api_config is not None else load_api_config()
+        self.pool = None
+        self.router = None
+        self.request_timeout = request_timeout
+        
+        # 大模型的系统提示词（按语言缓存，保证每次请求的前缀完全相同，便于服务端缓存）
+        self._system_prompts: Dict[tuple, str] = {}
+        self._glossary: Optional[Dict[str, Dict[str, str]]] = None
+        
+        # Token用量统计（cached_tokens为命中服务端前缀缓存的token数）
+        self.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        self._usage_lock = threading.Lock()
+        
+        # OpenAI兼容客户端（首次请求时创建，线程间共享）
+        self._llm_client = None
+        
+        # 翻译记忆（可选，需提供 get(key)/put(key, value)，常驻服务会设置）
+        self.memory = None
         
-        # 验证依赖
-        if api_type == "google-free" and not DEEP_TRANSLATOR_AVAILABLE:
-            raise ImportError("请安装 deep-translator: pip install deep-translator")
-        elif api_type == "google-cloud" and not GOOGLE_CLOUD_AVAILABLE:
-            raise ImportError("请安装 google-cloud-translate: pip install google-cloud-translate")
-        elif api_type == "openai" and not OPENAI_AVAILABLE:
-            raise ImportError("请安装 openai: pip install openai")
+        # 合并相同的进行中请求（多个线程同时翻译同一文本时只请求一次）
+        self.single_flight = SingleFlight()
+        
+        # 对冲请求
+        self.hedger = None
+        if hedge_budget > 0:
+            from hedging import Hedger
+            self.hedger = Hedger(budget=hedge_budget, delay=hedge_delay)
+        
+        # 验证依赖（只检查所选API）；大模型和 DeepL 在首次请求时才检查和导入，
+        # 批量任务模式只用HTTP上传和查询，不需要 openai 包
+        if api_type not in self.LLM_MODELS and api_type != "deepl":
+            providers.require(api_type)
         
         # 并发设置
         self.max_workers = 5
@@ -113,67 +152,367 @@ class CSVTranslator:
         if self.api_type == "google-cloud" and self.api_key:
             # 设置Google Cloud认证
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = self.api_key
-        elif self.api_type == "openai" and self.api_key:
-            # 配置OpenAI
-            openai.api_key = self.api_key
-            if self.api_endpoint:
-                openai.api_base = self.api_endpoint
+        elif self.api_type == "pool":
+            from provider_pool import ProviderPool
+            if not self.api_config.get("pool"):
+                raise ValueError("api_config.json 中没有配置 pool")
+            self.pool = ProviderPool.from_config(self.api_config["pool"], self._create_sub_translator)
+        elif self.api_type == "routing":
+            from routing import RoutingPolicy
+            if not self.api_config.get("routing"):
+                raise ValueError("api_config.json 中没有配置 routing")
+            self.router = RoutingPolicy.from_config(self.api_config["routing"], self._create_sub_translator,
+                                                    glossary=lambda: self._load_glossary().keys())
+        elif self.api_type == "local":
+            if not self.api_config.get("local", {}).get("models"):
+                raise ValueError("api_config.json 中没有配置 local.models")
+    
+    def _create_sub_translator(self, api_type: str, api_key: Optional[str] = None,
+                               api_endpoint: Optional[str] = None) -> "CSVTranslator":
+        """创建pool/routing使用的子翻译器，未指定的Key和端点从api_config中对应类型读取"""
+        section = self.api_config.get(api_type, {})
+        return CSVTranslator(
+            api_type=api_type,
+            api_key=api_key or section.get("api_key"),
+            api_endpoint=api_endpoint or section.get("endpoint") or None,
+            api_config=self.api_config,
+            request_timeout=self.request_timeout
+        )
+    
+    def _call_with_deadline(self, fn: Callable, *args, cancel: Optional[CancelToken] = None):
+        """
+        在后台线程中执行阻塞的请求，工作线程不会被卡住:
+        超过 request_timeout 时抛出 TimeoutError（deep_translator、google-cloud-translate 没有超时参数），
+        取消后超过 cancel.grace 时抛出 CancelledError。
+        请求本身无法中断，返回后结果被丢弃
+        """
+        result = {}
+        done = threading.Event()
+        
+        def run():
+            try:
+                result["value"] = fn(*args)
+            except BaseException as e:
+                result["error"] = e
+            done.set()
+        
+        threading.Thread(target=run, daemon=True, name="request").start()
+        deadline = time.monotonic() + self.request_timeout
+        while not done.wait(self.request_timeout if cancel is None else 0.05):
+            if cancel is not None and cancel.remaining() == 0:
+                raise CancelledError(cancel.reason)
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"请求超时（{self.request_timeout}秒）")
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+    
+    def _request_timeout(self, cancel: Optional[CancelToken] = None) -> float:
+        """请求的超时时间：request_timeout，取消后不超过剩余的等待时间"""
+        remaining = cancel.remaining() if cancel is not None else None
+        if remaining is None:
+            return self.request_timeout
+        if remaining == 0:
+            raise CancelledError(cancel.reason)
+        return min(self.request_timeout, remaining)
     
     def _create_translator(self, target_lang: str):
         """为指定语言创建翻译器实例（线程安全）"""
         if self.api_type == "google-free":
-            return GoogleTranslator(source='zh-CN', target=target_lang)
+            return providers.load("deep_translator").GoogleTranslator(source='zh-CN', target=target_lang)
         return None
     
-    def _translate_with_google_cloud(self, text: str, target_lang: str) -> str:
+    def _translate_with_google_cloud(self, text: str, target_lang: str,
+                                     cancel: Optional[CancelToken] = None) -> str:
         """使用Google Cloud Translation API翻译"""
-        client = google_translate.Client()
+        translate_v2 = providers.load("google.cloud.translate_v2")
         # 语言代码映射
         lang_map = {"th": "th", "vi": "vi"}
-        result = client.translate(text, target_language=lang_map.get(target_lang, target_lang), source_language='zh-CN')
+        # 创建客户端时可能需要获取认证信息，同样计入超时
+        result = self._call_with_deadline(
+            lambda: translate_v2.Client().translate(text, target_language=lang_map.get(target_lang, target_lang), source_language='zh-CN'),
+            cancel=cancel)
         return result['translatedText']
     
-    def _translate_with_openai(self, text: str, target_lang: str) -> str:
-        """使用OpenAI API翻译"""
+    def _load_glossary(self) -> Dict[str, Dict[str, str]]:
+        """
+        加载术语表（api_config.json 中的 glossary）
+        
+        可以是 {"中文": {"th": "泰语", "vi": "越南语"}} 形式的字典，
+        也可以是包含 ZH/TH/VN 列的CSV文件路径（相对路径以配置文件所在目录为准）
+        """
+        if self._glossary is not None:
+            return self._glossary
+        
+        glossary_config = self.api_config.get("glossary") or {}
+        glossary: Dict[str, Dict[str, str]] = {}
+        if isinstance(glossary_config, str):
+            glossary_path = Path(glossary_config)
+            if not glossary_path.is_absolute():
+                glossary_path = CONFIG_FILE.parent / glossary_path
+            _, rows = self.read_csv(str(glossary_path))
+            for row in rows:
+                zh_text = (row.get("ZH") or "").strip()
+                if zh_text:
+                    glossary[zh_text] = {"th": row.get("TH") or "", "vi": row.get("VN") or ""}
+        else:
+            glossary = dict(glossary_config)
+        
+        self._glossary = glossary
+        return glossary
+    
+    def _system_prompt(self, target_lang: str) -> str:
+        """
+        大模型的系统提示词（说明 + 可选术语表）
+        
+        同一语言的提示词在进程内只生成一次，每次请求的前缀逐字节相同，
+        可以命中服务端的前缀缓存（更便宜、首字更快）
+        """
+        key = (self.api_type, target_lang)
+        prompt = self._system_prompts.get(key)
+        if prompt is not None:
+            return prompt
+        
         lang_names = {"th": "泰语", "vi": "越南语"}
         target_name = lang_names.get(target_lang, target_lang)
+        if self.api_type == "deepseek":
+            prompt = f"你是一个专业的游戏本地化翻译助手。请将用户提供的中文文本翻译成{target_name}。只返回翻译结果，不要解释。保留所有HTML标签和特殊格式如<color=#xxx>。"
+        else:
+            prompt = f"你是一个专业的翻译助手。请将用户提供的中文文本翻译成{target_name}。只返回翻译结果，不要解释。保留所有HTML标签和特殊格式。"
         
-        # 使用新版OpenAI API
-        client = openai.OpenAI(api_key=self.api_key, base_url=self.api_endpoint) if self.api_endpoint else openai.OpenAI(api_key=self.api_key)
+        # 术语表按原文排序，保证内容稳定
+        terms = [(zh, item.get(target_lang, "")) for zh, item in sorted(self._load_glossary().items())]
+        terms = [(zh, tr) for zh, tr in terms if tr]
+        if terms:
+            prompt += "\n\n术语表（遇到以下词语时必须使用对应译文）:\n"
+            prompt += "\n".join(f"{zh} => {tr}" for zh, tr in terms)
         
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": f"你是一个专业的翻译助手。请将用户提供的中文文本翻译成{target_name}。只返回翻译结果，不要解释。保留所有HTML标签和特殊格式。"},
-                {"role": "user", "content": text}
-            ],
-            temperature=0.3
-        )
+        self._system_prompts[key] = prompt
+        return prompt
+    
+    def _build_messages(self, text: str, target_lang: str,
+                        context: Optional[Dict[str, str]] = None) -> list:
+        """
+        构造大模型请求消息
+        
+        顺序为 静态提示词 -> 所在表的上下文 -> 待翻译文本，
+        同一个 Table/Sheet 的连续请求共享更长的可缓存前缀
+        """
+        messages = [{"role": "system", "content": self._system_prompt(target_lang)}]
+        if context and (context.get("Table") or context.get("Sheet")):
+            messages.append({
+                "role": "system",
+                "content": f"文本来源: 表 {context.get('Table') or '-'}，工作表 {context.get('Sheet') or '-'}"
+            })
+        messages.append({"role": "user", "content": text})
+        return messages
+    
+    def _record_usage(self, usage):
+        """累计Token用量，兼容DeepSeek(prompt_cache_hit_tokens)和OpenAI(prompt_tokens_details.cached_tokens)"""
+        if usage is None:
+            return
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+        if cached is None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached = getattr(details, "cached_tokens", None) if details is not None else None
+        with self._usage_lock:
+            self.usage["requests"] += 1
+            self.usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self.usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+            self.usage["cached_tokens"] += cached or 0
+    
+    def _counters(self) -> Dict[str, Any]:
+        """翻译器生命周期内累计的各项计数（后端、对冲、合并请求、分流、Token用量）"""
+        return {
+            "backends": self.pool.stats() if self.pool is not None else None,
+            "hedging": self.hedger.stats() if self.hedger is not None else None,
+            "coalesced": self.single_flight.coalesced,
+            "routes": self.router.stats() if self.router is not None else None,
+            "usage": self.usage_stats(),
+        }
+    
+    def usage_stats(self) -> Dict[str, int]:
+        """Token用量统计（包含pool/routing的子翻译器）"""
+        translators = [self]
+        if self.pool is not None:
+            translators += [backend.translator for backend in self.pool.backends]
+        if self.router is not None:
+            translators += list(self.router.routes.values())
+        
+        total = {key: 0 for key in self.usage}
+        for translator in translators:
+            if translator is not self and translator.api_type in ("pool", "routing"):
+                sub_usage = translator.usage_stats()
+            else:
+                with translator._usage_lock:
+                    sub_usage = dict(translator.usage)
+            for key in total:
+                total[key] += sub_usage.get(key, 0)
+        return total
+    
+    def _create_llm_client(self):
+        """获取OpenAI兼容的客户端（OpenAI / DeepSeek），只创建一次，复用连接"""
+        if self._llm_client is None:
+            openai = providers.load("openai")
+            if self.api_type == "deepseek":
+                # DeepSeek API与OpenAI兼容
+                client = openai.OpenAI(api_key=self.api_key, base_url=self.api_endpoint or self.LLM_ENDPOINTS["deepseek"])
+            else:
+                # 使用新版OpenAI API
+                client = openai.OpenAI(api_key=self.api_key, base_url=self.api_endpoint) if self.api_endpoint else openai.OpenAI(api_key=self.api_key)
+            self._llm_client = client
+        return self._llm_client
+    
+    def _translate_with_openai(self, text: str, target_lang: str,
+                               context: Optional[Dict[str, str]] = None,
+                               cancel: Optional[CancelToken] = None) -> str:
+        """使用OpenAI API翻译"""
+        client = self._create_llm_client()
+        
+        timeout = self._request_timeout(cancel)
+        response = self._call_with_deadline(lambda: client.chat.completions.create(
+            model=self.LLM_MODELS["openai"],
+            messages=self._build_messages(text, target_lang, context),
+            temperature=0.3,
+            timeout=timeout
+        ), cancel=cancel)
+        self._record_usage(getattr(response, "usage", None))
         return response.choices[0].message.content.strip()
     
-    def _translate_with_deepseek(self, text: str, target_lang: str) -> str:
+    def _translate_with_deepseek(self, text: str, target_lang: str,
+                                 context: Optional[Dict[str, str]] = None,
+                                 cancel: Optional[CancelToken] = None) -> str:
         """使用DeepSeek API翻译"""
-        lang_names = {"th": "泰语", "vi": "越南语"}
-        target_name = lang_names.get(target_lang, target_lang)
+        client = self._create_llm_client()
         
-        # DeepSeek API与OpenAI兼容
-        base_url = self.api_endpoint or "https://api.deepseek.com"
-        client = openai.OpenAI(api_key=self.api_key, base_url=base_url)
+        timeout = self._request_timeout(cancel)
+        response = self._call_with_deadline(lambda: client.chat.completions.create(
+            model=self.LLM_MODELS["deepseek"],
+            messages=self._build_messages(text, target_lang, context),
+            temperature=0.3,
+            stream=False,
+            timeout=timeout
+        ), cancel=cancel)
+        self._record_usage(getattr(response, "usage", None))
+        return response.choices[0].message.content.strip()
+    
+    # 多条文本合并请求时的输出格式说明（固定内容，放在系统提示词之后，不影响前缀缓存）
+    SEGMENTS_INSTRUCTION = (
+        '用户会提供多行JSON，每行形如 {"i": 编号, "t": "原文"}。请逐条翻译，'
+        '每翻译完一条立即输出一行JSON {"i": 编号, "t": "译文"}，按编号顺序输出，不要输出其它任何内容。'
+    )
+    
+    def translate_segments(self, texts: list, target_lang: str,
+                           context: Optional[Dict[str, str]] = None,
+                           on_result=None, cancel: Optional[CancelToken] = None) -> Dict[int, str]:
+        """
+        一次请求翻译多条文本（仅OpenAI/DeepSeek），流式接收结果
         
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": f"你是一个专业的游戏本地化翻译助手。请将用户提供的中文文本翻译成{target_name}。只返回翻译结果，不要解释。保留所有HTML标签和特殊格式如<color=#xxx>。"},
-                {"role": "user", "content": text}
-            ],
+        每条译文在流中一出现就通过 on_result 回调返回，请求中途失败时
+        已返回的结果仍然有效，调用方只需要重试缺失的编号。
+        
+        Args:
+            texts: 要翻译的文本列表（可含颜色标签）
+            target_lang: 目标语言代码
+            context: 文本所在的CSV行（可选，用作上下文）
+            on_result: 回调 on_result(编号, 译文)
+            cancel: 取消令牌（可选），取消后超过 cancel.grace 时关闭流并抛出 CancelledError
+            
+        Returns:
+            已完成的结果 {编号: 译文}，中途失败时抛出异常（已完成的结果已通过回调返回）
+        """
+        if self.api_type not in self.LLM_MODELS:
+            raise ValueError(f"{self.api_type} 不支持多条文本合并请求")
+        
+        results: Dict[int, str] = {}
+        
+        def emit(i: int, translated: str):
+            results[i] = translated
+            if on_result is not None:
+                on_result(i, translated)
+        
+        # 空文本/只有标签的文本不需要请求
+        segments = {}
+        for i, text in enumerate(texts):
+            pure_text, tags = self._extract_color_tags(text or "")
+            if not pure_text.strip():
+                emit(i, text)
+            else:
+                segments[i] = (pure_text, tags)
+        if not segments:
+            return results
+        
+        messages = self._build_messages(
+            "\n".join(json.dumps({"i": i, "t": pure}, ensure_ascii=False) for i, (pure, _) in segments.items()),
+            target_lang, context)
+        messages.insert(1, {"role": "system", "content": self.SEGMENTS_INSTRUCTION})
+        
+        def parse_line(line: str):
+            line = line.strip()
+            if not line.startswith("{"):
+                return
+            try:
+                item = json.loads(line)
+                i = int(item["i"])
+                translated = str(item["t"]).strip()
+            except (ValueError, KeyError, TypeError):
+                return
+            if i in segments and i not in results:
+                pure_text, tags = segments[i]
+                emit(i, self._restore_color_tags(translated, tags, pure_text))
+        
+        client = self._create_llm_client()
+        stream = client.chat.completions.create(
+            model=self.LLM_MODELS[self.api_type],
+            messages=messages,
             temperature=0.3,
-            stream=False
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=self._request_timeout(cancel)
         )
-        return response.choices[0].message.content.strip()
+        
+        # 增量解析：每收到完整的一行就提交一条结果
+        buffer = ""
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    self._record_usage(chunk.usage)
+                if cancel is not None and cancel.remaining() == 0:
+                    raise CancelledError(cancel.reason)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                buffer += delta
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    parse_line(line)
+            parse_line(buffer)
+        finally:
+            # 提前结束（取消、回调抛出异常）时关闭连接，服务端停止生成
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        
+        return results
+    
+    def _translate_with_local(self, text: str, target_lang: str) -> str:
+        """使用本地离线模型翻译（模型在进程内只加载一次，各线程共享并合并批次推理）"""
+        from local_mt import get_engine
+        
+        local_config = self.api_config["local"]
+        model_dir = local_config["models"].get(target_lang)
+        if not model_dir:
+            raise ValueError(f"local.models 中没有配置 {target_lang} 的模型")
+        # 相对路径以配置文件所在目录为准
+        model_path = Path(model_dir)
+        if not model_path.is_absolute():
+            model_path = CONFIG_FILE.parent / model_path
+        return get_engine(str(model_path), local_config).translate(text)
     
-    def _translate_with_deepl(self, text: str, target_lang: str) -> str:
+    def _translate_with_deepl(self, text: str, target_lang: str,
+                              cancel: Optional[CancelToken] = None) -> str:
         """使用DeepL API翻译"""
-        import requests
+        requests = providers.load("requests")
         
         lang_map = {"th": "TH", "vi": "VI"}  # 注意：DeepL可能不支持这些语言
         
@@ -181,16 +520,18 @@ class CSVTranslator:
         if self.api_endpoint:
             url = self.api_endpoint
         
-        response = requests.post(url, data={
+        timeout = self._request_timeout(cancel)
+        response = self._call_with_deadline(lambda: requests.post(url, data={
             "auth_key": self.api_key,
             "text": text,
             "source_lang": "ZH",
             "target_lang": lang_map.get(target_lang, target_lang.upper())
-        })
+        }, timeout=timeout), cancel=cancel)
         result = response.json()
         return result['translations'][0]['text']
     
-    def _extract_color_tags(self, text: str) -> tuple[str, list[tuple[int, str]]]:
+    @classmethod
+    def _extract_color_tags(cls, text: str) -> tuple[str, list[tuple[int, str]]]:
         """
         提取文本中的颜色标签，返回纯文本和标签位置信息
         
@@ -204,7 +545,7 @@ class CSVTranslator:
         pure_text = ""
         last_end = 0
         
-        for match in self.COLOR_TAG_PATTERN.finditer(text):
+        for match in cls.COLOR_TAG_PATTERN.finditer(text):
             # 添加标签前的文本
             pure_text += text[last_end:match.start()]
             # 记录标签在纯文本中的位置
@@ -216,7 +557,8 @@ class CSVTranslator:
         
         return pure_text, tags
     
-    def _restore_color_tags(self, translated_text: str, original_tags: list[tuple[int, str]], 
+    @staticmethod
+    def _restore_color_tags(translated_text: str, original_tags: list[tuple[int, str]], 
                             original_pure_text: str) -> str:
         """
         将颜色标签还原到翻译后的文本中
@@ -258,13 +600,17 @@ class CSVTranslator:
         
         return result
     
-    def translate_text(self, text: str, target_lang: str) -> str:
+    def translate_text(self, text: str, target_lang: str,
+                       context: Optional[Dict[str, str]] = None,
+                       cancel: Optional[CancelToken] = None) -> str:
         """
         翻译文本，保留颜色标签
         
         Args:
             text: 要翻译的文本
             target_lang: 目标语言代码 ("th" 或 "vi")
+            context: 文本所在的CSV行（可选，routing按Table/Sheet/Field分流时使用）
+            cancel: 取消令牌（可选），取消后超过 cancel.grace 时抛出 CancelledError
             
         Returns:
             翻译后的文本
@@ -279,31 +625,91 @@ class CSVTranslator:
             # 只有标签没有文字
             return text
         
+        if self.api_type not in self.API_TYPES:
+            print(f"不支持的API类型: {self.api_type}")
+            return text
+        
         try:
-            # 根据API类型选择翻译方法
-            if self.api_type == "google-free":
-                translator = self._create_translator(target_lang)
-                translated = translator.translate(pure_text)
-            elif self.api_type == "google-cloud":
-                translated = self._translate_with_google_cloud(pure_text, target_lang)
-            elif self.api_type == "openai":
-                translated = self._translate_with_openai(pure_text, target_lang)
-            elif self.api_type == "deepseek":
-                translated = self._translate_with_deepseek(pure_text, target_lang)
-            elif self.api_type == "deepl":
-                translated = self._translate_with_deepl(pure_text, target_lang)
-            else:
-                print(f"不支持的API类型: {self.api_type}")
-                return text
+            # 按规则分流时，根据原文（含标签）和所在行选择后端
+            translate_plain = self.translate_plain
+            if self.router is not None:
+                translate_plain = self.router.select(text, context).translate_plain
+            
+            # 大模型的请求带有 Table/Sheet 上下文，不同表的相同文本分开请求
+            context_key = None
+            if context and getattr(translate_plain.__self__, "api_type", None) in self.CONTEXT_API_TYPES:
+                context_key = (context.get("Table"), context.get("Sheet"))
+            key = (translate_plain, pure_text, target_lang, context_key)
+            
+            translated = None
+            if self.memory is not None:
+                memory_key = (getattr(translate_plain.__self__, "api_type", self.api_type),
+                              pure_text, target_lang, context_key)
+                translated = self.memory.get(memory_key)
+            
+            if translated is None:
+                if self.hedger is not None:
+                    translated = self.single_flight.do(key, self.hedger.call, translate_plain, pure_text, target_lang, context, cancel, text)
+                else:
+                    translated = self.single_flight.do(key, translate_plain, pure_text, target_lang, context, cancel, text)
+                if self.memory is not None:
+                    self.memory.put(memory_key, translated)
             
             # 还原颜色标签
             return self._restore_color_tags(translated, tags, pure_text)
             
+        except CancelledError:
+            raise
         except Exception as e:
             print(f"翻译失败: {e}, 原文: {text[:50]}...")
             return text
     
-    def needs_translation(self, zh_text: str, target_text: str) -> bool:
+    async def translate_text_async(self, text: str, target_lang: str,
+                                   context: Optional[Dict[str, str]] = None) -> str:
+        """translate_text 的协程版本（在线程池中执行，不阻塞事件循环）"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.translate_text, text, target_lang, context)
+    
+    def translate_plain(self, text: str, target_lang: str,
+                        context: Optional[Dict[str, str]] = None,
+                        cancel: Optional[CancelToken] = None,
+                        original: Optional[str] = None) -> str:
+        """
+        翻译不含颜色标签的纯文本，失败时抛出异常
+        
+        Args:
+            text: 纯文本
+            target_lang: 目标语言代码 ("th" 或 "vi")
+            context: 文本所在的CSV行（可选，大模型用作上下文）
+            cancel: 取消令牌（可选）
+            original: 含颜色标签的原文（可选，routing 按 markup 规则分流时使用，默认为 text）
+            
+        Returns:
+            翻译后的文本
+        """
+        # 根据API类型选择翻译方法
+        if self.api_type == "google-free":
+            translator = self._create_translator(target_lang)
+            return self._call_with_deadline(translator.translate, text, cancel=cancel)
+        elif self.api_type == "google-cloud":
+            return self._translate_with_google_cloud(text, target_lang, cancel)
+        elif self.api_type == "openai":
+            return self._translate_with_openai(text, target_lang, context, cancel)
+        elif self.api_type == "deepseek":
+            return self._translate_with_deepseek(text, target_lang, context, cancel)
+        elif self.api_type == "deepl":
+            return self._translate_with_deepl(text, target_lang, cancel)
+        elif self.api_type == "local":
+            return self._translate_with_local(text, target_lang)
+        elif self.api_type == "pool":
+            return self.pool.translate(text, target_lang, context, cancel, original)
+        elif self.api_type == "routing":
+            return self.router.select(original or text, context).translate_plain(text, target_lang, context, cancel)
+        raise ValueError(f"不支持的API类型: {self.api_type}")
+    
+    @staticmethod
+    def needs_translation(zh_text: str, target_text: str) -> bool:
         """
         判断是否需要翻译
         
@@ -328,7 +734,13 @@ class CSVTranslator:
     def translate_csv(self, input_file: str, output_file: Optional[str] = None,
                       translate_th: bool = True, translate_vn: bool = True,
                       force: bool = False, batch_size: int = 10,
-                      delay: float = 0.5, max_workers: int = 5) -> dict:
+                      delay: float = 0.5, max_workers: int = 5,
+                      schedule: str = "lpt", llm_batch: int = 0,
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      on_event: Optional[Callable[[dict], None]] = None,
+                      event_interval: float = 0.2,
+                      cancel: Optional[CancelToken] = None,
+                      cancel_grace: Optional[float] = None) -> dict:
         """
         翻译CSV文件
         
@@ -341,13 +753,38 @@ class CSVTranslator:
             batch_size: 批处理大小（每处理多少行保存一次）
             delay: 每次翻译后的延迟（秒），避免API限制
             max_workers: 最大并发线程数（默认5，设为1禁用并发）
+            schedule: 任务调度顺序 ("lpt": 长文本优先、短文本打包、各语言轮流;
+                      "context": 同一Table/Sheet的任务连续处理，便于命中大模型前缀缓存;
+                      "row": 按行顺序，llm_batch 大于1时合并同一语言相邻的短文本)
+            llm_batch: 大模型每次请求合并翻译的条数（仅OpenAI/DeepSeek，0表示逐条请求），
+                       结果流式返回，每完成一条立即写入
+            progress_callback: 进度回调 progress_callback(已完成数, 总数)，每完成一条调用一次
+            on_event: 事件回调 on_event(event)，event 为字典，"type" 为:
+                      started(input, output) / planned(total_rows, tasks, workers) /
+                      result(row, column, source, text, completed, total) /
+                      error(row, column, error, completed, total) /
+                      progress(completed, total，按 event_interval 节流，最后一条总是发送) /
+                      saved(path, completed, total, final) / notice(message) /
+                      finished(output, stats, cancelled)
+                      默认在控制台打印。回调在工作线程中调用（持有结果锁），应尽快返回
+            event_interval: progress 事件的最小间隔（秒）
+            cancel: 取消/暂停令牌（见 cancellation.py）；取消后不再开始新的任务，已完成的结果照常保存；
+                    暂停时不开始新的任务，继续后接着翻译
+            cancel_grace: 取消后等待进行中请求的最长时间（秒），超时的请求被放弃，其结果不再写入
+                          （默认使用 cancel.grace）
             
         Returns:
-            翻译统计信息
+            翻译统计信息（取消时包含 "cancelled": True）
         """
+        emit = on_event if on_event is not None else print_event
+        if cancel is not None and cancel_grace is not None:
+            cancel.grace = cancel_grace
+        # 翻译器可能被多次运行复用（常驻服务、监视目录、图形界面），计数器按本次运行的差值报告
+        counters_before = self._counters()
         if output_file is None:
             input_path = Path(input_file)
-            output_file = str(input_path.parent / f"{input_path.stem}_translated{input_path.suffix}")
+            base_path, compression = split_compression_suffix(input_path)
+            output_file = str(input_path.parent / f"{base_path.stem}_translated{base_path.suffix}{compression}")
         
         stats = {
             "total_rows": 0,
@@ -359,17 +796,190 @@ class CSVTranslator:
         }
         
         # 读取CSV
-        print(f"正在读取文件: {input_file}")
-        rows = []
-        with open(input_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                rows.append(row)
+        emit({"type": "started", "input": input_file, "output": output_file})
+        fieldnames, rows = self.read_csv(input_file)
         
         stats["total_rows"] = len(rows)
-        print(f"共读取 {len(rows)} 行数据")
         
+        # 收集需要翻译的任务
+        tasks = self.plan_tasks(fieldnames, rows, translate_th, translate_vn, force, stats)
+        
+        emit({"type": "planned", "total_rows": len(rows), "tasks": len(tasks), "workers": max_workers})
+        
+        # 并发翻译
+        lock = threading.Lock()
+        completed = [0]
+        last_progress = [0.0]
+        # 最终保存之后为 True：被放弃的请求之后才返回的结果不再写入
+        closed = [False]
+        
+        def commit(idx, col, result, error):
+            """写入一条结果（各工作线程完成后立即调用）"""
+            with lock:
+                if closed[0]:
+                    return
+                rows[idx][col] = result
+                completed[0] += 1
+                
+                if error:
+                    stats["errors"] += 1
+                    emit({"type": "error", "row": idx, "column": col, "error": error,
+                          "completed": completed[0], "total": len(tasks)})
+                else:
+                    if col == "TH":
+                        stats["translated_th"] += 1
+                    else:
+                        stats["translated_vn"] += 1
+                    emit({"type": "result", "row": idx, "column": col, "source": rows[idx].get("ZH", ""),
+                          "text": result, "completed": completed[0], "total": len(tasks)})
+                
+                # 批量保存
+                if completed[0] % batch_size == 0:
+                    self._save_csv(output_file, fieldnames, rows)
+                    emit({"type": "saved", "path": output_file, "completed": completed[0],
+                          "total": len(tasks), "final": False})
+                
+                if progress_callback is not None:
+                    progress_callback(completed[0], len(tasks))
+                
+                now = time.monotonic()
+                if completed[0] == len(tasks) or now - last_progress[0] >= event_interval:
+                    last_progress[0] = now
+                    emit({"type": "progress", "completed": completed[0], "total": len(tasks)})
+        
+        def can_start() -> bool:
+            """暂停时等待继续；已取消时返回 False"""
+            return cancel is None or cancel.wait_if_paused()
+        
+        def pause_between_requests():
+            if cancel is not None:
+                cancel.wait(delay)
+            else:
+                time.sleep(delay)
+        
+        def translate_task(task):
+            if not can_start():
+                return
+            idx, col, lang, text = task
+            try:
+                result = self.translate_text(text, lang, context=rows[idx], cancel=cancel)
+            except CancelledError:
+                # 已放弃的请求，该条保持原样
+                return
+            except Exception as e:
+                commit(idx, col, text, str(e))
+                return
+            commit(idx, col, result, None)
+            pause_between_requests()
+        
+        def translate_job(job):
+            if not can_start():
+                return
+            if use_segments and len(job) > 1:
+                # 合并成一次流式请求，每完成一条立即写入；中途失败时只重试未完成的
+                pending = dict(enumerate(job))
+                contexts = {(rows[t[0]].get("Table"), rows[t[0]].get("Sheet")) for t in job}
+                context = rows[job[0][0]] if len(contexts) == 1 else None
+                
+                def on_result(i, translated):
+                    idx, col, _, _ = pending.pop(i)
+                    commit(idx, col, translated, None)
+                    if cancel is not None:
+                        # 取消后不再读取剩余的流式结果
+                        cancel.raise_if_cancelled()
+                
+                try:
+                    self.translate_segments([t[3] for t in job], job[0][2], context, on_result, cancel)
+                    pause_between_requests()
+                except CancelledError:
+                    return
+                except Exception as e:
+                    emit({"type": "notice",
+                          "message": f"合并请求中断（已完成 {len(job) - len(pending)}/{len(job)} 条）: {e}"})
+                job = list(pending.values())
+            
+            for task in job:
+                translate_task(task)
+        
+        # 调度只影响提交顺序，结果按行号写回
+        use_segments = llm_batch > 1 and self.api_type in self.LLM_MODELS
+        if schedule == "lpt":
+            from scheduling import schedule_tasks
+            if use_segments:
+                jobs = schedule_tasks(tasks, short_threshold=self.LLM_BATCH_MAX_CHARS, pack_size=llm_batch)
+            else:
+                jobs = schedule_tasks(tasks)
+        elif schedule == "context":
+            from scheduling import group_tasks_by_context
+            jobs = group_tasks_by_context(tasks, rows, group_size=llm_batch if use_segments else 8)
+        else:
+            from scheduling import group_tasks_by_row
+            if use_segments:
+                jobs = group_tasks_by_row(tasks, group_size=llm_batch, short_threshold=self.LLM_BATCH_MAX_CHARS)
+            else:
+                jobs = group_tasks_by_row(tasks)
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {executor.submit(translate_job, job) for job in jobs}
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                if cancel is not None and cancel.cancelled:
+                    # 未开始的任务直接取消，进行中的请求最多再等 cancel.grace 秒
+                    for future in pending:
+                        future.cancel()
+                    wait(pending, timeout=cancel.grace)
+                    break
+        finally:
+            # 不等待被放弃的请求；它们返回后因 closed 标志不再写入
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # 最终保存
+        with lock:
+            closed[0] = True
+        self._save_csv(output_file, fieldnames, rows)
+        emit({"type": "saved", "path": output_file, "completed": completed[0],
+              "total": len(tasks), "final": True})
+        
+        if cancel is not None and cancel.cancelled:
+            stats["cancelled"] = True
+        
+        counters = _counter_delta(self._counters(), counters_before)
+        if self.pool is not None:
+            stats["backends"] = counters["backends"]
+        if self.hedger is not None:
+            stats["hedging"] = counters["hedging"]
+        if counters["coalesced"]:
+            stats["coalesced"] = counters["coalesced"]
+        if self.router is not None:
+            stats["routes"] = counters["routes"]
+        if counters["usage"]["requests"]:
+            stats["usage"] = counters["usage"]
+        
+        emit({"type": "finished", "output": output_file, "stats": stats,
+              "cancelled": stats.get("cancelled", False)})
+        return stats
+    
+    @classmethod
+    def plan_tasks(cls, fieldnames: list, rows: list, translate_th: bool = True,
+                   translate_vn: bool = True, force: bool = False,
+                   stats: Optional[dict] = None) -> list:
+        """
+        收集需要翻译的任务
+        
+        Args:
+            fieldnames: CSV表头
+            rows: CSV数据行
+            translate_th: 是否翻译TH列
+            translate_vn: 是否翻译VN列
+            force: 是否强制翻译（即使已有翻译）
+            stats: 统计信息（可选，会累加跳过数）
+            
+        Returns:
+            任务列表 [(行号, 列名, 语言代码, 中文原文)...]
+        """
         # 检查必要的列
         required_cols = ["ZH"]
         if translate_th:
@@ -381,108 +991,230 @@ class CSVTranslator:
             if col not in fieldnames:
                 raise ValueError(f"CSV文件缺少必要的列: {col}")
         
-        # 收集需要翻译的任务
+        if stats is None:
+            stats = {"skipped_th": 0, "skipped_vn": 0}
+        
         tasks = []
         for i, row in enumerate(rows):
             zh_text = row.get("ZH", "")
             
             if translate_th:
                 th_text = row.get("TH", "")
-                if force or self.needs_translation(zh_text, th_text):
+                if force or cls.needs_translation(zh_text, th_text):
                     tasks.append((i, "TH", "th", zh_text))
                 else:
                     stats["skipped_th"] += 1
             
             if translate_vn:
                 vn_text = row.get("VN", "")
-                if force or self.needs_translation(zh_text, vn_text):
+                if force or cls.needs_translation(zh_text, vn_text):
                     tasks.append((i, "VN", "vi", zh_text))
                 else:
                     stats["skipped_vn"] += 1
         
-        print(f"需要翻译 {len(tasks)} 条内容，使用 {max_workers} 个并发线程")
-        
-        # 并发翻译
-        import threading
-        lock = threading.Lock()
-        completed = [0]
-        
-        def translate_task(task):
-            idx, col, lang, text = task
-            try:
-                result = self.translate_text(text, lang)
-                time.sleep(delay)
-                return (idx, col, lang, result, None)
-            except Exception as e:
-                return (idx, col, lang, text, str(e))
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(translate_task, task): task for task in tasks}
-            
-            for future in as_completed(futures):
-                idx, col, lang, result, error = future.result()
-                
-                with lock:
-                    rows[idx][col] = result
-                    completed[0] += 1
-                    
-                    if error:
-                        print(f"[{completed[0]}/{len(tasks)}] {col}翻译错误: {error}")
-                        stats["errors"] += 1
-                    else:
-                        if col == "TH":
-                            stats["translated_th"] += 1
-                        else:
-                            stats["translated_vn"] += 1
-                        print(f"[{completed[0]}/{len(tasks)}] {col}: {rows[idx].get('ZH', '')[:20]}... -> {result[:20]}...")
-                    
-                    # 批量保存
-                    if completed[0] % batch_size == 0:
-                        self._save_csv(output_file, fieldnames, rows)
-                        print(f"已保存进度: {completed[0]}/{len(tasks)}")
-        
-        # 最终保存
-        self._save_csv(output_file, fieldnames, rows)
-        print(f"\n翻译完成! 输出文件: {output_file}")
-        
-        return stats
+        return tasks
     
-    def _save_csv(self, output_file: str, fieldnames: list, rows: list):
-        """保存CSV文件"""
-        with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+    @staticmethod
+    def read_csv(input_file: str) -> tuple[list, list]:
+        """读取CSV文件，返回 (表头, 数据行)"""
+        with open_text(input_file, 'r', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+        return fieldnames, rows
+    
+    @staticmethod
+    def _save_csv(output_file: str, fieldnames: list, rows: list):
+        """保存CSV文件（先写临时文件再替换，中途中断不会留下不完整的输出文件）"""
+        output_path = Path(output_file)
+        # 临时文件保留原扩展名，压缩格式（.gz/.zst）不变
+        tmp_path = output_path.with_name(f"~{output_path.name}")
+        with open_text(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(rows)
+        os.replace(tmp_path, output_path)
+
+
+def _counter_delta(after, before):
+    """两次计数快照的差值（整数相减，其它值如 healthy、threshold 取当前值）"""
+    if isinstance(after, dict):
+        before = before or {}
+        return {key: _counter_delta(value, before.get(key)) for key, value in after.items()}
+    if isinstance(after, int) and not isinstance(after, bool):
+        return after - (before or 0)
+    return after
+
+
+def print_event(event: dict):
+    """translate_csv 的默认事件处理：在控制台打印进度"""
+    kind = event["type"]
+    if kind == "started":
+        print(f"正在读取文件: {event['input']}")
+    elif kind == "planned":
+        print(f"共读取 {event['total_rows']} 行数据")
+        print(f"需要翻译 {event['tasks']} 条内容，使用 {event['workers']} 个并发线程")
+    elif kind == "result":
+        print(f"[{event['completed']}/{event['total']}] {event['column']}: "
+              f"{event['source'][:20]}... -> {event['text'][:20]}...")
+    elif kind == "error":
+        print(f"[{event['completed']}/{event['total']}] {event['column']}翻译错误: {event['error']}")
+    elif kind == "saved" and not event["final"]:
+        print(f"已保存进度: {event['completed']}/{event['total']}")
+    elif kind == "notice":
+        print(event["message"])
+    elif kind == "finished":
+        if event["cancelled"]:
+            print(f"\n翻译已取消，已完成的结果已保存: {event['output']}")
+        else:
+            print(f"\n翻译完成! 输出文件: {event['output']}")
+
+
+def print_stats(stats: dict):
+    """打印翻译统计"""
+    print("\n=== 翻译统计 ===")
+    print(f"总行数: {stats['total_rows']}")
+    print(f"翻译TH: {stats['translated_th']} (跳过: {stats['skipped_th']})")
+    print(f"翻译VN: {stats['translated_vn']} (跳过: {stats['skipped_vn']})")
+    print(f"错误数: {stats['errors']}")
+    if stats.get("cancelled"):
+        print("已中断: 未完成的内容保持原样，重新运行会从剩余内容继续")
+    for name, backend in stats.get("backends", {}).items():
+        print(f"  {name}: 请求 {backend['requests']}，错误 {backend['errors']}，"
+              f"{'正常' if backend['healthy'] else '不可用'}")
+    for name, count in stats.get("routes", {}).items():
+        print(f"  分流 {name}: {count} 条")
+    if "usage" in stats:
+        usage = stats["usage"]
+        print(f"Token用量: 输入 {usage['prompt_tokens']} (缓存命中 {usage['cached_tokens']})，"
+              f"输出 {usage['completion_tokens']}")
+    if "coalesced" in stats:
+        print(f"合并的重复请求: {stats['coalesced']}")
+    if "hedging" in stats:
+        print(f"对冲请求: {stats['hedging']['hedged']} (对冲胜出: {stats['hedging']['hedge_wins']})")
 
 
 def main():
+    # 批量任务模式: translate_csv.py batch submit/status/collect ...
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch_job import main as batch_main
+        batch_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(description="CSV翻译工具 - 将ZH列翻译成TH和VN")
-    parser.add_argument("input", help="输入CSV文件路径")
+    parser.add_argument("input", nargs="?", help="输入CSV文件路径")
     parser.add_argument("-o", "--output", help="输出CSV文件路径")
     parser.add_argument("--th", action="store_true", default=True, help="翻译TH列（默认开启）")
     parser.add_argument("--vn", action="store_true", default=True, help="翻译VN列（默认开启）")
     parser.add_argument("--no-th", action="store_true", help="不翻译TH列")
     parser.add_argument("--no-vn", action="store_true", help="不翻译VN列")
     parser.add_argument("-f", "--force", action="store_true", help="强制翻译（即使已有翻译）")
-    parser.add_argument("--translator", choices=["google", "deepl"], default="google",
-                        help="翻译器类型（默认: google）")
-    parser.add_argument("--api-key", help="DeepL API密钥")
+    parser.add_argument("--api-type", choices=list(CSVTranslator.API_TYPES),
+                        help="翻译API类型（默认: api_config.json 中的 default_type，否则 google-free）")
+    parser.add_argument("--api-key", help="API密钥（默认: api_config.json 中的设置）")
+    parser.add_argument("--api-endpoint", help="自定义API端点（用于OpenAI兼容的API）")
     parser.add_argument("--batch-size", type=int, default=10, help="批处理大小（默认: 10）")
     parser.add_argument("--delay", type=float, default=0.1, help="翻译延迟秒数（默认: 0.1）")
     parser.add_argument("--workers", type=int, default=5, help="并发线程数（默认: 5，设为1禁用并发）")
+    parser.add_argument("--schedule", choices=["lpt", "context", "row"], default="lpt",
+                        help="任务调度顺序: lpt=长文本优先/短文本打包/各语言轮流, "
+                             "context=同一Table/Sheet连续处理(便于大模型前缀缓存), row=按行顺序（默认: lpt）")
+    parser.add_argument("--llm-batch", type=int, default=0,
+                        help="OpenAI/DeepSeek每次请求合并翻译的条数，结果流式写入；各种 --schedule 都生效，"
+                             "row 时按行顺序合并同一语言相邻的短文本（默认: 0，逐条请求）")
+    parser.add_argument("--timeout", type=float,
+                        help="单次请求超时秒数（默认: 60；使用 --server 时默认为服务端的设置）")
+    parser.add_argument("--hedge", type=float, metavar="BUDGET",
+                        help="启用对冲请求，参数为额外请求占比上限，例如 0.05（默认: 0，不启用；使用 --server 时默认为服务端的设置）")
+    parser.add_argument("--hedge-delay", type=float,
+                        help="对冲阈值秒数（默认: 最近请求耗时的p95）")
+    
+    parser.add_argument("--server", metavar="URL",
+                        help="交给常驻翻译服务执行，例如 http://127.0.0.1:8765 或 unix:///tmp/translate.sock"
+                             "（见 translate_server.py）")
+    
+    parser.add_argument("--watch", metavar="DIR",
+                        help="监视目录，新的提取文件写完后自动增量翻译（见 watch_dir.py）")
+    parser.add_argument("--watch-pattern", default="*翻译提取_*.csv",
+                        help="监视的文件名通配符（默认: *翻译提取_*.csv）")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="文件多少秒没有变化视为写完（默认: 2）")
     
     args = parser.parse_args()
+    if not args.input and not args.watch:
+        parser.error("需要指定输入CSV文件或 --watch 目录")
+    if args.server and args.watch:
+        parser.error("--server 不能与 --watch 同时使用（可以在服务端所在机器上运行 --watch）")
     
     # 处理翻译选项
     translate_th = not args.no_th
     translate_vn = not args.no_vn
     
+    if args.server:
+        # 作为常驻服务的客户端：由服务端的翻译器和缓存执行，本地只显示进度
+        from translate_server import ServerClient
+        stats = ServerClient(args.server).run_job(
+            input_file=args.input,
+            output_file=args.output,
+            api_type=args.api_type,
+            api_key=args.api_key,
+            api_endpoint=args.api_endpoint,
+            request_timeout=args.timeout,
+            hedge_budget=args.hedge,
+            hedge_delay=args.hedge_delay,
+            translate_th=translate_th,
+            translate_vn=translate_vn,
+            force=args.force,
+            batch_size=args.batch_size,
+            delay=args.delay,
+            max_workers=args.workers,
+            schedule=args.schedule,
+            llm_batch=args.llm_batch
+        )
+        print_stats(stats)
+        return
+    
     # 创建翻译器
+    config = load_api_config()
+    api_type = args.api_type or config.get("default_type", "google-free")
     translator = CSVTranslator(
-        translator_type=args.translator,
-        api_key=args.api_key
+        api_type=api_type,
+        api_key=args.api_key or config.get(api_type, {}).get("api_key"),
+        api_endpoint=args.api_endpoint or config.get(api_type, {}).get("endpoint") or None,
+        request_timeout=args.timeout if args.timeout is not None else 60.0,
+        hedge_budget=args.hedge or 0.0,
+        hedge_delay=args.hedge_delay
     )
     
+    if args.watch:
+        from watch_dir import watch_directory
+        watch_directory(
+            translator, args.watch, pattern=args.watch_pattern, settle=args.settle,
+            translate_th=translate_th,
+            translate_vn=translate_vn,
+            force=args.force,
+            batch_size=args.batch_size,
+            delay=args.delay,
+            max_workers=args.workers,
+            schedule=args.schedule,
+            llm_batch=args.llm_batch
+        )
+        return
+    
+    # Ctrl+C：停止并保存已完成的结果；再按一次立即退出
+    cancel = CancelToken()
+    
+    def on_interrupt(signum, frame):
+        if cancel.cancelled:
+            # 工作线程中的请求无法中断，正常退出会等待它们结束，直接结束进程
+            print("\n已强制退出")
+            sys.stdout.flush()
+            os._exit(130)
+        print("\n正在停止，保存已完成的结果...（再按一次 Ctrl+C 立即退出）")
+        cancel.cancel("interrupted")
+    
+    signal.signal(signal.SIGINT, on_interrupt)
+    
     # 执行翻译
     stats = translator.translate_csv(
         input_file=args.input,
@@ -492,15 +1224,18 @@ def main():
         force=args.force,
         batch_size=args.batch_size,
         delay=args.delay,
-        max_workers=args.workers
+        max_workers=args.workers,
+        schedule=args.schedule,
+        llm_batch=args.llm_batch,
+        cancel=cancel
     )
     
-    # 打印统计
-    print("\n=== 翻译统计 ===")
-    print(f"总行数: {stats['total_rows']}")
-    print(f"翻译TH: {stats['translated_th']} (跳过: {stats['skipped_th']})")
-    print(f"翻译VN: {stats['translated_vn']} (跳过: {stats['skipped_vn']})")
-    print(f"错误数: {stats['errors']}")
+    print_stats(stats)
+    
+    if stats.get("cancelled"):
+        # 结果已保存；被放弃的请求仍在工作线程中，不等待它们超时
+        sys.stdout.flush()
+        os._exit(130)
 
 
 if __name__ == "__main__":
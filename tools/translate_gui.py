@@ -8,71 +8,218 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import queue
-import csv
 import os
 import sys
 import subprocess
 from pathlib import Path
 from typing import Optional
 
+# 翻译库在选择对应API时才检查、在开始翻译时才导入（见 providers.py），窗口可以立即显示
+import providers
+from cancellation import CancelToken
+from compressed_io import split_compression_suffix
+from translate_csv import CSVTranslator, load_api_config, save_api_config
+
 
-def check_dependencies():
-    """检查并安装所需依赖"""
-    missing_packages = []
+class CSVPreview:
+    """
+    CSV预览窗口（虚拟化）
     
-    # 检查 deep-translator
-    try:
-        import deep_translator
-    except ImportError:
-        missing_packages.append("deep-translator")
+    Treeview 中只放当前可见的一页，滚动时按需从记录偏移索引（csv_index.py）读取，
+    任意大小的文件都能滚动到任意一行；搜索/筛选也直接在索引上进行。
+    索引按文件缓存（修改时间和大小不变时直接复用），再次打开同一文件无需重建。
+    """
     
-    if missing_packages:
-        # 创建简单的提示窗口
-        root = tk.Tk()
-        root.withdraw()  # 隐藏主窗口
-        
-        msg = "检测到缺少以下依赖包:\n\n"
-        msg += "\n".join(f"  • {pkg}" for pkg in missing_packages)
-        msg += "\n\n是否自动安装？"
+    # 每页最多显示的行数（实际按窗口高度计算）
+    MAX_PAGE_ROWS = 100
+    # 单元格显示的最大字符数
+    CELL_PREVIEW_CHARS = 200
+    ALL_COLUMNS = "全部列"
+    
+    def __init__(self, root: tk.Tk, path: str):
+        self.path = path
+        self.index = None         # csv_index.CSVIndex，建立后设置
+        self.view = None          # 筛选结果（记录号数组），None 表示全部
+        self.top = 0              # 当前页第一行在 view 中的位置
+        self.page_rows = 20
+        self.search_cancel: Optional[threading.Event] = None
+        
+        self.win = tk.Toplevel(root)
+        self.win.title(f"预览 - {os.path.basename(path)}")
+        self.win.geometry("900x500")
+        
+        # 搜索栏
+        search_frame = ttk.Frame(self.win)
+        search_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Label(search_frame, text="搜索:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda e: self._search())
+        self.column_var = tk.StringVar(value=self.ALL_COLUMNS)
+        self.column_combo = ttk.Combobox(search_frame, textvariable=self.column_var,
+                                         values=[self.ALL_COLUMNS], state="readonly", width=12)
+        self.column_combo.pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="筛选", command=self._search).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="清除", command=self._clear_search).pack(side=tk.LEFT)
+        
+        # Treeview 不使用自身的纵向滚动，纵向滚动条按记录号定位
+        tree_frame = ttk.Frame(self.win)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tree = ttk.Treeview(tree_frame, show='headings')
+        self.vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self._on_scrollbar)
+        hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hsb.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        hsb.grid(row=1, column=0, sticky="ew")
+        tree_frame.columnconfigure(0, weight=1)
+        tree_frame.rowconfigure(0, weight=1)
+        
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self._scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self._scroll(1, "units"))
+        self.tree.bind("<Prior>", lambda e: self._scroll(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self._scroll(1, "pages"))
+        self.tree.bind("<Home>", lambda e: self._scroll_to(0) or "break")
+        self.tree.bind("<End>", lambda e: self._scroll_to(self._total()) or "break")
+        self.tree.bind("<Configure>", self._on_resize)
+        
+        self.status_label = ttk.Label(self.win, text="正在建立索引...")
+        self.status_label.pack(pady=5)
+        
+        threading.Thread(target=self._load_index, daemon=True).start()
+    
+    def _load_index(self):
+        """建立（或从缓存取得）索引（后台线程）"""
+        from csv_index import open_index
+        try:
+            index = open_index(Path(self.path))
+        except Exception as e:
+            self.win.after(0, lambda err=e: self._on_load_failed(err))
+            return
+        self.win.after(0, lambda: self._on_index_ready(index))
+    
+    def _on_load_failed(self, error: Exception):
+        messagebox.showerror("错误", f"读取文件失败: {error}", parent=self.win)
+        self.win.destroy()
+    
+    def _on_index_ready(self, index):
+        if not self.win.winfo_exists():
+            return
+        self.index = index
+        self.tree.configure(columns=["_row"] + index.fieldnames)
+        self.tree.heading("_row", text="#")
+        self.tree.column("_row", width=60, minwidth=40, stretch=False)
+        for col in index.fieldnames:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=100, minwidth=50)
+        self.column_combo.configure(values=[self.ALL_COLUMNS] + index.fieldnames)
+        self._update_status()
+        self._render()
+    
+    def _total(self) -> int:
+        if self.index is None:
+            return 0
+        return len(self.view) if self.view is not None else len(self.index)
+    
+    def _update_status(self, text: Optional[str] = None):
+        if text is None:
+            text = f"共 {len(self.index)} 行数据"
+            if self.view is not None:
+                text = f"匹配 {len(self.view)} 行 / " + text
+        self.status_label.config(text=text)
+    
+    def _on_resize(self, event):
+        # 按可见高度估算一页的行数（表头约占一行）
+        row_height = 20
+        page_rows = max(1, min(self.MAX_PAGE_ROWS, event.height // row_height - 1))
+        if page_rows != self.page_rows:
+            self.page_rows = page_rows
+            self._render()
+    
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self._total()))
+        elif args[0] == "scroll":
+            self._scroll(int(args[1]), args[2])
+    
+    def _scroll(self, amount: int, what: str):
+        step = self.page_rows if what == "pages" else 3
+        self._scroll_to(self.top + amount * step)
+        return "break"
+    
+    def _scroll_to(self, top: int):
+        top = max(0, min(top, self._total() - self.page_rows))
+        if top != self.top:
+            self.top = top
+            self._render()
+    
+    def _render(self):
+        """只把当前页的行放进 Treeview"""
+        if self.index is None:
+            return
+        total = self._total()
+        stop = min(self.top + self.page_rows, total)
+        if self.view is None:
+            numbers = range(self.top, stop)
+            rows = self.index.rows(self.top, stop)
+        else:
+            numbers = self.view[self.top:stop]
+            rows = self.index.rows_at(numbers)
         
-        result = messagebox.askyesno("依赖检查", msg, icon='warning')
+        self.tree.delete(*self.tree.get_children())
+        limit = self.CELL_PREVIEW_CHARS
+        for n, row in zip(numbers, rows):
+            values = [n + 1] + [cell[:limit].replace("\r", "").replace("\n", " ↵ ") for cell in row]
+            self.tree.insert('', tk.END, values=values)
         
-        if result:
-            # 自动安装
-            root.destroy()
-            
-            print("正在安装依赖包...")
-            for pkg in missing_packages:
-                print(f"  安装 {pkg}...")
-                try:
-                    subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
-                    print(f"  ✓ {pkg} 安装成功")
-                except subprocess.CalledProcessError as e:
-                    print(f"  ✗ {pkg} 安装失败: {e}")
-                    messagebox.showerror("安装失败", 
-                        f"安装 {pkg} 失败!\n\n请手动运行:\npip install {pkg}")
-                    sys.exit(1)
-            
-            print("\n所有依赖安装完成，正在启动程序...")
-            # 重新导入模块
-            import importlib
-            importlib.invalidate_caches()
+        if total:
+            self.vsb.set(self.top / total, stop / total)
         else:
-            # 用户取消，显示手动安装提示
-            install_cmd = "pip install " + " ".join(missing_packages)
-            messagebox.showinfo("安装提示", 
-                f"请手动安装依赖:\n\n{install_cmd}\n\n或运行:\npip install -r requirements.txt")
-            root.destroy()
-            sys.exit(0)
+            self.vsb.set(0, 1)
     
-    return True
-
-
-# 启动时检查依赖
-check_dependencies()
-
-# 依赖检查通过后再导入
-from translate_csv import CSVTranslator, load_api_config, save_api_config
+    def _search(self):
+        """在后台线程中按关键字筛选（空关键字等同于清除）"""
+        if self.index is None:
+            return
+        text = self.search_var.get()
+        if not text:
+            self._clear_search()
+            return
+        column = self.column_var.get()
+        column = None if column == self.ALL_COLUMNS else column
+        
+        if self.search_cancel is not None:
+            self.search_cancel.set()
+        cancel = self.search_cancel = threading.Event()
+        self._update_status("正在搜索...")
+        
+        def run():
+            result = self.index.search(text, column, cancel=cancel)
+            if not cancel.is_set():
+                self.win.after(0, lambda: self._on_search_done(result))
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _on_search_done(self, result):
+        if not self.win.winfo_exists():
+            return
+        self.view = result
+        self.top = 0
+        self._update_status()
+        self._render()
+    
+    def _clear_search(self):
+        if self.search_cancel is not None:
+            self.search_cancel.set()
+            self.search_cancel = None
+        self.search_var.set("")
+        self.view = None
+        self.top = 0
+        if self.index is not None:
+            self._update_status()
+            self._render()
 
 
 class TranslatorApp:
@@ -85,8 +232,25 @@ class TranslatorApp:
         ("openai", "OpenAI GPT"),
         ("deepseek", "DeepSeek(推荐)"),
         ("deepl", "DeepL API"),
+        ("pool", "多Key负载均衡"),
+        ("routing", "按规则分流"),
+        ("local", "本地离线模型"),
     ]
     
+    # 不需要在界面填写API Key的类型（使用api_config.json中的配置）
+    KEYLESS_TYPES = ("google-free", "pool", "routing", "local")
+    
+    # 日志刷新间隔（毫秒）
+    LOG_INTERVAL_MS = 100
+    # 日志区域最多保留的行数，更早的行只保存在日志文件中
+    MAX_LOG_LINES = 2000
+    # 每次刷新最多处理的日志条数，其余留到下一次刷新
+    LOG_BATCH_LIMIT = 1000
+    # 每次刷新逐条显示的翻译结果上限，超过时合并成一行摘要
+    DETAIL_LINES_PER_TICK = 20
+    # 完整日志（包括未在界面显示的逐条结果）
+    LOG_FILE = Path(__file__).parent / "translate_gui.log"
+    
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("CSV翻译工具 - TH/VN")
@@ -96,7 +260,12 @@ class TranslatorApp:
         # 状态变量
         self.is_translating = False
         self.translator: Optional[CSVTranslator] = None
+        self.cancel_token: Optional[CancelToken] = None
         self.log_queue = queue.Queue()
+        self._log_file = None
+        # 后台线程只记录最新进度 (百分比, 文字)，由日志刷新时统一显示
+        self._pending_progress = None
+        self._shown_progress = None
         
         # 加载API配置
         self.api_config = load_api_config()
@@ -152,6 +321,10 @@ class TranslatorApp:
         api_combo.pack(side=tk.LEFT, padx=10)
         api_combo.bind("<<ComboboxSelected>>", self._on_api_type_change)
         
+        # 所选API缺少依赖时的提示
+        self.dependency_label = ttk.Label(api_type_frame, text="", foreground="red")
+        self.dependency_label.pack(side=tk.LEFT)
+        
         # API Key输入
         self.api_key_frame = ttk.Frame(api_frame)
         self.api_key_frame.pack(fill=tk.X, pady=(10, 0))
@@ -232,6 +405,9 @@ class TranslatorApp:
         self.stop_btn = ttk.Button(btn_frame, text="停止", command=self._stop_translation, state=tk.DISABLED)
         self.stop_btn.pack(side=tk.LEFT, padx=5)
         
+        self.pause_btn = ttk.Button(btn_frame, text="暂停", command=self._toggle_pause, state=tk.DISABLED)
+        self.pause_btn.pack(side=tk.LEFT, padx=5)
+        
         ttk.Button(btn_frame, text="预览文件", command=self._preview_file).pack(side=tk.LEFT, padx=5)
         
         ttk.Button(btn_frame, text="清空日志", command=self._clear_log).pack(side=tk.RIGHT, padx=5)
@@ -263,7 +439,8 @@ class TranslatorApp:
             self.input_var.set(filename)
             # 自动设置输出文件名
             input_path = Path(filename)
-            output_name = f"{input_path.stem}_translated{input_path.suffix}"
+            base_path, compression = split_compression_suffix(input_path)
+            output_name = f"{base_path.stem}_translated{base_path.suffix}{compression}"
             self.output_var.set(str(input_path.parent / output_name))
     
     def _browse_output(self):
@@ -281,8 +458,8 @@ class TranslatorApp:
         api_type = self.api_type_var.get().split(" - ")[0]
         
         # 显示/隐藏API Key输入框
-        if api_type == "google-free":
-            # 免费API不需要Key
+        if api_type in self.KEYLESS_TYPES:
+            # 免费API不需要Key，负载均衡/分流/本地模型使用api_config.json中的配置
             for widget in self.api_key_frame.winfo_children():
                 widget.configure(state=tk.DISABLED)
             for widget in self.api_endpoint_frame.winfo_children():
@@ -302,6 +479,10 @@ class TranslatorApp:
                     if isinstance(widget, ttk.Entry):
                         widget.configure(state=tk.DISABLED)
         
+        # 检查所选API的依赖（结果缓存，不导入翻译库）
+        missing = providers.missing_packages(api_type)
+        self.dependency_label.config(text=f"缺少依赖: {', '.join(missing)}" if missing else "")
+        
         # 加载对应的API Key
         if api_type in self.api_config:
             self.api_key_var.set(self.api_config[api_type].get("api_key", ""))
@@ -339,23 +520,74 @@ class TranslatorApp:
         # 触发一次类型改变事件
         self._on_api_type_change(None)
     
-    def _log(self, message: str):
-        """添加日志消息"""
-        self.log_queue.put(message)
+    def _log(self, message: str, detail: bool = False):
+        """
+        添加日志消息（可在任意线程调用）
+        
+        Args:
+            message: 日志内容
+            detail: 是否为逐条结果；大量出现时界面上只显示摘要，完整内容写入日志文件
+        """
+        self.log_queue.put((message, detail))
+    
+    def _set_progress(self, percent: float, text: str):
+        """更新进度（可在任意线程调用），界面在下一次刷新时只显示最新的一次"""
+        self._pending_progress = (percent, text)
+    
+    def _write_log_file(self, lines: list):
+        """把日志追加到日志文件，无法写入时只在界面显示"""
+        if self._log_file is None:
+            try:
+                self._log_file = open(self.LOG_FILE, 'a', encoding='utf-8')
+            except OSError:
+                self._log_file = False
+        if self._log_file:
+            self._log_file.write("\n".join(lines) + "\n")
+            self._log_file.flush()
     
     def _update_log(self):
-        """更新日志显示"""
+        """
+        定时刷新日志和进度
+        
+        每次最多处理 LOG_BATCH_LIMIT 条，一次性插入；逐条结果过多时合并成一行摘要；
+        日志区域超过 MAX_LOG_LINES 行时删除最早的行，避免控件无限增长拖慢界面。
+        """
+        messages = []
         try:
-            while True:
-                message = self.log_queue.get_nowait()
-                self.log_text.config(state=tk.NORMAL)
-                self.log_text.insert(tk.END, message + "\n")
-                self.log_text.see(tk.END)
-                self.log_text.config(state=tk.DISABLED)
+            while len(messages) < self.LOG_BATCH_LIMIT:
+                messages.append(self.log_queue.get_nowait())
         except queue.Empty:
             pass
         
-        self.root.after(100, self._update_log)
+        if messages:
+            self._write_log_file([message for message, _ in messages])
+            
+            details = sum(1 for _, detail in messages if detail)
+            lines = []
+            summarized = False
+            for message, detail in messages:
+                if detail and details > self.DETAIL_LINES_PER_TICK:
+                    if not summarized:
+                        lines.append(f"... 省略 {details} 条逐条结果/保存记录（见 {self.LOG_FILE.name}）")
+                        summarized = True
+                    continue
+                lines.append(message)
+            
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - self.MAX_LOG_LINES
+            if excess > 0:
+                self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_text.see(tk.END)
+            self.log_text.config(state=tk.DISABLED)
+        
+        progress = self._pending_progress
+        if progress is not None and progress != self._shown_progress:
+            self._shown_progress = progress
+            self.progress_var.set(progress[0])
+            self.progress_label.config(text=progress[1])
+        
+        self.root.after(self.LOG_INTERVAL_MS, self._update_log)
     
     def _clear_log(self):
         """清空日志"""
@@ -374,57 +606,7 @@ class TranslatorApp:
             messagebox.showerror("错误", f"文件不存在: {input_file}")
             return
         
-        # 创建预览窗口
-        preview_win = tk.Toplevel(self.root)
-        preview_win.title(f"预览 - {os.path.basename(input_file)}")
-        preview_win.geometry("900x500")
-        
-        # 创建Treeview
-        tree_frame = ttk.Frame(preview_win)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # 读取CSV并显示
-        try:
-            with open(input_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                columns = reader.fieldnames
-                
-                # 创建Treeview
-                tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
-                
-                # 设置列
-                for col in columns:
-                    tree.heading(col, text=col)
-                    tree.column(col, width=100, minwidth=50)
-                
-                # 添加滚动条
-                vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-                hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
-                tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-                
-                # 布局
-                tree.grid(row=0, column=0, sticky="nsew")
-                vsb.grid(row=0, column=1, sticky="ns")
-                hsb.grid(row=1, column=0, sticky="ew")
-                tree_frame.columnconfigure(0, weight=1)
-                tree_frame.rowconfigure(0, weight=1)
-                
-                # 添加数据（只显示前100行）
-                for i, row in enumerate(reader):
-                    if i >= 100:
-                        break
-                    values = [row.get(col, '') for col in columns]
-                    tree.insert('', tk.END, values=values)
-                
-                # 统计信息
-                f.seek(0)
-                total_rows = sum(1 for _ in f) - 1
-                
-            ttk.Label(preview_win, text=f"共 {total_rows} 行数据 (预览前100行)").pack(pady=5)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"读取文件失败: {e}")
-            preview_win.destroy()
+        CSVPreview(self.root, input_file)
     
     def _start_translation(self):
         """开始翻译"""
@@ -448,24 +630,74 @@ class TranslatorApp:
             messagebox.showwarning("警告", "请至少选择一种目标语言")
             return
         
+        if not self._check_dependencies(self.api_type_var.get().split(" - ")[0]):
+            return
+        
         # 开始翻译
         self.is_translating = True
+        self.cancel_token = CancelToken()
         self.start_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
+        self.pause_btn.config(state=tk.NORMAL, text="暂停")
         
         # 在后台线程执行翻译
         thread = threading.Thread(target=self._do_translation, daemon=True)
         thread.start()
     
+    def _check_dependencies(self, api_type: str) -> bool:
+        """检查所选API的依赖，缺少时询问是否自动安装；返回是否可以开始翻译"""
+        missing = providers.missing_packages(api_type)
+        if not missing:
+            return True
+        
+        msg = f"{api_type} 需要以下依赖包:\n\n"
+        msg += "\n".join(f"  • {pkg}" for pkg in missing)
+        msg += "\n\n是否自动安装？"
+        if messagebox.askyesno("依赖检查", msg, icon='warning'):
+            self._install_packages(missing)
+        else:
+            install_cmd = "pip install " + " ".join(missing)
+            messagebox.showinfo("安装提示", 
+                f"请手动安装依赖:\n\n{install_cmd}\n\n或运行:\npip install -r requirements.txt")
+        return False
+    
+    def _install_packages(self, packages: list):
+        """在后台线程中用 pip 安装依赖，安装过程显示在日志中"""
+        self.start_btn.config(state=tk.DISABLED)
+        
+        def run():
+            failed = []
+            for pkg in packages:
+                self._log(f"正在安装 {pkg}...")
+                try:
+                    subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
+                    self._log(f"  ✓ {pkg} 安装成功")
+                except (subprocess.CalledProcessError, OSError) as e:
+                    self._log(f"  ✗ {pkg} 安装失败: {e}")
+                    failed.append(pkg)
+            providers.clear_cache()
+            
+            def done():
+                self.start_btn.config(state=tk.NORMAL)
+                self._on_api_type_change(None)
+                if failed:
+                    messagebox.showerror("安装失败", 
+                        f"安装 {', '.join(failed)} 失败!\n\n请手动运行:\npip install {' '.join(failed)}")
+                else:
+                    self._log("依赖安装完成，请重新点击“开始翻译”")
+            self.root.after(0, done)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
     def _do_translation(self):
-        """执行翻译（后台线程）"""
+        """执行翻译（后台线程），翻译过程由 CSVTranslator.translate_csv 完成，这里只处理事件"""
         input_file = self.input_var.get()
         output_file = self.output_var.get()
         
         try:
             # 获取API设置
             api_type = self.api_type_var.get().split(" - ")[0]
-            api_key = self.api_key_var.get() if api_type != "google-free" else None
+            api_key = self.api_key_var.get() if api_type not in self.KEYLESS_TYPES else None
             api_endpoint = self.api_endpoint_var.get() if api_type in ("openai", "deepseek") else None
             
             self._log("=" * 50)
@@ -477,164 +709,103 @@ class TranslatorApp:
             self._log("=" * 50)
             
             # 验证API Key
-            if api_type != "google-free" and not api_key:
+            if api_type not in self.KEYLESS_TYPES and not api_key:
                 self._log("错误: 请填写API Key")
                 self.root.after(0, lambda: messagebox.showerror("错误", "请填写API Key"))
                 return
             
             # 创建翻译器
-            translator = CSVTranslator(api_type=api_type, api_key=api_key, api_endpoint=api_endpoint)
+            self.translator = CSVTranslator(api_type=api_type, api_key=api_key, api_endpoint=api_endpoint)
             
             # 保存当前使用的API类型
             self.api_config["default_type"] = api_type
             save_api_config(self.api_config)
             
-            # 读取CSV
-            rows = []
-            with open(input_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                fieldnames = reader.fieldnames
-                for row in reader:
-                    rows.append(row)
-            
-            total_rows = len(rows)
-            self._log(f"共读取 {total_rows} 行数据")
-            
-            translated_th = 0
-            translated_vn = 0
-            skipped = 0
-            errors = 0
-            
-            batch_size = int(self.batch_var.get())
-            delay = float(self.delay_var.get())
-            max_workers = int(self.workers_var.get())
-            force = self.force_var.get()
-            translate_th = self.th_var.get()
-            translate_vn = self.vn_var.get()
-            
-            # 收集需要翻译的任务
-            tasks = []
-            for i, row in enumerate(rows):
-                zh_text = row.get("ZH", "")
-                
-                if translate_th:
-                    th_text = row.get("TH", "")
-                    if force or translator.needs_translation(zh_text, th_text):
-                        tasks.append((i, "TH", "th", zh_text))
-                    else:
-                        skipped += 1
-                
-                if translate_vn:
-                    vn_text = row.get("VN", "")
-                    if force or translator.needs_translation(zh_text, vn_text):
-                        tasks.append((i, "VN", "vi", zh_text))
-                    else:
-                        skipped += 1
-            
-            self._log(f"需要翻译 {len(tasks)} 条内容，使用 {max_workers} 个并发线程")
-            
-            if not tasks:
-                self._log("没有需要翻译的内容")
-            else:
-                # 并发翻译
-                from concurrent.futures import ThreadPoolExecutor, as_completed
-                import time as time_module
-                
-                completed_count = [0]
-                lock = threading.Lock()
-                
-                def translate_task(task):
-                    if not self.is_translating:
-                        return None
-                    idx, col, lang, text = task
-                    try:
-                        result = translator.translate_text(text, lang)
-                        time_module.sleep(delay)
-                        return (idx, col, lang, result, None)
-                    except Exception as e:
-                        return (idx, col, lang, text, str(e))
-                
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    futures = {executor.submit(translate_task, task): task for task in tasks}
-                    
-                    for future in as_completed(futures):
-                        if not self.is_translating:
-                            executor.shutdown(wait=False, cancel_futures=True)
-                            break
-                        
-                        result = future.result()
-                        if result is None:
-                            continue
-                            
-                        idx, col, lang, translated, error = result
-                        
-                        with lock:
-                            rows[idx][col] = translated
-                            completed_count[0] += 1
-                            
-                            # 更新进度
-                            progress = completed_count[0] / len(tasks) * 100
-                            self.progress_var.set(progress)
-                            self.root.after(0, lambda p=progress, c=completed_count[0], t=len(tasks): 
-                                self.progress_label.config(text=f"进度: {c}/{t} ({p:.1f}%)"))
-                            
-                            if error:
-                                self._log(f"[{completed_count[0]}/{len(tasks)}] {col}翻译错误: {error}")
-                                errors += 1
-                            else:
-                                if col == "TH":
-                                    translated_th += 1
-                                else:
-                                    translated_vn += 1
-                                zh_short = rows[idx].get('ZH', '')[:20]
-                                tr_short = translated[:20] if translated else ''
-                                self._log(f"[{completed_count[0]}/{len(tasks)}] {col}: {zh_short}... -> {tr_short}...")
-                            
-                            # 批量保存
-                            if completed_count[0] % batch_size == 0:
-                                self._save_csv(output_file, fieldnames, rows)
-                                self._log(f"已保存进度: {completed_count[0]}/{len(tasks)}")
-            
-            # 最终保存
-            self._save_csv(output_file, fieldnames, rows)
+            stats = self.translator.translate_csv(
+                input_file=input_file,
+                output_file=output_file,
+                translate_th=self.th_var.get(),
+                translate_vn=self.vn_var.get(),
+                force=self.force_var.get(),
+                batch_size=int(self.batch_var.get()),
+                delay=float(self.delay_var.get()),
+                max_workers=int(self.workers_var.get()),
+                on_event=self._on_translate_event,
+                event_interval=self.LOG_INTERVAL_MS / 1000,
+                cancel=self.cancel_token
+            )
             
+            skipped = stats["skipped_th"] + stats["skipped_vn"]
             self._log("")
             self._log("=" * 50)
-            self._log("翻译完成!")
-            self._log(f"翻译TH: {translated_th} 条")
-            self._log(f"翻译VN: {translated_vn} 条")
+            self._log("翻译已停止，已完成的结果已保存" if stats.get("cancelled") else "翻译完成!")
+            self._log(f"翻译TH: {stats['translated_th']} 条")
+            self._log(f"翻译VN: {stats['translated_vn']} 条")
             self._log(f"跳过: {skipped} 条")
-            self._log(f"错误: {errors} 条")
+            self._log(f"错误: {stats['errors']} 条")
             self._log(f"输出文件: {output_file}")
             self._log("=" * 50)
             
-            self.progress_var.set(100)
-            self.root.after(0, lambda: self.progress_label.config(text="完成!"))
-            
-            if self.is_translating:
+            if stats.get("cancelled"):
+                self._set_progress((self._pending_progress or (0, ""))[0], "已停止")
+            else:
+                self._set_progress(100, "完成!")
                 self.root.after(0, lambda: messagebox.showinfo("完成", 
-                    f"翻译完成!\n\nTH: {translated_th} 条\nVN: {translated_vn} 条\n跳过: {skipped} 条\n错误: {errors} 条"))
+                    f"翻译完成!\n\nTH: {stats['translated_th']} 条\nVN: {stats['translated_vn']} 条\n"
+                    f"跳过: {skipped} 条\n错误: {stats['errors']} 条"))
             
         except Exception as e:
             self._log(f"\n错误: {e}")
-            self.root.after(0, lambda: messagebox.showerror("错误", str(e)))
+            self.root.after(0, lambda err=e: messagebox.showerror("错误", str(err)))
         
         finally:
             self.is_translating = False
             self.root.after(0, lambda: self.start_btn.config(state=tk.NORMAL))
             self.root.after(0, lambda: self.stop_btn.config(state=tk.DISABLED))
+            self.root.after(0, lambda: self.pause_btn.config(state=tk.DISABLED, text="暂停"))
     
-    def _save_csv(self, output_file: str, fieldnames: list, rows: list):
-        """保存CSV文件"""
-        with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
+    def _on_translate_event(self, event: dict):
+        """翻译事件（在工作线程中调用，只记录日志和进度，由 _update_log 统一刷新界面）"""
+        kind = event["type"]
+        if kind == "planned":
+            self._log(f"共读取 {event['total_rows']} 行数据")
+            self._log(f"需要翻译 {event['tasks']} 条内容，使用 {event['workers']} 个并发线程")
+            if not event["tasks"]:
+                self._log("没有需要翻译的内容")
+        elif kind == "result":
+            self._log(f"[{event['completed']}/{event['total']}] {event['column']}: "
+                      f"{event['source'][:20]}... -> {event['text'][:20]}...", detail=True)
+        elif kind == "error":
+            # 错误总是单独显示，不合并进摘要
+            self._log(f"[{event['completed']}/{event['total']}] {event['column']}翻译错误: {event['error']}")
+        elif kind == "saved" and not event["final"]:
+            self._log(f"已保存进度: {event['completed']}/{event['total']}", detail=True)
+        elif kind == "notice":
+            self._log(event["message"])
+        elif kind == "progress" and event["total"]:
+            progress = event["completed"] / event["total"] * 100
+            self._set_progress(progress, f"进度: {event['completed']}/{event['total']} ({progress:.1f}%)")
     
     def _stop_translation(self):
-        """停止翻译"""
-        self.is_translating = False
+        """停止翻译：不再开始新的请求，进行中的请求最多再等片刻，已完成的结果会保存"""
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+        self.stop_btn.config(state=tk.DISABLED)
+        self.pause_btn.config(state=tk.DISABLED)
         self._log("\n正在停止翻译...")
+    
+    def _toggle_pause(self):
+        """暂停/继续：暂停时进行中的请求照常完成，不开始新的请求"""
+        if self.cancel_token is None:
+            return
+        if self.cancel_token.paused:
+            self.cancel_token.resume()
+            self.pause_btn.config(text="暂停")
+            self._log("继续翻译")
+        else:
+            self.cancel_token.pause()
+            self.pause_btn.config(text="继续")
+            self._log("已暂停（进行中的请求完成后停止）")
 
 
 def main():
@@ -0,0 +1,507 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+常驻翻译服务 - 多个脚本/用户共享同一套翻译器、翻译记忆和限速状态
+
+每次运行 translate_csv.py 都要重新导入SDK、创建客户端，缓存也从空开始。
+常驻服务启动后一直保留这些状态，构建机上的多个任务共用同一个限速、带缓存的翻译管线。
+
+启动服务:
+    python translate_server.py --port 8765
+    python translate_server.py --socket /tmp/translate.sock --memory translation_memory.json
+
+作为客户端使用:
+    python translate_csv.py input.csv --server http://127.0.0.1:8765
+    python translate_csv.py input.csv --server unix:///tmp/translate.sock
+
+HTTP接口（JSON）:
+    GET  /health               服务状态、已加载的翻译器、翻译记忆条数
+    POST /translate            {"texts": [...], "target_lang": "th", "api_type": "deepseek", "contexts": [...]}
+                               -> {"results": [...]}
+    POST /jobs                 提交CSV翻译任务（参数同 CSVTranslator.translate_csv，另可指定 api_type，
+                               以及 api_key / api_endpoint / request_timeout / hedge_budget / hedge_delay）
+                               -> {"id": "..."}
+    GET  /jobs/<id>            任务状态
+    GET  /jobs/<id>/events     进度流（每行一个JSON: progress / error / notice / finished / failed）
+
+任务中的文件路径是服务端的路径，服务和客户端需要在同一台机器上（或共享目录）。
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+import http.client
+import socketserver
+from urllib.parse import urlparse
+from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from translate_csv import CSVTranslator, load_api_config
+
+# 进度事件的最小间隔（秒），避免逐条推送
+PROGRESS_INTERVAL = 0.5
+
+
+class TranslationMemory:
+    """翻译记忆（线程安全），可持久化到JSON文件"""
+
+    def __init__(self, path: Optional[str] = None, save_every: int = 200):
+        """
+        Args:
+            path: 持久化文件路径（为None时只保存在内存中）
+            save_every: 每新增多少条写一次文件
+        """
+        self.path = path
+        self.save_every = save_every
+        self._entries: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        # 写文件时持有，保证同一时间只有一个线程写临时文件并替换
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for item in json.load(f):
+                    if len(item) == 6:
+                        # 旧格式 [api_type, text, lang, table, sheet, translated]，无法区分没有上下文和 (None, None)
+                        api_type, text, lang, table, sheet, translated = item
+                        context_key = (table, sheet) if table is not None or sheet is not None else None
+                    else:
+                        # [api_type, text, lang, null 或 [table, sheet], translated]
+                        api_type, text, lang, context, translated = item
+                        context_key = tuple(context) if context is not None else None
+                    self._entries[(api_type, text, lang, context_key)] = translated
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            translated = self._entries.get(key)
+            if translated is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return translated
+
+    def put(self, key: tuple, translated: str):
+        with self._lock:
+            self._entries[key] = translated
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.save_every
+        if should_save:
+            try:
+                self.save()
+            except OSError as e:
+                # 写文件失败不影响本次翻译结果，下次达到 save_every 时重试
+                print(f"保存翻译记忆失败: {e}")
+
+    def save(self):
+        """写入持久化文件（先写临时文件再替换）"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                items = [[api_type, text, lang, list(context_key) if context_key is not None else None, translated]
+                         for (api_type, text, lang, context_key), translated in self._entries.items()]
+                self._unsaved = 0
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class Job:
+    """服务端的一个CSV翻译任务"""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.options = options
+        self.status = "queued"
+        self.events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._last_progress = 0.0
+
+    def add_event(self, event: Dict[str, Any]):
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def progress(self, completed: int, total: int):
+        """进度回调（按 PROGRESS_INTERVAL 节流，最后一条总是发送）"""
+        now = time.monotonic()
+        if completed < total and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        self.add_event({"type": "progress", "completed": completed, "total": total})
+
+    def on_event(self, event: Dict[str, Any]):
+        """translate_csv 的事件回调：错误和提示转发给客户端，逐条结果不输出（服务端控制台保持安静）"""
+        if event["type"] == "error":
+            self.add_event({"type": "error", "row": event["row"], "column": event["column"],
+                            "error": event["error"]})
+        elif event["type"] == "notice":
+            self.add_event({"type": "notice", "message": event["message"]})
+
+    def iter_events(self):
+        """依次返回事件，直到任务结束"""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.events) and self.status in ("queued", "running"):
+                    self._cond.wait(1.0)
+                pending = self.events[index:]
+                done = self.status not in ("queued", "running")
+            for event in pending:
+                yield event
+            index += len(pending)
+            if done and index >= len(self.events):
+                return
+
+    def info(self) -> Dict[str, Any]:
+        with self._cond:
+            progress = next((e for e in reversed(self.events) if e["type"] == "progress"), None)
+            return {"id": self.id, "status": self.status, "options": self.options, "progress": progress}
+
+
+class TranslationService:
+    """常驻服务的状态：已创建的翻译器、翻译记忆、任务"""
+
+    # translate_csv 可由客户端指定的参数
+    JOB_OPTIONS = ("input_file", "output_file", "translate_th", "translate_vn", "force",
+                   "batch_size", "delay", "max_workers", "schedule", "llm_batch")
+
+    # 任务可以覆盖的翻译器设置；设置不同的任务使用各自的翻译器（共享翻译记忆）
+    TRANSLATOR_OPTIONS = ("api_key", "api_endpoint", "request_timeout", "hedge_budget", "hedge_delay")
+
+    def __init__(self, memory: Optional[TranslationMemory] = None, max_jobs: int = 2,
+                 request_timeout: float = 60.0, hedge_budget: float = 0.0):
+        """
+        Args:
+            memory: 翻译记忆（所有翻译器共享）
+            max_jobs: 同时执行的CSV任务数
+            request_timeout: 单次请求超时（秒）
+            hedge_budget: 对冲请求预算（0为不启用）
+        """
+        self.config = load_api_config()
+        self.memory = memory
+        self.request_timeout = request_timeout
+        self.hedge_budget = hedge_budget
+        self._translators: Dict[tuple, CSVTranslator] = {}
+        self._translators_lock = threading.Lock()
+        self.jobs: Dict[str, Job] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+        self.started = time.time()
+
+    def get_translator(self, api_type: Optional[str] = None, api_key: Optional[str] = None,
+                       api_endpoint: Optional[str] = None, request_timeout: Optional[float] = None,
+                       hedge_budget: Optional[float] = None, hedge_delay: Optional[float] = None) -> CSVTranslator:
+        """
+        获取（必要时创建）翻译器，相同设置只创建一次，限速和健康状态在所有请求间共享
+
+        未指定的设置使用 api_config.json 和服务启动参数
+        """
+        api_type = api_type or self.config.get("default_type", "google-free")
+        if api_type not in CSVTranslator.API_TYPES:
+            raise ValueError(f"不支持的API类型: {api_type}")
+        section = self.config.get(api_type, {})
+        settings = (
+            api_type,
+            api_key or section.get("api_key"),
+            api_endpoint or section.get("endpoint") or None,
+            request_timeout if request_timeout is not None else self.request_timeout,
+            hedge_budget if hedge_budget is not None else self.hedge_budget,
+            hedge_delay,
+        )
+        with self._translators_lock:
+            translator = self._translators.get(settings)
+            if translator is None:
+                translator = CSVTranslator(
+                    api_type=api_type,
+                    api_key=settings[1],
+                    api_endpoint=settings[2],
+                    api_config=self.config,
+                    request_timeout=settings[3],
+                    hedge_budget=settings[4],
+                    hedge_delay=hedge_delay,
+                )
+                translator.memory = self.memory
+                self._translators[settings] = translator
+            return translator
+
+    def translate(self, texts: List[str], target_lang: str, api_type: Optional[str] = None,
+                  contexts: Optional[List[Optional[Dict[str, str]]]] = None) -> List[str]:
+        """翻译一组文本（并发请求）"""
+        translator = self.get_translator(api_type)
+        contexts = contexts or [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=max(1, min(translator.max_workers, len(texts)))) as executor:
+            return list(executor.map(lambda item: translator.translate_text(item[0], target_lang, item[1]),
+                                     zip(texts, contexts)))
+
+    def submit_job(self, options: Dict[str, Any]) -> Job:
+        """提交CSV翻译任务"""
+        unknown = set(options) - set(self.JOB_OPTIONS) - set(self.TRANSLATOR_OPTIONS) - {"api_type"}
+        if unknown:
+            raise ValueError(f"不支持的任务参数: {', '.join(sorted(unknown))}")
+        if not options.get("input_file"):
+            raise ValueError("缺少 input_file")
+        translator = self.get_translator(options.get("api_type"),
+                                         **{key: options.get(key) for key in self.TRANSLATOR_OPTIONS})
+        job = Job(options)
+        self.jobs[job.id] = job
+
+        def run():
+            job.status = "running"
+            try:
+                kwargs = {key: options[key] for key in self.JOB_OPTIONS if options.get(key) is not None}
+                stats = translator.translate_csv(progress_callback=job.progress, on_event=job.on_event, **kwargs)
+                if self.memory is not None:
+                    self.memory.save()
+                with job._cond:
+                    job.status = "finished"
+                job.add_event({"type": "finished", "stats": stats})
+            except Exception as e:
+                with job._cond:
+                    job.status = "failed"
+                job.add_event({"type": "failed", "error": str(e)})
+
+        self._executor.submit(run)
+        return job
+
+    def health(self) -> Dict[str, Any]:
+        with self._translators_lock:
+            # 同一类型有多个翻译器（任务指定了不同的Key等）时按创建顺序编号，不显示Key
+            translators = {}
+            for settings, t in self._translators.items():
+                name = settings[0] if settings[0] not in translators else f"{settings[0]}#{len(translators)}"
+                translators[name] = t.usage_stats()
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started, 1),
+            "translators": translators,
+            "memory": self.memory.stats() if self.memory is not None else None,
+            "jobs": {job_id: job.status for job_id, job in self.jobs.items()},
+        }
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理（service 由服务器实例提供）"""
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def service(self) -> TranslationService:
+        return self.server.service
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts == ["health"]:
+            self._send_json(self.service.health())
+        elif len(parts) >= 2 and parts[0] == "jobs" and parts[1] in self.service.jobs:
+            job = self.service.jobs[parts[1]]
+            if len(parts) == 2:
+                self._send_json(job.info())
+            elif parts[2:] == ["events"]:
+                # 逐行推送进度，任务结束后关闭连接
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+                self.end_headers()
+                try:
+                    for event in job.iter_events():
+                        self.wfile.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+            else:
+                self._send_json({"error": "not found"}, 404)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        try:
+            data = self._read_json()
+            if self.path == "/translate":
+                results = self.service.translate(data["texts"], data["target_lang"],
+                                                 data.get("api_type"), data.get("contexts"))
+                self._send_json({"results": results})
+            elif self.path == "/jobs":
+                job = self.service.submit_job(data)
+                self._send_json({"id": job.id})
+            else:
+                self._send_json({"error": "not found"}, 404)
+        except (ValueError, KeyError, ImportError) as e:
+            self._send_json({"error": str(e)}, 400)
+        except Exception as e:
+            self._send_json({"error": f"{type(e).__name__}: {e}"}, 500)
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: TranslationService):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+
+
+class ServiceUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: TranslationService):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, ServiceHandler)
+        self.service = service
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler 需要 (host, port) 形式的地址
+        return request, ("unix", 0)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServerClient:
+    """常驻服务的客户端"""
+
+    def __init__(self, url: str, timeout: Optional[float] = None):
+        """
+        Args:
+            url: 服务地址，http://host:port 或 unix:///path/to.sock
+            timeout: 连接/读取超时（秒，进度流不受限制时为None）
+        """
+        self.url = urlparse(url)
+        self.timeout = timeout
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.url.scheme == "unix":
+            return _UnixHTTPConnection(self.url.path, timeout=self.timeout)
+        return http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, data: Optional[Dict[str, Any]] = None) -> http.client.HTTPResponse:
+        conn = self._connect()
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8") if data is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        if response.status >= 400:
+            error = json.loads(response.read() or b"{}").get("error", response.reason)
+            raise RuntimeError(f"翻译服务返回错误 ({response.status}): {error}")
+        return response
+
+    def _json(self, method: str, path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return json.loads(self._request(method, path, data).read())
+
+    def health(self) -> Dict[str, Any]:
+        return self._json("GET", "/health")
+
+    def translate(self, texts: List[str], target_lang: str, api_type: Optional[str] = None,
+                  contexts: Optional[List[Optional[Dict[str, str]]]] = None) -> List[str]:
+        return self._json("POST", "/translate", {"texts": texts, "target_lang": target_lang,
+                                                 "api_type": api_type, "contexts": contexts})["results"]
+
+    def submit_job(self, **options) -> str:
+        return self._json("POST", "/jobs", options)["id"]
+
+    def events(self, job_id: str):
+        """逐条返回任务事件，直到任务结束"""
+        response = self._request("GET", f"/jobs/{job_id}/events")
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+    def run_job(self, input_file: str, output_file: Optional[str] = None, **options) -> dict:
+        """
+        提交CSV翻译任务并显示进度，直到任务结束
+
+        Returns:
+            翻译统计信息（同 CSVTranslator.translate_csv）
+        """
+        options = {key: value for key, value in options.items() if value is not None}
+        job_id = self.submit_job(
+            input_file=os.path.abspath(input_file),
+            output_file=os.path.abspath(output_file) if output_file else None,
+            **options
+        )
+        print(f"已提交到翻译服务，任务: {job_id}")
+        for event in self.events(job_id):
+            if event["type"] == "progress":
+                print(f"进度: {event['completed']}/{event['total']}")
+            elif event["type"] == "error":
+                print(f"第 {event['row'] + 1} 行 {event['column']} 翻译错误: {event['error']}")
+            elif event["type"] == "notice":
+                print(event["message"])
+            elif event["type"] == "finished":
+                print("\n翻译完成!")
+                return event["stats"]
+            elif event["type"] == "failed":
+                raise RuntimeError(f"翻译任务失败: {event['error']}")
+        raise RuntimeError("与翻译服务的连接中断")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻翻译服务 - 共享翻译器、翻译记忆和限速状态")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认: 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口（默认: 8765）")
+    parser.add_argument("--socket", help="改为监听Unix socket（指定路径）")
+    parser.add_argument("--memory", help="翻译记忆文件（JSON，启动时加载，运行中定期保存）")
+    parser.add_argument("--max-jobs", type=int, default=2, help="同时执行的CSV任务数（默认: 2）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单次请求超时秒数（默认: 60）")
+    parser.add_argument("--hedge", type=float, default=0.0, metavar="BUDGET",
+                        help="启用对冲请求，参数为额外请求占比上限（默认: 0，不启用）")
+    args = parser.parse_args()
+
+    memory = TranslationMemory(args.memory)
+    service = TranslationService(memory=memory, max_jobs=args.max_jobs,
+                                 request_timeout=args.timeout, hedge_budget=args.hedge)
+
+    if args.socket:
+        server = ServiceUnixServer(args.socket, service)
+        print(f"翻译服务已启动: unix://{os.path.abspath(args.socket)}")
+    else:
+        server = ServiceHTTPServer((args.host, args.port), service)
+        print(f"翻译服务已启动: http://{args.host}:{server.server_address[1]}")
+    print(f"翻译记忆: {memory.stats()['entries']} 条")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止...")
+    finally:
+        server.server_close()
+        memory.save()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
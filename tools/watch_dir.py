@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+监视目录 - 新的提取文件（如 系统翻译提取_20251219_165646.csv）落地后自动翻译
+
+    python translate_csv.py --watch ../CSV --api-type deepseek
+
+- 优先使用 watchdog（inotify 等系统通知，pip install watchdog），未安装时定期扫描目录
+- 文件大小和修改时间在 settle 秒内不再变化才处理，避免读到写了一半的文件
+- 每个新文件先用同名前缀的上一份翻译结果（*_translated.csv）填充相同中文的译文，
+  只翻译新增或修改的内容
+- 同一进程内复用翻译器和翻译记忆，结果写在输入文件旁边（xxx_translated.csv）
+- 启动时目录中已有的文件不处理
+"""
+
+import os
+import re
+import time
+import fnmatch
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Tuple
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+# 提取文件名末尾的时间戳: xxx_20251219_165646
+_TIMESTAMP_PATTERN = re.compile(r'^(.*)_(\d{8}_\d{6})$')
+
+OUTPUT_SUFFIX = "_translated"
+
+
+def file_prefix(path: Path) -> str:
+    """去掉时间戳后的文件名（同一类提取文件的前缀相同）"""
+    stem = path.stem
+    if stem.endswith(OUTPUT_SUFFIX):
+        stem = stem[:-len(OUTPUT_SUFFIX)]
+    match = _TIMESTAMP_PATTERN.match(stem)
+    return match.group(1) if match else stem
+
+
+def find_previous_output(input_path: Path) -> Optional[Path]:
+    """找到同一前缀、最近一次的翻译结果（不含本文件自己的结果）"""
+    prefix = file_prefix(input_path)
+    own_output = input_path.with_name(f"{input_path.stem}{OUTPUT_SUFFIX}{input_path.suffix}")
+    candidates = [
+        path for path in input_path.parent.glob(f"*{OUTPUT_SUFFIX}{input_path.suffix}")
+        if path != own_output and file_prefix(path) == prefix
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda path: path.stat().st_mtime)
+
+
+def prefill_from_previous(translator, input_path: Path, output_path: Path,
+                          previous_path: Path) -> int:
+    """
+    用上一份翻译结果填充相同中文的译文，写入输出文件
+
+    Args:
+        translator: CSVTranslator（使用其 read_csv/_save_csv/needs_translation）
+        input_path: 新的提取文件
+        output_path: 输出文件
+        previous_path: 上一份翻译结果
+
+    Returns:
+        填充的条数
+    """
+    _, previous_rows = translator.read_csv(str(previous_path))
+    known: Dict[Tuple[str, str], str] = {}
+    for row in previous_rows:
+        zh_text = row.get("ZH", "")
+        for col in ("TH", "VN"):
+            if not translator.needs_translation(zh_text, row.get(col, "")):
+                known[(col, zh_text)] = row[col]
+
+    fieldnames, rows = translator.read_csv(str(input_path))
+    filled = 0
+    for row in rows:
+        zh_text = row.get("ZH", "")
+        for col in ("TH", "VN"):
+            if col in row and translator.needs_translation(zh_text, row.get(col, "")) \
+                    and (col, zh_text) in known:
+                row[col] = known[(col, zh_text)]
+                filled += 1
+    translator._save_csv(str(output_path), fieldnames, rows)
+    return filled
+
+
+class DirectoryWatcher:
+    """监视目录中新出现且已写完的文件"""
+
+    def __init__(self, directory: str, pattern: str = "*翻译提取_*.csv",
+                 settle: float = 2.0, poll_interval: float = 1.0):
+        """
+        Args:
+            directory: 监视的目录
+            pattern: 文件名通配符
+            settle: 文件多少秒没有变化视为写完
+            poll_interval: 检查间隔（秒）
+        """
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.settle = settle
+        self.poll_interval = poll_interval
+
+        # 路径 -> (大小, 修改时间, 最后一次变化的时刻)
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}
+        self._seen = {path for path in self._list_files()}
+        self._dirty = threading.Event()
+        self._observer = None
+
+    def _matches(self, path: Path) -> bool:
+        return fnmatch.fnmatch(path.name, self.pattern) and not path.stem.endswith(OUTPUT_SUFFIX)
+
+    def _list_files(self):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_file() and self._matches(path):
+                    yield path
+
+    def start(self):
+        """启动系统文件通知（未安装 watchdog 时只靠定期扫描）"""
+        if not WATCHDOG_AVAILABLE:
+            return
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                watcher._dirty.set()
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), str(self.directory), recursive=False)
+        self._observer.start()
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+
+    def _scan(self):
+        now = time.monotonic()
+        for path in self._list_files():
+            if path in self._seen:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            previous = self._pending.get(path)
+            if previous is None or previous[:2] != (stat.st_size, stat.st_mtime_ns):
+                self._pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+
+    def wait_ready(self):
+        """阻塞直到有文件写完，返回该文件路径"""
+        while True:
+            # 有系统通知时，没有变化就不扫描目录；待定文件需要按时检查是否写完
+            if self._observer is None or self._dirty.is_set() or self._pending:
+                self._dirty.clear()
+                self._scan()
+
+            now = time.monotonic()
+            for path, (size, _, changed) in sorted(self._pending.items(), key=lambda item: item[1][2]):
+                if size > 0 and now - changed >= self.settle:
+                    del self._pending[path]
+                    self._seen.add(path)
+                    return path
+
+            if self._observer is not None and not self._pending:
+                self._dirty.wait(self.poll_interval * 10)
+            else:
+                time.sleep(self.poll_interval)
+
+
+def watch_directory(translator, directory: str, pattern: str = "*翻译提取_*.csv",
+                    settle: float = 2.0, poll_interval: float = 1.0, **translate_options):
+    """
+    监视目录并翻译新文件（直到 Ctrl+C）
+
+    Args:
+        translator: CSVTranslator 实例（在所有文件间复用）
+        directory: 监视的目录
+        pattern: 文件名通配符
+        settle: 文件多少秒没有变化视为写完
+        poll_interval: 检查间隔（秒）
+        translate_options: 传给 translate_csv 的其它参数
+    """
+    if translator.memory is None:
+        # 同一进程内的所有文件共享翻译记忆
+        from translate_server import TranslationMemory
+        translator.memory = TranslationMemory()
+
+    watcher = DirectoryWatcher(directory, pattern, settle, poll_interval)
+    watcher.start()
+    mode = "系统通知" if WATCHDOG_AVAILABLE else f"每 {poll_interval} 秒扫描"
+    print(f"正在监视目录: {directory}（{pattern}，{mode}），按 Ctrl+C 停止")
+
+    try:
+        while True:
+            input_path = watcher.wait_ready()
+            output_path = input_path.with_name(f"{input_path.stem}{OUTPUT_SUFFIX}{input_path.suffix}")
+            print(f"\n发现新文件: {input_path.name}")
+            try:
+                source = input_path
+                previous = find_previous_output(input_path)
+                if previous is not None:
+                    filled = prefill_from_previous(translator, input_path, output_path, previous)
+                    print(f"沿用 {previous.name} 中的 {filled} 条译文")
+                    source = output_path
+                stats = translator.translate_csv(str(source), str(output_path), **translate_options)
+                print(f"完成: {output_path.name}（TH {stats['translated_th']}，VN {stats['translated_vn']}，"
+                      f"错误 {stats['errors']}）")
+            except Exception as e:
+                print(f"处理 {input_path.name} 失败: {e}")
+    except KeyboardInterrupt:
+        print("\n已停止监视")
+    finally:
+        watcher.stop()
@@ -0,0 +1,524 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分布式翻译队列 - 多台机器协作翻译同一个CSV
+
+把一次翻译任务拆成若干"工作单元"（按 Table 列或按固定条数），存放在一个
+共享目录里（本地磁盘或网络共享盘均可）。各机器上的 worker 使用各自的
+API Key 认领单元，认领通过租约文件实现：租约过期（worker 崩溃/断网）后，
+其它 worker 会自动接手该单元。所有单元完成后由协调端合并回输出CSV。
+
+队列目录结构:
+    job.json                 任务描述（输入文件、表头、单元数等）
+    units/unit_00001.json    工作单元（任务列表 + 所在行的 Table/Sheet/Field，作为翻译上下文）
+    leases/unit_00001.lease  租约（worker 标识 + 过期时间）
+    leases/unit_00001.lock   单元锁（接手/续约/释放租约时短暂持有）
+    results/unit_00001.json  单元结果
+
+使用方法:
+    # 协调端：规划任务
+    python work_queue.py plan input.csv --queue Q:/l10n_queue --by table
+
+    # 各机器（或同一台机器的多个进程）：认领并翻译
+    python work_queue.py worker --queue Q:/l10n_queue --api-type deepseek --api-key KEY
+
+    # 协调端：查看进度 / 合并结果（--wait 会等待全部单元完成）
+    python work_queue.py status --queue Q:/l10n_queue
+    python work_queue.py merge --queue Q:/l10n_queue -o output.csv --wait
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from compressed_io import split_compression_suffix
+from translate_csv import CSVTranslator, load_api_config
+
+
+# 默认租约时长（秒），worker 会在处理过程中定期续约
+DEFAULT_LEASE_SECONDS = 120
+
+# 写入工作单元的上下文列
+CONTEXT_COLUMNS = ("Table", "Sheet", "Field")
+
+# 单元锁只在几次文件操作期间持有，超过这个时间（秒）仍存在说明持有者已崩溃
+LOCK_STALE_SECONDS = 30
+
+
+def _write_json_atomic(path: Path, data: Any):
+    """先写临时文件再替换，避免其它进程读到写了一半的文件"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    """读取JSON文件，文件不存在或内容不完整时返回None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class WorkQueue:
+    """基于共享目录的工作队列"""
+
+    def __init__(self, queue_dir: str):
+        self.root = Path(queue_dir)
+        self.units_dir = self.root / "units"
+        self.leases_dir = self.root / "leases"
+        self.results_dir = self.root / "results"
+
+    # ---------- 协调端 ----------
+
+    def plan(self, input_file: str, translate_th: bool = True, translate_vn: bool = True,
+             force: bool = False, by: str = "table", unit_size: int = 200,
+             lease_seconds: int = DEFAULT_LEASE_SECONDS) -> dict:
+        """
+        规划任务并写入队列目录
+
+        Args:
+            input_file: 输入CSV文件路径
+            translate_th: 是否翻译TH列
+            translate_vn: 是否翻译VN列
+            force: 是否强制翻译（即使已有翻译）
+            by: 拆分方式 ("table": 按Table列分组后再按unit_size切分, "range": 按条数切分)
+            unit_size: 每个单元最多包含的任务数
+            lease_seconds: 租约时长（秒）
+
+        Returns:
+            任务描述（job.json 内容）
+        """
+        if (self.root / "job.json").exists():
+            raise ValueError(f"队列目录已存在任务: {self.root}")
+
+        # 规划只需要读取文件和判断是否需要翻译，不依赖任何翻译API
+        fieldnames, rows = CSVTranslator.read_csv(input_file)
+        stats = {"skipped_th": 0, "skipped_vn": 0}
+        tasks = CSVTranslator.plan_tasks(fieldnames, rows, translate_th, translate_vn, force, stats)
+
+        # 分组
+        if by == "table" and "Table" in fieldnames:
+            groups: Dict[str, list] = {}
+            for task in tasks:
+                groups.setdefault(rows[task[0]].get("Table", ""), []).append(task)
+            group_list = list(groups.values())
+        else:
+            group_list = [tasks]
+
+        units = []
+        for group in group_list:
+            for start in range(0, len(group), unit_size):
+                units.append(group[start:start + unit_size])
+
+        for d in (self.units_dir, self.leases_dir, self.results_dir):
+            d.mkdir(parents=True, exist_ok=True)
+
+        # 与单机翻译相同的上下文（routing 按 Table/Sheet/Field 分流，大模型按 Table/Sheet 提示，翻译记忆的键）
+        context_columns = [c for c in CONTEXT_COLUMNS if c in fieldnames]
+        for n, unit_tasks in enumerate(units, 1):
+            unit_id = f"unit_{n:05d}"
+            contexts = {str(idx): {c: rows[idx].get(c, "") for c in context_columns}
+                        for idx in sorted({task[0] for task in unit_tasks})}
+            _write_json_atomic(self.units_dir / f"{unit_id}.json",
+                               {"id": unit_id, "tasks": unit_tasks, "contexts": contexts})
+
+        job = {
+            "input": str(Path(input_file).resolve()),
+            "fieldnames": fieldnames,
+            "total_rows": len(rows),
+            "total_tasks": len(tasks),
+            "skipped_th": stats["skipped_th"],
+            "skipped_vn": stats["skipped_vn"],
+            "units": len(units),
+            "lease_seconds": lease_seconds,
+            "created_at": time.time(),
+        }
+        _write_json_atomic(self.root / "job.json", job)
+        return job
+
+    def load_job(self) -> dict:
+        """读取任务描述"""
+        job = _read_json(self.root / "job.json")
+        if job is None:
+            raise ValueError(f"队列目录中没有任务: {self.root}")
+        return job
+
+    def unit_ids(self) -> List[str]:
+        """所有工作单元ID（有序）"""
+        return sorted(p.stem for p in self.units_dir.glob("unit_*.json"))
+
+    def status(self) -> dict:
+        """统计队列状态"""
+        now = time.time()
+        done = leased = pending = 0
+        for unit_id in self.unit_ids():
+            if (self.results_dir / f"{unit_id}.json").exists():
+                done += 1
+                continue
+            lease = _read_json(self.leases_dir / f"{unit_id}.lease")
+            if lease and lease.get("expires_at", 0) > now:
+                leased += 1
+            else:
+                pending += 1
+        return {"units": done + leased + pending, "done": done, "leased": leased, "pending": pending}
+
+    def merge(self, output_file: Optional[str] = None, wait: bool = False,
+              poll_interval: float = 5.0) -> dict:
+        """
+        把所有单元结果合并到输出CSV
+
+        Args:
+            output_file: 输出CSV文件路径（默认为输入文件名_translated.csv）
+            wait: 是否等待所有单元完成
+            poll_interval: 等待时的轮询间隔（秒）
+
+        Returns:
+            翻译统计信息
+        """
+        job = self.load_job()
+
+        if wait:
+            while True:
+                status = self.status()
+                if status["done"] == status["units"]:
+                    break
+                print(f"等待中: 完成 {status['done']}/{status['units']}，"
+                      f"处理中 {status['leased']}，待认领 {status['pending']}")
+                time.sleep(poll_interval)
+
+        input_file = job["input"]
+        if output_file is None:
+            input_path = Path(input_file)
+            base_path, compression = split_compression_suffix(input_path)
+            output_file = str(input_path.parent / f"{base_path.stem}_translated{base_path.suffix}{compression}")
+
+        fieldnames, rows = CSVTranslator.read_csv(input_file)
+        if len(rows) != job["total_rows"]:
+            raise ValueError("输入文件在规划后被修改，行数不一致")
+
+        stats = {
+            "total_rows": len(rows),
+            "translated_th": 0,
+            "translated_vn": 0,
+            "skipped_th": job["skipped_th"],
+            "skipped_vn": job["skipped_vn"],
+            "errors": 0,
+            "missing_units": 0,
+        }
+
+        for unit_id in self.unit_ids():
+            result = _read_json(self.results_dir / f"{unit_id}.json")
+            if result is None:
+                stats["missing_units"] += 1
+                continue
+            for idx, col, translated, error in result["results"]:
+                rows[idx][col] = translated
+                if error:
+                    stats["errors"] += 1
+                elif col == "TH":
+                    stats["translated_th"] += 1
+                else:
+                    stats["translated_vn"] += 1
+
+        CSVTranslator._save_csv(output_file, fieldnames, rows)
+        print(f"合并完成! 输出文件: {output_file}")
+        return stats
+
+    # ---------- worker端 ----------
+
+    def _acquire_lock(self, lock_path: Path, timeout: float) -> bool:
+        """用 O_EXCL 创建锁文件，最多等待 timeout 秒"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                pass
+            if self._break_stale_lock(lock_path):
+                continue
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    @staticmethod
+    def _break_stale_lock(lock_path: Path) -> bool:
+        """删除崩溃的 worker 留下的锁，锁已不存在或已删除时返回True"""
+        try:
+            mtime = lock_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return True
+        if mtime / 1e9 + LOCK_STALE_SECONDS > time.time():
+            return False
+        # 以过期锁的修改时间作标识：同一个过期锁只有一个 worker 能删除，
+        # 删除前再确认它没有被换成新锁
+        break_path = lock_path.with_name(f"{lock_path.name}.{mtime}.break")
+        try:
+            os.close(os.open(break_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        try:
+            if lock_path.stat().st_mtime_ns == mtime:
+                os.remove(lock_path)
+            return True
+        except FileNotFoundError:
+            return True
+        finally:
+            os.remove(break_path)
+
+    @contextmanager
+    def _unit_lock(self, unit_id: str, timeout: float = 0.0):
+        """
+        单元锁：检查租约和修改租约在锁内完成，期间其它 worker 不能接手、续约或释放
+
+        Yields:
+            是否取得锁
+        """
+        lock_path = self.leases_dir / f"{unit_id}.lock"
+        locked = self._acquire_lock(lock_path, timeout)
+        try:
+            yield locked
+        finally:
+            if locked:
+                os.remove(lock_path)
+
+    @staticmethod
+    def _lease_active(lease_path: Path, lease_seconds: int) -> bool:
+        """租约是否仍有效"""
+        lease = _read_json(lease_path)
+        if lease is not None:
+            return lease.get("expires_at", 0) > time.time()
+        try:
+            # 无法解析（旧版本写了一半的文件）时按修改时间判断
+            return lease_path.stat().st_mtime + lease_seconds > time.time()
+        except FileNotFoundError:
+            return False
+
+    def claim(self, worker_id: str, lease_seconds: int) -> Optional[dict]:
+        """
+        认领一个未完成的单元
+
+        没有租约或租约已过期的单元可以认领。检查和写入租约都在单元锁内进行，
+        多个 worker 同时接手同一个过期租约时只有一个成功。
+
+        Returns:
+            工作单元，没有可认领的单元时返回None
+        """
+        for unit_id in self.unit_ids():
+            result_path = self.results_dir / f"{unit_id}.json"
+            lease_path = self.leases_dir / f"{unit_id}.lease"
+            if result_path.exists() or self._lease_active(lease_path, lease_seconds):
+                continue
+
+            with self._unit_lock(unit_id) as locked:
+                # 其它 worker 正在操作这个单元，或在取得锁之前已被认领/完成
+                if not locked or result_path.exists() or self._lease_active(lease_path, lease_seconds):
+                    continue
+                _write_json_atomic(lease_path, {"worker": worker_id, "expires_at": time.time() + lease_seconds})
+
+            unit = _read_json(self.units_dir / f"{unit_id}.json")
+            if unit is None:
+                self.release(unit_id, worker_id)
+                continue
+            return unit
+        return None
+
+    def renew(self, unit_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """续约，租约已被其它 worker 接手时返回False"""
+        lease_path = self.leases_dir / f"{unit_id}.lease"
+        with self._unit_lock(unit_id, timeout=5.0) as locked:
+            if not locked:
+                # 暂时取不到锁，下次再续（续约间隔只有租约时长的1/3）
+                return True
+            lease = _read_json(lease_path)
+            if lease is None or lease.get("worker") != worker_id:
+                return False
+            _write_json_atomic(lease_path, {"worker": worker_id, "expires_at": time.time() + lease_seconds})
+            return True
+
+    def release(self, unit_id: str, worker_id: str):
+        """释放租约（取不到锁时不释放，等它过期）"""
+        lease_path = self.leases_dir / f"{unit_id}.lease"
+        with self._unit_lock(unit_id, timeout=5.0) as locked:
+            if not locked:
+                return
+            lease = _read_json(lease_path)
+            if lease is not None and lease.get("worker") == worker_id:
+                try:
+                    os.remove(lease_path)
+                except FileNotFoundError:
+                    pass
+
+    def complete(self, unit_id: str, worker_id: str, results: list):
+        """提交单元结果并释放租约"""
+        _write_json_atomic(self.results_dir / f"{unit_id}.json",
+                           {"id": unit_id, "worker": worker_id, "results": results})
+        self.release(unit_id, worker_id)
+
+    def run_worker(self, translator: CSVTranslator, worker_id: Optional[str] = None,
+                   delay: float = 0.1, max_workers: int = 5, idle_exit: bool = True,
+                   poll_interval: float = 5.0) -> dict:
+        """
+        循环认领并翻译工作单元
+
+        Args:
+            translator: 翻译器（使用本机的API设置）
+            worker_id: worker 标识（默认: 主机名-进程号）
+            delay: 每次翻译后的延迟（秒）
+            max_workers: 单元内的并发线程数
+            idle_exit: 没有可认领的单元时是否退出（否则等待过期租约）
+            poll_interval: 等待时的轮询间隔（秒）
+
+        Returns:
+            worker 统计信息
+        """
+        job = self.load_job()
+        lease_seconds = job.get("lease_seconds", DEFAULT_LEASE_SECONDS)
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        stats = {"units": 0, "translated": 0, "errors": 0, "lost_leases": 0}
+
+        def translate_task(task, contexts):
+            idx, col, lang, text = task
+            try:
+                result = translator.translate_text(text, lang, context=contexts.get(str(idx)))
+                time.sleep(delay)
+                return [idx, col, result, None]
+            except Exception as e:
+                return [idx, col, text, str(e)]
+
+        while True:
+            unit = self.claim(worker_id, lease_seconds)
+            if unit is None:
+                status = self.status()
+                if status["done"] == status["units"] or (idle_exit and status["leased"] == 0):
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            unit_id = unit["id"]
+            print(f"[{worker_id}] 认领 {unit_id}，共 {len(unit['tasks'])} 条")
+
+            # 后台续约
+            stop_renew = threading.Event()
+            lost = threading.Event()
+
+            def keep_lease():
+                while not stop_renew.wait(lease_seconds / 3):
+                    if not self.renew(unit_id, worker_id, lease_seconds):
+                        lost.set()
+                        return
+
+            renew_thread = threading.Thread(target=keep_lease, daemon=True)
+            renew_thread.start()
+
+            results = []
+            try:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    contexts = unit.get("contexts", {})
+                    futures = [executor.submit(translate_task, task, contexts) for task in unit["tasks"]]
+                    for future in as_completed(futures):
+                        results.append(future.result())
+            finally:
+                stop_renew.set()
+                renew_thread.join()
+
+            if lost.is_set():
+                # 租约已被其它 worker 接手，结果仍然有效，先到先得
+                stats["lost_leases"] += 1
+
+            results.sort(key=lambda r: (r[0], r[1]))
+            self.complete(unit_id, worker_id, results)
+            stats["units"] += 1
+            for r in results:
+                if r[3]:
+                    stats["errors"] += 1
+                else:
+                    stats["translated"] += 1
+            print(f"[{worker_id}] 完成 {unit_id}")
+
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分布式翻译队列 - 多台机器协作翻译同一个CSV")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = subparsers.add_parser("plan", help="规划任务并写入队列目录")
+    plan_parser.add_argument("input", help="输入CSV文件路径")
+    plan_parser.add_argument("--queue", required=True, help="队列目录（共享目录）")
+    plan_parser.add_argument("--no-th", action="store_true", help="不翻译TH列")
+    plan_parser.add_argument("--no-vn", action="store_true", help="不翻译VN列")
+    plan_parser.add_argument("-f", "--force", action="store_true", help="强制翻译（即使已有翻译）")
+    plan_parser.add_argument("--by", choices=["table", "range"], default="table",
+                             help="拆分方式（默认: table）")
+    plan_parser.add_argument("--unit-size", type=int, default=200, help="每个单元的最大任务数（默认: 200）")
+    plan_parser.add_argument("--lease", type=int, default=DEFAULT_LEASE_SECONDS,
+                             help=f"租约时长秒数（默认: {DEFAULT_LEASE_SECONDS}）")
+
+    worker_parser = subparsers.add_parser("worker", help="认领并翻译工作单元")
+    worker_parser.add_argument("--queue", required=True, help="队列目录（共享目录）")
+    worker_parser.add_argument("--api-type", choices=list(CSVTranslator.API_TYPES),
+                               help="翻译API类型（默认: api_config.json 中的 default_type）")
+    worker_parser.add_argument("--api-key", help="API密钥（默认: api_config.json 中的设置）")
+    worker_parser.add_argument("--api-endpoint", help="自定义API端点")
+    worker_parser.add_argument("--worker-id", help="worker 标识（默认: 主机名-进程号）")
+    worker_parser.add_argument("--delay", type=float, default=0.1, help="翻译延迟秒数（默认: 0.1）")
+    worker_parser.add_argument("--workers", type=int, default=5, help="并发线程数（默认: 5）")
+    worker_parser.add_argument("--wait", action="store_true",
+                               help="没有可认领的单元时继续等待过期租约，直到全部完成")
+
+    status_parser = subparsers.add_parser("status", help="查看队列进度")
+    status_parser.add_argument("--queue", required=True, help="队列目录（共享目录）")
+
+    merge_parser = subparsers.add_parser("merge", help="合并结果到输出CSV")
+    merge_parser.add_argument("--queue", required=True, help="队列目录（共享目录）")
+    merge_parser.add_argument("-o", "--output", help="输出CSV文件路径")
+    merge_parser.add_argument("--wait", action="store_true", help="等待所有单元完成后再合并")
+
+    args = parser.parse_args()
+    queue = WorkQueue(args.queue)
+
+    if args.command == "plan":
+        job = queue.plan(args.input, translate_th=not args.no_th, translate_vn=not args.no_vn,
+                         force=args.force, by=args.by, unit_size=args.unit_size,
+                         lease_seconds=args.lease)
+        print(f"已规划 {job['total_tasks']} 条任务，共 {job['units']} 个单元: {args.queue}")
+
+    elif args.command == "worker":
+        config = load_api_config()
+        api_type = args.api_type or config.get("default_type", "google-free")
+        api_key = args.api_key or config.get(api_type, {}).get("api_key")
+        api_endpoint = args.api_endpoint or config.get(api_type, {}).get("endpoint") or None
+        translator = CSVTranslator(api_type=api_type, api_key=api_key, api_endpoint=api_endpoint)
+        stats = queue.run_worker(translator, worker_id=args.worker_id, delay=args.delay,
+                                 max_workers=args.workers, idle_exit=not args.wait)
+        print(f"\n完成单元: {stats['units']}，翻译: {stats['translated']}，错误: {stats['errors']}")
+
+    elif args.command == "status":
+        status = queue.status()
+        print(f"单元: {status['units']}，完成: {status['done']}，"
+              f"处理中: {status['leased']}，待认领: {status['pending']}")
+
+    elif args.command == "merge":
+        stats = queue.merge(output_file=args.output, wait=args.wait)
+        print("\n=== 翻译统计 ===")
+        print(f"总行数: {stats['total_rows']}")
+        print(f"翻译TH: {stats['translated_th']} (跳过: {stats['skipped_th']})")
+        print(f"翻译VN: {stats['translated_vn']} (跳过: {stats['skipped_vn']})")
+        print(f"错误数: {stats['errors']}")
+        if stats["missing_units"]:
+            print(f"未完成单元: {stats['missing_units']}")
+
+
+if __name__ == "__main__":
+    main()